@@ -1,7 +1,33 @@
-from .embedding_based import (
-    EmbeddingModel,
-    EmbeddingPrompts,
-    SentenceEmbeddingBasedExtractor,
+from typing import TYPE_CHECKING
+
+from .utils.lazy_import import lazy_attributes
+
+
+if TYPE_CHECKING:
+    from .embedding_based import (
+        EmbeddingModel,
+        EmbeddingPrompts,
+        SentenceEmbeddingBasedExtractor,
+    )
+    from .generation_based import GenerationBasedExtractor
+    from .graph_based_or_statistical import ClassicalExtractor
+
+# Each extractor family is imported on first access, together with its heavy
+# dependencies (sentence-transformers and spaCy, langrila, pke)
+__all__ = [
+    "ClassicalExtractor",
+    "EmbeddingModel",
+    "EmbeddingPrompts",
+    "GenerationBasedExtractor",
+    "SentenceEmbeddingBasedExtractor",
+]
+__getattr__, __dir__ = lazy_attributes(
+    module_globals=globals(),
+    attributes={
+        "EmbeddingModel": ".embedding_based.data",
+        "EmbeddingPrompts": ".embedding_based.data",
+        "SentenceEmbeddingBasedExtractor": ".embedding_based.extractor",
+        "GenerationBasedExtractor": ".generation_based.extractor",
+        "ClassicalExtractor": ".graph_based_or_statistical.extractor",
+    },
 )
-from .generation_based import GenerationBasedExtractor
-from .graph_based_or_statistical import ClassicalExtractor
@@ -1,3 +1,4 @@
+import asyncio
 import os
 import re
 from logging import Logger
@@ -269,6 +270,74 @@ class BaseExtractor:
             )
         return Outputs(keyphrases=[flatten])
 
+    @property
+    def _descending(self) -> bool:
+        """Whether a higher score means a more important keyphrase."""
+        return True
+
+    def _make_outputs(self, keyphrases_list: list[list[Keyphrase]]) -> Outputs:
+        """
+        Builds the outputs of one document from the keyphrases of its chunks.
+
+        Args:
+            keyphrases_list (list[list[Keyphrase]]): The keyphrases of each chunk.
+
+        Returns:
+            Outputs: The keyphrases of each chunk, flattened if `flat_output` is set.
+        """
+        outputs: Outputs = Outputs(keyphrases=keyphrases_list)
+        if self.logger:
+            self.logger.debug(f"Outputs: {outputs.model_dump_json(indent=4)}")
+
+        if self.flat_output and len(outputs.keyphrases) > 1:
+            if self.logger:
+                self.logger.info("Flatten outputs")
+            outputs = self._flatten_outputs(
+                keyphrases_list=outputs.keyphrases,
+                use_order=self.use_order,
+                descending=self._descending,
+                rrf_k=self.rrf_k,
+            )
+        return outputs
+
+    def _unique_chunks(
+        self, docs: list[list[str]]
+    ) -> tuple[list[str], list[list[int]]]:
+        """
+        Collects the distinct chunks of several documents.
+
+        Args:
+            docs (list[list[str]]): The chunks of each document.
+
+        Returns:
+            tuple[list[str], list[list[int]]]: The distinct chunks and, for each
+                document, the indices of its chunks in that list.
+        """
+        chunk_ids: dict[str, int] = {}
+        indices: list[list[int]] = [
+            [chunk_ids.setdefault(chunk, len(chunk_ids)) for chunk in chunks]
+            for chunks in docs
+        ]
+        return list(chunk_ids), indices
+
+    def _extract_batch(
+        self, docs: list[list[str]], top_n_phrases: int
+    ) -> list[list[list[Keyphrase]]]:
+        """
+        Extracts keyphrases from the chunks of several documents at once.
+
+        Args:
+            docs (list[list[str]]): The preprocessed chunks of each document.
+            top_n_phrases (int): The maximum number of keyphrases per chunk.
+
+        Returns:
+            list[list[list[Keyphrase]]]: The keyphrases of each chunk of each document.
+
+        Raises:
+            NotImplementedError: This method is not implemented yet.
+        """
+        raise NotImplementedError("This method is not implemented.")
+
     def get_keyphrase(
         self, input_text: str | list[str] | Inputs, top_n_phrases: int = 10
     ) -> Outputs:
@@ -290,3 +359,54 @@ class BaseExtractor:
 
         # Implement the process of keyphrase extraction here.
         raise NotImplementedError("This method is not implemented.")
+
+    async def aget_keyphrase(
+        self, input_text: str | list[str] | Inputs, top_n_phrases: int = 10
+    ) -> Outputs:
+        """
+        Extracts keyphrases from the input text without blocking the event loop.
+
+        By default `get_keyphrase` runs in a worker thread. Extractors that can wait
+        on I/O natively override this method.
+
+        Args:
+            input_text (str | list[str] | Inputs): The input text or preprocessed data.
+            top_n_phrases (int): The maximum number of keyphrases to extract.
+
+        Returns:
+            Outputs: Extracted keyphrase outputs.
+        """
+        return await asyncio.to_thread(
+            self.get_keyphrase, input_text=input_text, top_n_phrases=top_n_phrases
+        )
+
+    def get_keyphrase_batch(
+        self, docs: list[str] | list[Inputs], top_n_phrases: int = 10
+    ) -> list[Outputs]:
+        """
+        Extracts keyphrases from many independent documents in one call.
+
+        Each document is chunked and its results are fused exactly as in
+        `get_keyphrase`, while the chunks of all documents are processed together.
+
+        Args:
+            docs (list[str] | list[Inputs]): The documents, each given as a text or as
+                preprocessed chunks.
+            top_n_phrases (int): The maximum number of keyphrases to extract.
+
+        Returns:
+            list[Outputs]: Extracted keyphrase outputs in the same order as `docs`.
+        """
+        verified_inputs: list[Inputs] = [
+            self._verify_input(input_text=doc) for doc in docs
+        ]
+        if self.logger:
+            self.logger.info(f"Run keyphrase extraction on {len(docs)} documents.")
+        keyphrases_lists = self._extract_batch(
+            docs=[verified_input.docs for verified_input in verified_inputs],
+            top_n_phrases=top_n_phrases,
+        )
+        return [
+            self._make_outputs(keyphrases_list=keyphrases_list)
+            for keyphrases_list in keyphrases_lists
+        ]
@@ -1,6 +1,37 @@
-from .data import (
-    EmbeddingModel,
-    EmbeddingPrompts,
-    SentenceEmbeddingBasedExtractionConfig,
+from typing import TYPE_CHECKING
+
+from ..utils.lazy_import import lazy_attributes
+
+
+if TYPE_CHECKING:
+    from .cache import EmbeddingCache
+    from .data import (
+        EmbeddingCacheConfig,
+        EmbeddingCacheStats,
+        EmbeddingModel,
+        EmbeddingPrompts,
+        SentenceEmbeddingBasedExtractionConfig,
+    )
+    from .extractor import SentenceEmbeddingBasedExtractor
+
+__all__ = [
+    "EmbeddingCache",
+    "EmbeddingCacheConfig",
+    "EmbeddingCacheStats",
+    "EmbeddingModel",
+    "EmbeddingPrompts",
+    "SentenceEmbeddingBasedExtractionConfig",
+    "SentenceEmbeddingBasedExtractor",
+]
+__getattr__, __dir__ = lazy_attributes(
+    module_globals=globals(),
+    attributes={
+        "EmbeddingCache": ".cache",
+        "EmbeddingCacheConfig": ".data",
+        "EmbeddingCacheStats": ".data",
+        "EmbeddingModel": ".data",
+        "EmbeddingPrompts": ".data",
+        "SentenceEmbeddingBasedExtractionConfig": ".data",
+        "SentenceEmbeddingBasedExtractor": ".extractor",
+    },
 )
-from .extractor import SentenceEmbeddingBasedExtractor
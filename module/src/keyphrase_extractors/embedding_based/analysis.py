@@ -0,0 +1,162 @@
+from pydantic import BaseModel
+from spacy.tokens.doc import Doc
+
+from .grammar import PosIdArray, to_pos_ids
+
+
+FULL_WIDTH_SENTENCE_END_MARKS = ("。", "！", "？", "．")
+HALF_WIDTH_SENTENCE_END_MARKS = (".", "!", "?")
+
+
+class AnalyzedSentence(BaseModel):
+    text: str
+    token_start: int
+    token_end: int
+
+
+class DocumentAnalysis:
+    """
+    The result of parsing one chunk with spaCy, shared by every stage of
+    `JapanesePhraseRankingModel`.
+
+    Sentence boundaries, tokens, POS tags and character offsets are all derived from
+    the single `Doc` of the chunk. A sentence ends after a full-width end mark, a
+    line break, or a half-width end mark followed by whitespace, and sentences
+    shorter than `minimum_characters` are concatenated with the following ones.
+
+    Only these token attributes are kept, not the `Doc` itself, since a GiNZA `Doc`
+    of a long chunk holds several megabytes of analysis results.
+
+    Attributes:
+        text (str): The chunk.
+        words (list[str]): The surface form of each token.
+        words_pos (list[str]): The universal POS tag of each token.
+        pos_ids (PosIdArray): The integer POS id of each token.
+        char_offsets (list[int]): The character offset of each token in `text`.
+        sentences (list[AnalyzedSentence]): The sentences of the chunk.
+    """
+
+    def __init__(self, text: str, doc: Doc, minimum_characters: int):
+        self.text = text
+        self.words: list[str] = [token.text for token in doc]
+        self.words_pos: list[str] = [token.pos_ for token in doc]
+        self.pos_ids: PosIdArray = to_pos_ids(words_pos=self.words_pos)
+        self.char_offsets: list[int] = [token.idx for token in doc]
+        self._has_whitespace: list[bool] = [bool(token.whitespace_) for token in doc]
+        self.sentences = self._split_into_sentences(
+            minimum_characters=minimum_characters
+        )
+        self._sentence_by_text = {
+            _sentence.text: _sentence for _sentence in self.sentences
+        }
+
+    def _is_sentence_end(self, i: int) -> bool:
+        word = self.words[i]
+        if word.endswith(FULL_WIDTH_SENTENCE_END_MARKS) or "\n" in word:
+            return True
+        if word.endswith(HALF_WIDTH_SENTENCE_END_MARKS):
+            return self._has_whitespace[i] or (
+                i + 1 < len(self.words) and self.words[i + 1][:1].isspace()
+            )
+        return False
+
+    def _char_span(self, token_start: int, token_end: int) -> tuple[int, int]:
+        last = token_end - 1
+        return (
+            self.char_offsets[token_start],
+            self.char_offsets[last] + len(self.words[last]),
+        )
+
+    def _split_into_sentences(self, minimum_characters: int) -> list[AnalyzedSentence]:
+        pieces: list[tuple[int, int]] = []
+        piece_start = 0
+        for i in range(len(self.words)):
+            if self._is_sentence_end(i):
+                pieces.append((piece_start, i + 1))
+                piece_start = i + 1
+        if piece_start < len(self.words):
+            pieces.append((piece_start, len(self.words)))
+
+        sentences: list[AnalyzedSentence] = []
+        buffer = ""
+        buffer_start = buffer_end = 0
+        for token_start, token_end in pieces:
+            start_char, end_char = self._char_span(token_start, token_end)
+            piece_text = self.text[start_char:end_char].strip()
+            if not piece_text:
+                continue
+            if not buffer:
+                buffer_start = token_start
+            buffer += "\n" + piece_text
+            buffer_end = token_end
+            if len(buffer) >= minimum_characters:
+                sentences.append(
+                    AnalyzedSentence(
+                        text=buffer, token_start=buffer_start, token_end=buffer_end
+                    )
+                )
+                buffer = ""
+        if buffer:
+            sentences.append(
+                AnalyzedSentence(
+                    text=buffer, token_start=buffer_start, token_end=buffer_end
+                )
+            )
+        return sentences
+
+    def sentence_texts(self) -> list[str]:
+        """Returns the text of each sentence."""
+        return [_sentence.text for _sentence in self.sentences]
+
+    def get_sentence(self, text: str) -> AnalyzedSentence:
+        """
+        Looks up a sentence by the text returned from `sentence_texts`.
+
+        Args:
+            text (str): The text of the sentence.
+
+        Returns:
+            AnalyzedSentence: The sentence.
+        """
+        return self._sentence_by_text[text]
+
+    def sentence_words(self, sentence: AnalyzedSentence) -> tuple[list[str], list[str]]:
+        """
+        Returns the tokens of a sentence and their POS tags.
+
+        Args:
+            sentence (AnalyzedSentence): A sentence of this chunk.
+
+        Returns:
+            tuple[list[str], list[str]]: The surface forms and the POS tags.
+        """
+        return (
+            self.words[sentence.token_start : sentence.token_end],
+            self.words_pos[sentence.token_start : sentence.token_end],
+        )
+
+    def span_text(self, token_start: int, token_end: int) -> str:
+        """
+        Returns the original text of a token span.
+
+        Args:
+            token_start (int): The index of the first token in the chunk.
+            token_end (int): The index after the last token in the chunk.
+
+        Returns:
+            str: The text of the span with surrounding whitespace removed.
+        """
+        start_char, end_char = self._char_span(token_start, token_end)
+        return self.text[start_char:end_char].strip()
+
+    def sentence_pos_ids(self, sentence: AnalyzedSentence) -> PosIdArray:
+        """
+        Returns the integer POS ids of the tokens of a sentence.
+
+        Args:
+            sentence (AnalyzedSentence): A sentence of this chunk.
+
+        Returns:
+            PosIdArray: The POS id of each token.
+        """
+        return self.pos_ids[sentence.token_start : sentence.token_end]
@@ -0,0 +1,263 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from .data import (
+    BackendVerification,
+    EmbeddingBackend,
+    EmbeddingModel,
+    OnnxQuantization,
+    PromptName,
+)
+from .scoring import l2_normalize
+
+
+# sentence-transformers is imported when a model is loaded, so that the command
+# line interface starts without importing torch
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+
+SAMPLE_TEXTS = [
+    "自然言語処理は、人間の言語をコンピュータで扱う技術です。",
+    "キーフレーズ抽出では、文書の内容を表す語句を選びます。",
+    "文埋め込みモデルを用いて、文と語句の類似度を計算する。",
+    "東京都は日本の首都であり、多くの企業が本社を置いている。",
+]
+
+
+def quantized_file_name(quantization: OnnxQuantization) -> str:
+    """
+    Returns the file name of a dynamically quantized ONNX model, relative to the
+    model directory, as written by `export_model`.
+
+    Args:
+        quantization (OnnxQuantization): The quantization configuration.
+
+    Returns:
+        str: The file name.
+    """
+    return f"onnx/model_qint8_{quantization}.onnx"
+
+
+def load_embedding_model(model_config: EmbeddingModel) -> "SentenceTransformer":
+    """
+    Loads an embedding model on the backend selected by `model_config`.
+
+    Every backend is a `SentenceTransformer`, so `encode` keeps the same contract,
+    prompts included. A model without an ONNX or OpenVINO file is exported on the
+    fly by sentence-transformers; a dynamically quantized ONNX model must first be
+    exported with `export_model`.
+
+    Args:
+        model_config (EmbeddingModel): The model name or directory, the backend and
+                                       the device.
+
+    Returns:
+        SentenceTransformer: The embedding model.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    model_kwargs: dict[str, Any] = {}
+    if model_config.quantization:
+        model_kwargs["file_name"] = quantized_file_name(
+            quantization=model_config.quantization
+        )
+    elif model_config.model_file_name:
+        model_kwargs["file_name"] = model_config.model_file_name
+
+    return SentenceTransformer(
+        model_name_or_path=model_config.name,
+        prompts=model_config.prompts.model_dump() if model_config.prompts else None,
+        backend=model_config.backend,
+        model_kwargs=model_kwargs or None,
+        **model_config.model_dump(include={"device", "trust_remote_code"}),
+    )
+
+
+def export_model(
+    model_name: str,
+    output_dirpath: Path,
+    backend: EmbeddingBackend = "onnx",
+    quantization: OnnxQuantization | None = None,
+    trust_remote_code: bool = False,
+) -> Path:
+    """
+    Exports an embedding model to a local directory for the ONNX or OpenVINO
+    backend, optionally with a dynamically quantized ONNX model next to it.
+
+    The directory can then be used as `EmbeddingModel.name`.
+
+    Args:
+        model_name (str): The model name on the Hugging Face Hub or a directory.
+        output_dirpath (Path): The directory the model is saved to.
+        backend (EmbeddingBackend): "onnx" or "openvino".
+        quantization (OnnxQuantization | None): The dynamic quantization
+                                                configuration, ONNX only.
+        trust_remote_code (bool): Whether to allow custom code of the model.
+
+    Returns:
+        Path: The path of the exported model file.
+
+    Raises:
+        ValueError: If `backend` is "torch", or `quantization` is set for OpenVINO.
+    """
+    if backend == "torch":
+        raise ValueError("Only the ONNX and OpenVINO backends can be exported.")
+    if quantization and backend != "onnx":
+        raise ValueError("`quantization` requires the ONNX backend.")
+
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(
+        model_name_or_path=model_name,
+        backend=backend,
+        device="cpu",
+        trust_remote_code=trust_remote_code,
+    )
+    model.save(str(output_dirpath))
+    if quantization is None:
+        if backend == "openvino":
+            return output_dirpath / "openvino" / "openvino_model.xml"
+        return output_dirpath / "onnx" / "model.onnx"
+
+    # requires optimum and onnxruntime
+    from sentence_transformers import (
+        export_dynamic_quantized_onnx_model,  # type: ignore
+    )
+
+    export_dynamic_quantized_onnx_model(
+        model=model,
+        quantization_config=quantization,
+        model_name_or_path=str(output_dirpath),
+    )
+    return output_dirpath / quantized_file_name(quantization=quantization)
+
+
+def verify_backend(
+    reference: "SentenceTransformer",
+    candidate: "SentenceTransformer",
+    texts: list[str],
+    prompt_name: PromptName | None = None,
+    batchsize: int = 32,
+) -> BackendVerification:
+    """
+    Compares the embeddings of two backends of the same model.
+
+    Args:
+        reference (SentenceTransformer): The reference model, usually on torch.
+        candidate (SentenceTransformer): The model to verify.
+        texts (list[str]): The texts to encode.
+        prompt_name (PromptName | None): The prompt to encode the texts with.
+        batchsize (int): The batch size for encoding.
+
+    Returns:
+        BackendVerification: The cosine similarities between the embeddings of each
+            text and the largest absolute difference of the normalized embeddings.
+    """
+    embeddings = [
+        l2_normalize(
+            embeddings=model.encode(  # type: ignore
+                sentences=texts,
+                prompt_name=prompt_name,
+                batch_size=batchsize,
+                convert_to_numpy=True,
+            )
+        )
+        for model in [reference, candidate]
+    ]
+    cosines = (embeddings[0] * embeddings[1]).sum(axis=1)
+    return BackendVerification(
+        n_texts=len(texts),
+        min_cosine=float(cosines.min()),
+        mean_cosine=float(cosines.mean()),
+        max_abs_diff=float(np.abs(embeddings[0] - embeddings[1]).max()),
+    )
+
+
+def _load_texts(dataset_json_path: Path | None, max_texts: int) -> list[str]:
+    if dataset_json_path is None:
+        return SAMPLE_TEXTS
+    with dataset_json_path.open(encoding="utf-8") as f:
+        dataset = json.load(f)
+    # the evaluation dataset format: {split: [{"text": ...}, ...]}
+    texts = [
+        _sample["text"][:512] for _samples in dataset.values() for _sample in _samples
+    ]
+    return texts[:max_texts]
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Exports an embedding model for the ONNX or OpenVINO backend and verifies it
+    against the torch backend.
+
+    Usage:
+        python -m keyphrase_extractors.embedding_based.backend export \\
+            cl-nagoya/ruri-base ../output/models/ruri-base --quantization avx2
+        python -m keyphrase_extractors.embedding_based.backend verify \\
+            cl-nagoya/ruri-base ../output/models/ruri-base --quantization avx2
+
+    Returns:
+        int: The exit status, 1 if the verification fails.
+    """
+    parser = argparse.ArgumentParser(
+        prog="keyphrase_extractors.embedding_based.backend"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for command in ["export", "verify"]:
+        subparser = subparsers.add_parser(command)
+        subparser.add_argument("model_name", help="The original model.")
+        subparser.add_argument("output_dirpath", type=Path)
+        subparser.add_argument(
+            "--backend", choices=["onnx", "openvino"], default="onnx"
+        )
+        subparser.add_argument(
+            "--quantization", choices=["arm64", "avx2", "avx512", "avx512_vnni"]
+        )
+        subparser.add_argument("--trust-remote-code", action="store_true")
+    verify_parser = subparsers.choices["verify"]
+    verify_parser.add_argument("--dataset", type=Path, default=None)
+    verify_parser.add_argument("--max-texts", type=int, default=64)
+    verify_parser.add_argument("--min-cosine", type=float, default=0.99)
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        path = export_model(
+            model_name=args.model_name,
+            output_dirpath=args.output_dirpath,
+            backend=args.backend,
+            quantization=args.quantization,
+            trust_remote_code=args.trust_remote_code,
+        )
+        print(f"Exported: {path}")
+        return 0
+
+    reference = load_embedding_model(
+        model_config=EmbeddingModel(
+            name=args.model_name, trust_remote_code=args.trust_remote_code
+        )
+    )
+    candidate = load_embedding_model(
+        model_config=EmbeddingModel(
+            name=str(args.output_dirpath),
+            trust_remote_code=args.trust_remote_code,
+            backend=args.backend,
+            quantization=args.quantization,
+        )
+    )
+    verification = verify_backend(
+        reference=reference,
+        candidate=candidate,
+        texts=_load_texts(dataset_json_path=args.dataset, max_texts=args.max_texts),
+    )
+    print(verification.model_dump_json(indent=4))
+    return 0 if verification.min_cosine >= args.min_cosine else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
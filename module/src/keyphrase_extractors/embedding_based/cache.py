@@ -0,0 +1,302 @@
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+from weakref import WeakValueDictionary
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .data import (
+    EmbeddingArray,
+    EmbeddingBackend,
+    EmbeddingCacheConfig,
+    EmbeddingCacheStats,
+    EmbeddingPrecision,
+    EmbeddingPrompts,
+    OnnxQuantization,
+)
+
+
+class _MemmapStore:
+    """
+    An append-only on-disk store of embedding vectors.
+
+    Vectors are appended to `vectors.bin` and read back through a read-only
+    `numpy.memmap`. Keys are appended to `keys.txt` in row order, each after its
+    vector, so the store survives restarts. On reload, a partially written key
+    line, a partially written vector row and a vector row whose key was never
+    written are truncated away, so that the two files stay aligned.
+
+    Open stores with `_open_store`, which hands out one store per directory while
+    any cache holds it: the row of a new vector is the number of rows in the file,
+    so two stores appending to the same files would assign diverging rows. A
+    directory is not meant to be written by several processes at once.
+    """
+
+    def __init__(self, dirpath: Path):
+        dirpath.mkdir(parents=True, exist_ok=True)
+        self.keys_path = dirpath / "keys.txt"
+        self.vectors_path = dirpath / "vectors.bin"
+        self.meta_path = dirpath / "meta.json"
+
+        self.dim: int | None = None
+        self.dtype: np.dtype[Any] | None = None
+        self.rows: dict[str, int] = {}
+        self.n_rows = 0
+        self._mmap: NDArray[Any] | None = None
+        self._lock = threading.Lock()
+
+        if self.meta_path.exists():
+            meta = json.loads(self.meta_path.read_text())
+            self.dim = int(meta["dim"])
+            self.dtype = np.dtype(meta["dtype"])
+            self._recover()
+
+    @property
+    def _row_bytes(self) -> int:
+        assert self.dim is not None and self.dtype is not None
+        return self.dim * self.dtype.itemsize
+
+    def _recover(self) -> None:
+        n_vector_rows = (
+            self.vectors_path.stat().st_size // self._row_bytes
+            if self.vectors_path.exists()
+            else 0
+        )
+        keys: list[str] = []
+        keys_bytes = 0
+        if self.keys_path.exists():
+            with self.keys_path.open("rb") as file:
+                for line in file:
+                    # a line without its newline was left by an interrupted write
+                    if not line.endswith(b"\n") or len(keys) == n_vector_rows:
+                        break
+                    keys.append(line[:-1].decode("utf-8"))
+                    keys_bytes += len(line)
+
+        # drop the rows and the lines that have no counterpart in the other file
+        with self.keys_path.open("ab") as file:
+            file.truncate(keys_bytes)
+        with self.vectors_path.open("ab") as file:
+            file.truncate(len(keys) * self._row_bytes)
+        self.rows = {_key: _row for _row, _key in enumerate(keys)}
+        self.n_rows = len(keys)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self.rows)
+
+    def _mapped(self) -> NDArray[Any]:
+        if self._mmap is None or self._mmap.shape[0] < self.n_rows:
+            if self.dim is None or self.dtype is None:
+                raise ValueError("The store is empty.")
+            self._mmap = np.memmap(
+                self.vectors_path,
+                dtype=self.dtype,
+                mode="r",
+                shape=(self.n_rows, self.dim),
+            )
+        return self._mmap
+
+    def get(self, key: str) -> EmbeddingArray | None:
+        with self._lock:
+            row = self.rows.get(key)
+            if row is None:
+                return None
+            return np.array(self._mapped()[row])
+
+    def put(self, key: str, vector: EmbeddingArray) -> None:
+        with self._lock:
+            if key in self.rows:
+                return
+            if self.dim is None or self.dtype is None:
+                self.dim = int(vector.shape[0])
+                self.dtype = vector.dtype
+                self.meta_path.write_text(
+                    json.dumps({"dim": self.dim, "dtype": self.dtype.str})
+                )
+            # the vector goes first, so that a key always has its row
+            with self.vectors_path.open("ab") as file:
+                file.write(np.ascontiguousarray(vector, dtype=self.dtype).tobytes())
+            with self.keys_path.open("a", encoding="utf-8") as file:
+                file.write(key + "\n")
+            self.rows[key] = self.n_rows
+            self.n_rows += 1
+
+
+# One store per directory, shared by the caches of the process that use it
+_STORES: WeakValueDictionary[Path, _MemmapStore] = WeakValueDictionary()
+_STORES_LOCK = threading.Lock()
+
+
+def _open_store(dirpath: Path) -> _MemmapStore:
+    with _STORES_LOCK:
+        dirpath = dirpath.resolve()
+        store = _STORES.get(dirpath)
+        if store is None:
+            store = _STORES[dirpath] = _MemmapStore(dirpath=dirpath)
+        return store
+
+
+class EmbeddingCache:
+    """
+    A content-addressed cache of embedding vectors keyed by
+    (model name, precision, backend, model file, prompt, text).
+
+    Vectors are kept in an in-memory LRU bounded by `max_memory_entries`. When
+    `cache_dirpath` is set, every vector is also written to a memory-mapped store
+    under a sub-directory named after the model, suffixed with the precision, the
+    backend and the model file unless they are the defaults, and with a digest of
+    the prompts if any. Memory misses are served from it.
+
+    Attributes:
+        model_name (str): The name of the embedding model.
+        precision (EmbeddingPrecision): The precision of the stored vectors.
+        backend (EmbeddingBackend): The inference backend of the model.
+        quantization (OnnxQuantization | None): The quantized ONNX model file.
+        model_file_name (str | None): The model file loaded by the backend.
+        prompts (EmbeddingPrompts | None): The prompts the texts are encoded with.
+        config (EmbeddingCacheConfig): The size limit and the on-disk location.
+        hits (int): The number of lookups served from the cache.
+        misses (int): The number of lookups that had to be encoded.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        config: EmbeddingCacheConfig,
+        precision: EmbeddingPrecision = "float32",
+        backend: EmbeddingBackend = "torch",
+        quantization: OnnxQuantization | None = None,
+        model_file_name: str | None = None,
+        prompts: EmbeddingPrompts | None = None,
+    ):
+        self.model_name = model_name
+        self.precision: EmbeddingPrecision = precision
+        self.backend: EmbeddingBackend = backend
+        self.quantization: OnnxQuantization | None = quantization
+        self.model_file_name = model_file_name
+        self.prompts = prompts
+        self.config = config
+        self.hits = 0
+        self.misses = 0
+
+        self._memory: OrderedDict[str, EmbeddingArray] = OrderedDict()
+        self._lock = threading.Lock()
+        # the settings besides the model that change the vectors, left out when
+        # they are the defaults so that existing stores stay valid
+        self._variant: list[str] = [
+            _field
+            for _field in [
+                precision if precision != "float32" else "",
+                backend if backend != "torch" else "",
+                quantization or "",
+                model_file_name or "",
+            ]
+            if _field
+        ]
+        self._store_dirpath: Path | None = None
+        self._store: _MemmapStore | None = None
+        if config.cache_dirpath is not None:
+            dirname = re.sub(r"[^\w.-]", "_", "__".join([model_name, *self._variant]))
+            if prompts is not None:
+                digest = hashlib.blake2b(
+                    prompts.model_dump_json().encode("utf-8"), digest_size=4
+                ).hexdigest()
+                dirname += f"__prompts-{digest}"
+            self._store_dirpath = config.cache_dirpath / dirname
+            self._store = _open_store(dirpath=self._store_dirpath)
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_lock"] = None
+        state["_store"] = None
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        if self._store_dirpath is not None:
+            self._store = _open_store(dirpath=self._store_dirpath)
+
+    def _key(self, text: str, prompt_name: str | None) -> str:
+        fields = [self.model_name, *self._variant, prompt_name or ""]
+        # the prompt text itself, so that different prompts of one name differ
+        prompt: str = (
+            getattr(self.prompts, prompt_name) if self.prompts and prompt_name else ""
+        )
+        if prompt:
+            fields.append(prompt)
+        content = "\0".join([*fields, text])
+        return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+
+    def _remember(self, key: str, vector: EmbeddingArray) -> None:
+        if self.config.max_memory_entries == 0:
+            return
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.config.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, text: str, prompt_name: str | None) -> EmbeddingArray | None:
+        """
+        Looks up the vector of a text.
+
+        Args:
+            text (str): The encoded text.
+            prompt_name (str | None): The prompt the text was encoded with.
+
+        Returns:
+            EmbeddingArray | None: The cached vector, or None on a miss.
+        """
+        key = self._key(text=text, prompt_name=prompt_name)
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+            elif self._store is not None:
+                vector = self._store.get(key)
+                if vector is not None:
+                    self._remember(key, vector)
+
+            if vector is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return vector
+
+    def put(self, text: str, prompt_name: str | None, vector: EmbeddingArray) -> None:
+        """
+        Stores the vector of a text.
+
+        Args:
+            text (str): The encoded text.
+            prompt_name (str | None): The prompt the text was encoded with.
+            vector (EmbeddingArray): The one-dimensional embedding vector.
+        """
+        key = self._key(text=text, prompt_name=prompt_name)
+        with self._lock:
+            self._remember(key, vector)
+            if self._store is not None:
+                self._store.put(key, vector)
+
+    @property
+    def stats(self) -> EmbeddingCacheStats:
+        """The hit/miss counters and the number of cached vectors."""
+        with self._lock:
+            return EmbeddingCacheStats(
+                hits=self.hits,
+                misses=self.misses,
+                memory_entries=len(self._memory),
+                disk_entries=len(self._store) if self._store is not None else 0,
+            )
+
+    def clear_stats(self) -> None:
+        """Resets the hit/miss counters."""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
@@ -1,20 +1,82 @@
+from pathlib import Path
 from typing import Annotated, Any, Literal, Self
 
+import numpy as np
+from numpy.typing import NDArray
 from pydantic import BaseModel, Field, computed_field, confloat, model_validator
 
 
+EmbeddingArray = NDArray[np.float32 | np.float16 | np.int8 | np.uint8]
+PromptName = Literal["passage", "query"]
+EmbeddingPrecision = Literal["float32", "float16", "int8", "binary"]
+EmbeddingBackend = Literal["torch", "onnx", "openvino"]
+OnnxQuantization = Literal["arm64", "avx2", "avx512", "avx512_vnni"]
+NgramStopWordRule = Literal["remove", "boundary"]
+
+DEFAULT_MAXSUM_EXACT_COMBINATIONS = 20_000
+DEFAULT_MAXSUM_BEAM_WIDTH = 32
+
+DEFAULT_GRAMMAR = """
+    NBAR:
+        {<NOUN|PROPN|ADJ>*<NOUN|PROPN>}
+
+    NP:
+        {<NBAR>}
+        {<NBAR><ADP><NBAR>}
+    """
+
+
 class EmbeddingPrompts(BaseModel):
     passage: str
     query: str
 
 
+class EmbeddingCacheConfig(BaseModel):
+    max_memory_entries: int = Field(default=100_000, ge=0)
+    cache_dirpath: Path | None = None
+
+
+class EmbeddingCacheStats(BaseModel):
+    hits: int
+    misses: int
+    memory_entries: int
+    disk_entries: int
+
+
+class BackendVerification(BaseModel):
+    n_texts: int
+    min_cosine: float
+    mean_cosine: float
+    max_abs_diff: float
+
+
 class EmbeddingModel(BaseModel):
     name: str
     prompts: EmbeddingPrompts | None = None
     device: str = Field(default="cpu", examples=["cpu", "mps", "cuda", "npu"])
     trust_remote_code: bool = False
     batchsize: int = 32
+    max_batch_tokens: int | None = Field(default=None, ge=1)
     show_progress_bar: bool = False
+    cache: EmbeddingCacheConfig | None = None
+    precision: EmbeddingPrecision = "float32"
+    backend: EmbeddingBackend = "torch"
+    quantization: OnnxQuantization | None = None
+    model_file_name: str | None = None
+
+    @model_validator(mode="after")
+    def validate_backend(self) -> Self:
+        if self.quantization and self.backend != "onnx":
+            raise ValueError(
+                "`quantization` requires the ONNX backend.\n"
+                f"Received: {self.backend=}, {self.quantization=}."
+            )
+        if self.quantization and self.model_file_name:
+            raise ValueError(
+                "Either `quantization` or `model_file_name` must be None.\n"
+                f"Received: {self.quantization=}, {self.model_file_name=}."
+            )
+        return self
 
 
 class SentenceEmbeddingBasedExtractionConfig(BaseModel):
@@ -26,20 +88,17 @@ class SentenceEmbeddingBasedExtractionConfig(BaseModel):
 
     threshold: Annotated[float, confloat(ge=0.0, le=1.0, strict=False)] | None = None
     nr_candidates: int = 20
+    maxsum_max_exact_combinations: int = Field(
+        default=DEFAULT_MAXSUM_EXACT_COMBINATIONS, ge=1
+    )
+    maxsum_beam_width: int = Field(default=DEFAULT_MAXSUM_BEAM_WIDTH, ge=1)
     diversity: Annotated[float, confloat(ge=0.0, le=1.0)] = 0.7
 
     minimum_characters: int = 10
     filter_sentences: bool = True
 
     grammar_phrasing: bool = True
-    grammar: str = """
-    NBAR:
-        {<NOUN|PROPN|ADJ>*<NOUN|PROPN>}
-
-    NP:
-        {<NBAR>}
-        {<NBAR><ADP><NBAR>}
-    """
+    grammar: str = DEFAULT_GRAMMAR
     pos_filter: set[
         Literal[
             "NOUN",
@@ -62,9 +121,18 @@ class SentenceEmbeddingBasedExtractionConfig(BaseModel):
         ]
     ] = {"NOUN", "PROPN", "ADJ", "NUM"}
     ngram_range: tuple[int, int] | None = None
+    ngram_stop_word_rule: NgramStopWordRule = "remove"
+    ngram_min_df: int = Field(default=1, ge=1)
+    ngram_vocabulary_path: Path | None = None
+
+    spacy_batch_size: int = Field(default=4, ge=1)
+    spacy_n_process: int = Field(default=1, ge=1)
+    spacy_disabled_components: set[str] = {"ner", "parser", "bunsetu_recognizer"}
 
     use_masked_distance: bool = False
+    masked_window_characters: int | None = Field(default=None, ge=0)
     add_source_text: bool = False
+    source_text_encoding: Literal["template", "span_pooling"] = "template"
 
     rrf_k: int = 60
 
@@ -0,0 +1,194 @@
+import heapq
+import itertools
+import math
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .data import (
+    DEFAULT_MAXSUM_BEAM_WIDTH,
+    DEFAULT_MAXSUM_EXACT_COMBINATIONS,
+    EmbeddingArray,
+)
+
+
+def mmr(
+    anchor: EmbeddingArray,
+    candidates: EmbeddingArray,
+    top_n: int,
+    diversity: float,
+) -> list[tuple[int, float]]:
+    """
+    Selects candidates by Maximal Marginal Relevance (MMR).
+
+    This follows `keybert._mmr.mmr`, but keeps the maximum similarity of every
+    candidate to the selected ones and updates it with the similarity row of each
+    newly selected candidate, so only `top_n` rows of the candidate similarity
+    matrix are ever computed.
+
+    Args:
+        anchor (EmbeddingArray): The normalized anchor, of shape (dimension,).
+        candidates (EmbeddingArray): The normalized candidates, of shape
+                                     (number of candidates, dimension).
+        top_n (int): The number of candidates to select.
+        diversity (float): How diverse the selection is, from 0 (not at all) to 1.
+
+    Returns:
+        list[tuple[int, float]]: The indices of the selected candidates and their
+            similarities to the anchor rounded to 4 digits, in descending order of
+            similarity.
+    """
+    n_candidates = candidates.shape[0]
+    if n_candidates == 0 or top_n <= 0:
+        return []
+
+    anchor_similarities = candidates @ anchor
+    max_similarities = np.full(n_candidates, -np.inf, dtype=np.float32)
+    available = np.ones(n_candidates, dtype=bool)
+
+    selected = [int(np.argmax(anchor_similarities))]
+    for _ in range(min(top_n, n_candidates) - 1):
+        available[selected[-1]] = False
+        np.maximum(
+            max_similarities,
+            candidates @ candidates[selected[-1]],
+            out=max_similarities,
+        )
+        scores = (1 - diversity) * anchor_similarities - diversity * max_similarities
+        scores[~available] = -np.inf
+        selected.append(int(np.argmax(scores)))
+
+    return sorted(
+        ((i, round(float(anchor_similarities[i]), 4)) for i in selected),
+        key=lambda x: x[1],
+        reverse=True,
+    )
+
+
+def _exact_max_sum(
+    similarities: NDArray[np.float32], top_n: int
+) -> tuple[int, ...] | None:
+    best: tuple[int, ...] | None = None
+    best_sum = math.inf
+    pairs = list(itertools.combinations(range(top_n), 2))
+    left = np.array([i for i, _ in pairs], dtype=np.intp)
+    right = np.array([j for _, j in pairs], dtype=np.intp)
+    combinations = itertools.combinations(range(similarities.shape[0]), top_n)
+    # evaluate the combinations in blocks to bound memory
+    while True:
+        block = np.array(list(itertools.islice(combinations, 4096)), dtype=np.intp)
+        if block.shape[0] == 0:
+            return best
+        sums = similarities[block[:, left], block[:, right]].sum(axis=1)
+        i = int(np.argmin(sums))
+        if sums[i] < best_sum:
+            best_sum = float(sums[i])
+            best = tuple(int(j) for j in block[i])
+
+
+def _beam_max_sum(
+    similarities: NDArray[np.float32], top_n: int, beam_width: int
+) -> tuple[int, ...]:
+    n_candidates = similarities.shape[0]
+    # (sum of pairwise similarities, members in ascending order)
+    beam: list[tuple[float, tuple[int, ...]]] = [(0.0, ())]
+    for _ in range(top_n):
+        expanded: list[tuple[float, tuple[int, ...]]] = []
+        for total, members in beam:
+            # leave enough candidates after the new member to complete the selection
+            start = members[-1] + 1 if members else 0
+            end = n_candidates - (top_n - len(members) - 1)
+            added = (
+                similarities[start:end, list(members)].sum(axis=1)
+                if members
+                else np.zeros(end - start, dtype=np.float32)
+            )
+            expanded.extend(
+                (total + float(_added), (*members, start + i))
+                for i, _added in enumerate(added)
+            )
+        beam = heapq.nsmallest(beam_width, expanded)
+
+    _, best = min(beam)
+
+    # swap members with outsiders while that lowers the sum, at most top_n rounds
+    members = np.array(best, dtype=np.intp)
+    for _ in range(top_n):
+        outsiders = np.setdiff1d(np.arange(n_candidates), members)
+        if outsiders.shape[0] == 0:
+            break
+        member_sums = (
+            similarities[np.ix_(members, members)].sum(axis=1)
+            - similarities[members, members]
+        )
+        cross = similarities[np.ix_(outsiders, members)]
+        # gain of replacing member i by outsider o
+        gains = member_sums[None, :] - (cross.sum(axis=1)[:, None] - cross)
+        o, i = np.unravel_index(int(np.argmax(gains)), gains.shape)
+        if gains[o, i] <= 1e-7:
+            break
+        members[i] = outsiders[o]
+    return tuple(sorted(int(_member) for _member in members))
+
+
+def max_sum_distance(
+    anchor: EmbeddingArray,
+    candidates: EmbeddingArray,
+    top_n: int,
+    nr_candidates: int,
+    max_exact_combinations: int = DEFAULT_MAXSUM_EXACT_COMBINATIONS,
+    beam_width: int = DEFAULT_MAXSUM_BEAM_WIDTH,
+) -> list[tuple[int, float]]:
+    """
+    Selects candidates by Max Sum Distance.
+
+    This follows `keybert._maxsum.max_sum_distance`: among the `nr_candidates`
+    candidates most similar to the anchor, it looks for the `top_n` ones that are
+    the least similar to each other. Every combination is evaluated only while their
+    number is at most `max_exact_combinations`. Beyond that, a beam search of width
+    `beam_width` followed by at most `top_n` rounds of swaps is used, so the runtime
+    is bounded by O(top_n * beam_width * nr_candidates) whatever the sizes.
+
+    Args:
+        anchor (EmbeddingArray): The normalized anchor, of shape (dimension,).
+        candidates (EmbeddingArray): The normalized candidates, of shape
+                                     (number of candidates, dimension).
+        top_n (int): The number of candidates to select.
+        nr_candidates (int): The number of most similar candidates to choose from.
+        max_exact_combinations (int): The largest number of combinations evaluated
+                                      exhaustively.
+        beam_width (int): The number of partial selections kept by the beam search.
+
+    Returns:
+        list[tuple[int, float]]: The indices of the selected candidates and their
+            similarities to the anchor rounded to 4 digits, in ascending order of
+            similarity. Empty if there are fewer than `top_n` candidates.
+
+    Raises:
+        ValueError: If `nr_candidates` is smaller than `top_n`.
+    """
+    if nr_candidates < top_n:
+        raise ValueError(
+            "Make sure that the number of candidates exceeds the number of keywords "
+            "to return."
+        )
+    if top_n > candidates.shape[0] or top_n <= 0:
+        return []
+
+    anchor_similarities = candidates @ anchor
+    top_idx = np.argsort(anchor_similarities)[-nr_candidates:]
+    top_candidates = candidates[top_idx]
+    similarities = top_candidates @ top_candidates.T
+
+    if math.comb(len(top_idx), top_n) <= max_exact_combinations:
+        selected = _exact_max_sum(similarities=similarities, top_n=top_n)
+    else:
+        selected = _beam_max_sum(
+            similarities=similarities, top_n=top_n, beam_width=beam_width
+        )
+    if selected is None:
+        return []
+    return [
+        (int(top_idx[i]), round(float(anchor_similarities[top_idx[i]]), 4))
+        for i in selected
+    ]
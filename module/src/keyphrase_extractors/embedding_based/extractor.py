@@ -1,14 +1,22 @@
+from collections.abc import Hashable
 from logging import Logger
+from typing import Any
 
-import spacy
-from sentence_transformers import SentenceTransformer
 from sklearn.feature_extraction.text import CountVectorizer
 from spacy.language import Language
 
 from ..base_extractor import BaseExtractor
 from ..io_data import Inputs, Keyphrase, Outputs
+from .cache import EmbeddingCache
 from .data import EmbeddingModel, SentenceEmbeddingBasedExtractionConfig
 from .model import JapanesePhraseRankingModel
+from .registry import (
+    REGISTRY,
+    acquire_embedding_model,
+    acquire_text_processor,
+    embedding_model_key,
+    text_processor_key,
+)
 
 
 class SentenceEmbeddingBasedExtractor(BaseExtractor):
@@ -19,12 +27,18 @@ class SentenceEmbeddingBasedExtractor(BaseExtractor):
     meaningful keyphrases from input text. It supports custom embedding models and
     configurations.
 
+    The embedding model and the spaCy pipeline are shared through `REGISTRY` by
+    every extractor of the process with the same model and pipeline settings, and
+    released by `close` or when the extractor is garbage collected.
+
     Attributes:
         text_processor (Language): A spaCy language processor for Japanese text.
         extraction_config (SentenceEmbeddingBasedExtractionConfig): Configuration for
             keyphrase extraction, including distance measures and sorting.
         kw_model (JapanesePhraseRankingModel): A model for extracting and ranking
             keyphrases based on embeddings.
+        embedding_cache (EmbeddingCache | None): The embedding cache shared across
+            calls, enabled by `model_config.cache`.
     """
 
     def __init__(
@@ -60,25 +74,49 @@ class SentenceEmbeddingBasedExtractor(BaseExtractor):
         super().__init__(
             stop_words, max_characters, flat_output, use_order, rrf_k, logger
         )
+        # Keys of the shared resources held by this extractor
+        self._registry_keys: list[Hashable] = []
+
         # Initialize an embedding model
-        model = SentenceTransformer(
-            model_name_or_path=model_config.name,
-            prompts=model_config.prompts.model_dump() if model_config.prompts else None,
-            **model_config.model_dump(include={"device", "trust_remote_code"}),
-        )
+        model = acquire_embedding_model(model_config=model_config)
+        self._registry_keys.append(embedding_model_key(model_config=model_config))
         if self.logger:
             self.logger.debug(f"Embedding model: {model_config.name}")
             self.logger.debug(
                 f"Embedding prompt: {model_config.prompts.model_dump() if model_config.prompts else None}"
             )
 
+        # Initialize an embedding cache
+        self.embedding_cache = (
+            EmbeddingCache(
+                model_name=model_config.name,
+                config=model_config.cache,
+                precision=model_config.precision,
+                backend=model_config.backend,
+                quantization=model_config.quantization,
+                model_file_name=model_config.model_file_name,
+                prompts=model_config.prompts,
+            )
+            if model_config.cache
+            else None
+        )
+
         # Initialize an extractor
-        self.text_processor: Language = spacy.load("ja_ginza")
         self.extraction_config = (
             extraction_config
             if extraction_config
             else SentenceEmbeddingBasedExtractionConfig()
         )
+        self.text_processor: Language = acquire_text_processor(
+            name="ja_ginza",
+            disabled_components=self.extraction_config.spacy_disabled_components,
+        )
+        self._registry_keys.append(
+            text_processor_key(
+                name="ja_ginza",
+                disabled_components=self.extraction_config.spacy_disabled_components,
+            )
+        )
         self.kw_model = JapanesePhraseRankingModel(
             model=model,
             text_processor=self.text_processor,
@@ -86,10 +124,11 @@ class SentenceEmbeddingBasedExtractor(BaseExtractor):
             use_prompt=True if model_config.prompts else False,
             stop_words=self.stop_words,
             show_progress_bar=model_config.show_progress_bar,
-            config=extraction_config
-            if extraction_config
-            else SentenceEmbeddingBasedExtractionConfig(),
+            config=self.extraction_config,
             count_vectorizer=count_vectorizer,
+            embedding_cache=self.embedding_cache,
+            precision=model_config.precision,
+            max_batch_tokens=model_config.max_batch_tokens,
             logger=self.logger,
         )
         if self.logger:
@@ -97,50 +136,82 @@ class SentenceEmbeddingBasedExtractor(BaseExtractor):
                 f"extraction_config: {self.extraction_config.model_dump_json(indent=4)}"
             )
 
-    def get_keyphrase(
-        self, input_text: str | list[str] | Inputs, top_n_phrases: int = 10
-    ) -> Outputs:
+    def close(self) -> None:
         """
-        Extracts keyphrases from the input text using sentence embeddings for ranking.
+        Releases the shared embedding model and spaCy pipeline, which are unloaded
+        once no extractor holds them. Calling it more than once has no effect.
+        """
+        while self._registry_keys:
+            REGISTRY.release(key=self._registry_keys.pop())
+
+    def __del__(self):
+        # `__init__` may have failed before acquiring anything
+        if getattr(self, "_registry_keys", None):
+            self.close()
+
+    def __getstate__(self) -> dict[str, Any]:
+        # A copy in another process does not hold anything in that process' registry
+        state = self.__dict__.copy()
+        state["_registry_keys"] = []
+        return state
+
+    @property
+    def _descending(self) -> bool:
+        return (
+            not self.extraction_config.use_masked_distance
+        ) or self.extraction_config.use_rrf_sorting
+
+    def _extract_batch(
+        self, docs: list[list[str]], top_n_phrases: int
+    ) -> list[list[list[Keyphrase]]]:
+        """
+        Extracts keyphrases from the chunks of several documents with a single call to
+        the ranking model, so that all chunks share the same encode batches.
 
         Args:
-            input_text (str | list[str] | Inputs): The input text(s) or preprocessed data.
-            top_n_phrases (int): The maximum number of keyphrases to return.
+            docs (list[list[str]]): The preprocessed chunks of each document.
+            top_n_phrases (int): The maximum number of keyphrases per chunk.
 
         Returns:
-            Outputs: Extracted keyphrases with their corresponding scores.
+            list[list[list[Keyphrase]]]: The keyphrases of each chunk of each document.
         """
-        verify_input: Inputs = self._verify_input(input_text=input_text)
-        docs: list[str] = verify_input.docs
+        chunks, chunk_indices = self._unique_chunks(docs=docs)
 
         if self.logger:
             self.logger.info("Run keyphrase extraction.")
-            self.logger.debug(f"Inputs: {docs}")
+            self.logger.debug(f"Inputs: {chunks}")
         results_list: list[list[tuple[str, float]]] = self.kw_model.extract_keyphrases(
-            docs=docs
+            docs=chunks
         )
         if self.logger:
             self.logger.info("Completed keyphrase extraction.")
             self.logger.debug(f"Result: {results_list}")
+            if self.embedding_cache:
+                self.logger.debug(f"Embedding cache: {self.embedding_cache.stats}")
 
         if self.logger:
             self.logger.info("Validate output")
-        outputs: Outputs = Outputs(keyphrases=[])
-        for results in results_list:
-            _keyphrases = [Keyphrase(phrase=t[0], score=t[1]) for t in results]
-            top_n_keyphrases = _keyphrases[:top_n_phrases]
-            outputs.keyphrases.append(top_n_keyphrases)
-
-        if self.flat_output and len(outputs.keyphrases) > 1:
-            if self.logger:
-                self.logger.info("Flatten outputs")
-            outputs = self._flatten_outputs(
-                keyphrases_list=outputs.keyphrases,
-                use_order=self.use_order,
-                descending=(
-                    (not self.extraction_config.use_masked_distance)
-                    or self.extraction_config.use_rrf_sorting
-                ),
-                rrf_k=self.rrf_k,
-            )
-        return outputs
+        keyphrases_list: list[list[Keyphrase]] = [
+            [Keyphrase(phrase=t[0], score=t[1]) for t in results[:top_n_phrases]]
+            for results in results_list
+        ]
+        return [[keyphrases_list[i] for i in indices] for indices in chunk_indices]
+
+    def get_keyphrase(
+        self, input_text: str | list[str] | Inputs, top_n_phrases: int = 10
+    ) -> Outputs:
+        """
+        Extracts keyphrases from the input text using sentence embeddings for ranking.
+
+        Args:
+            input_text (str | list[str] | Inputs): The input text(s) or preprocessed data.
+            top_n_phrases (int): The maximum number of keyphrases to return.
+
+        Returns:
+            Outputs: Extracted keyphrases with their corresponding scores.
+        """
+        verify_input: Inputs = self._verify_input(input_text=input_text)
+        keyphrases_list = self._extract_batch(
+            docs=[verify_input.docs], top_n_phrases=top_n_phrases
+        )[0]
+        return self._make_outputs(keyphrases_list=keyphrases_list)
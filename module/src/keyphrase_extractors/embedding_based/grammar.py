@@ -0,0 +1,155 @@
+import numpy as np
+from nltk import RegexpParser
+from numpy.typing import NDArray
+
+from .data import DEFAULT_GRAMMAR
+
+
+PosIdArray = NDArray[np.int64]
+UNIVERSAL_POS_TAGS = (
+    "ADJ",
+    "ADP",
+    "ADV",
+    "AUX",
+    "CCONJ",
+    "CONJ",
+    "DET",
+    "INTJ",
+    "NOUN",
+    "NUM",
+    "PART",
+    "PRON",
+    "PROPN",
+    "PUNCT",
+    "SCONJ",
+    "SPACE",
+    "SYM",
+    "VERB",
+    "X",
+)
+POS_IDS: dict[str, int] = {
+    pos: pos_id for pos_id, pos in enumerate(UNIVERSAL_POS_TAGS, start=1)
+}
+
+
+def to_pos_ids(words_pos: list[str]) -> PosIdArray:
+    """
+    Converts universal POS tags into integer POS ids.
+
+    Args:
+        words_pos (list[str]): The POS tag of each token.
+
+    Returns:
+        PosIdArray: The POS id of each token. Unknown tags are mapped to 0.
+    """
+    return np.array([POS_IDS.get(pos, 0) for pos in words_pos], dtype=np.int64)
+
+
+def _normalize_grammar(grammar: str) -> str:
+    return "".join(grammar.split())
+
+
+class PhraseMatcher:
+    """
+    Finds the noun phrases of a sentence as token spans.
+    """
+
+    def find_spans(
+        self, words_pos: list[str], pos_ids: PosIdArray
+    ) -> list[tuple[int, int]]:
+        """
+        Finds the noun phrases of a sentence.
+
+        Args:
+            words_pos (list[str]): The POS tag of each token.
+            pos_ids (PosIdArray): The integer POS id of each token.
+
+        Returns:
+            list[tuple[int, int]]: The start and end token index of each phrase.
+
+        Raises:
+            NotImplementedError: This method is not implemented yet.
+        """
+        raise NotImplementedError("This method is not implemented.")
+
+
+class RegexpPhraseMatcher(PhraseMatcher):
+    """
+    Finds the `NP` chunks of an arbitrary NLTK chunk grammar.
+
+    The grammar is compiled once when the matcher is built.
+
+    Attributes:
+        grammar (str): The chunk grammar.
+        label (str): The label of the chunks to return.
+    """
+
+    def __init__(self, grammar: str, label: str = "NP"):
+        self.grammar = grammar
+        self.label = label
+        self._parser = RegexpParser(grammar)
+
+    def find_spans(
+        self, words_pos: list[str], pos_ids: PosIdArray
+    ) -> list[tuple[int, int]]:
+        if not words_pos:
+            return []
+        tree = self._parser.parse([(str(i), pos) for i, pos in enumerate(words_pos)])
+        spans: list[tuple[int, int]] = []
+        for subtree in tree.subtrees():
+            if subtree.label() == self.label:
+                leaves = subtree.leaves()
+                spans.append((int(leaves[0][0]), int(leaves[-1][0]) + 1))
+        return spans
+
+
+class NounPhraseMatcher(PhraseMatcher):
+    """
+    A native matcher equivalent to `DEFAULT_GRAMMAR`.
+
+    `NBAR: {<NOUN|PROPN|ADJ>*<NOUN|PROPN>}` matches, in each maximal run of
+    nouns, proper nouns and adjectives, the tokens from the start of the run up to
+    its last noun or proper noun. Since the first `NP` rule turns every `NBAR` into
+    an `NP`, the second one never applies and each `NBAR` is an `NP`.
+    """
+
+    def __init__(self):
+        self._head_ids = frozenset([POS_IDS["NOUN"], POS_IDS["PROPN"]])
+        self._member_ids = self._head_ids | {POS_IDS["ADJ"]}
+
+    def find_spans(
+        self, words_pos: list[str], pos_ids: PosIdArray
+    ) -> list[tuple[int, int]]:
+        # A single pass over plain ints is faster than vectorized numpy operations
+        # on sentence-sized arrays.
+        spans: list[tuple[int, int]] = []
+        run_start = last_head = -1
+        for i, pos_id in enumerate(pos_ids.tolist()):
+            if pos_id in self._member_ids:
+                if run_start < 0:
+                    run_start = i
+                if pos_id in self._head_ids:
+                    last_head = i
+            else:
+                if last_head >= run_start >= 0:
+                    spans.append((run_start, last_head + 1))
+                run_start = last_head = -1
+        if last_head >= run_start >= 0:
+            spans.append((run_start, last_head + 1))
+        return spans
+
+
+def build_phrase_matcher(grammar: str) -> PhraseMatcher:
+    """
+    Builds the matcher of a chunk grammar.
+
+    Args:
+        grammar (str): The chunk grammar.
+
+    Returns:
+        PhraseMatcher: The native matcher for `DEFAULT_GRAMMAR`, or a precompiled
+            NLTK chunker for any other grammar.
+    """
+    if _normalize_grammar(grammar) == _normalize_grammar(DEFAULT_GRAMMAR):
+        return NounPhraseMatcher()
+    return RegexpPhraseMatcher(grammar=grammar)
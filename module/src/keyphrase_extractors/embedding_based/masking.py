@@ -0,0 +1,72 @@
+import re
+from functools import lru_cache
+
+
+@lru_cache(maxsize=4096)
+def target_pattern(target: str) -> re.Pattern[str]:
+    """
+    Returns the pattern that finds a target in its source text.
+
+    Sentences merged from several pieces are joined by newlines, while the pieces
+    are separated by other whitespace or nothing at all in the source text, so
+    whitespace in the target matches any whitespace, including none. The match also
+    covers the whitespace around the occurrence.
+
+    Args:
+        target (str): The sentence or phrase to find.
+
+    Returns:
+        re.Pattern[str]: The case-insensitive pattern of the target.
+    """
+    pieces = [re.escape(_piece) for _piece in target.split()]
+    return re.compile(r"\s*" + r"\s*".join(pieces) + r"\s*", re.IGNORECASE)
+
+
+def mask_target(
+    source_text: str, target: str, window_characters: int | None = None
+) -> str:
+    """
+    Replaces every occurrence of a target in a source text with `[MASK]` tokens.
+
+    Whitespace in the target matches any whitespace in the source text, including
+    none, so that a sentence merged from several pieces is found where it was
+    taken from.
+
+    With `window_characters`, only `window_characters` characters on each side of
+    every occurrence are kept. Overlapping windows are merged and the remaining
+    ones joined by newlines, so the length of the masked text grows with the
+    number of occurrences instead of the length of the source text. Candidates
+    whose occurrences share the same surroundings then also yield identical masked
+    texts, which `EncodePlanner` encodes once.
+
+    Args:
+        source_text (str): The text the target is taken from.
+        target (str): The sentence or phrase to mask.
+        window_characters (int | None): The number of characters kept on each side
+                                        of every occurrence, or None to keep the
+                                        whole source text.
+
+    Returns:
+        str: The masked text, or the (windowed) source text unchanged if the target
+            does not occur in it.
+    """
+    mask = " ".join(["[MASK]"] * (len(target) // 2 + 1))
+    pattern = target_pattern(target)
+    if window_characters is None:
+        return pattern.sub(mask, source_text)
+
+    matches = list(pattern.finditer(source_text))
+    if not matches:
+        return source_text[: 2 * window_characters]
+
+    windows: list[list[int]] = []
+    for match in matches:
+        start = max(0, match.start() - window_characters)
+        end = min(len(source_text), match.end() + window_characters)
+        if windows and start <= windows[-1][1]:
+            windows[-1][1] = end
+        else:
+            windows.append([start, end])
+    return "\n".join(
+        pattern.sub(mask, source_text[start:end]) for start, end in windows
+    )
@@ -1,26 +1,66 @@
-import itertools
 import re
 from logging import Logger
 
 import numpy as np
-from keybert._maxsum import max_sum_distance
-from keybert._mmr import mmr
-from nltk import RegexpParser
 from numpy.typing import NDArray
 from sentence_transformers import SentenceTransformer
+from sklearn.base import clone  # type: ignore
 from sklearn.feature_extraction.text import CountVectorizer
-from sklearn.metrics.pairwise import cosine_distances, cosine_similarity
 from spacy.language import Language
-from spacy.tokens.doc import Doc
 
 from ..utils import to_original_expression
-from .data import SentenceEmbeddingBasedExtractionConfig
+from .analysis import AnalyzedSentence, DocumentAnalysis
+from .cache import EmbeddingCache
+from .data import (
+    EmbeddingArray,
+    EmbeddingPrecision,
+    SentenceEmbeddingBasedExtractionConfig,
+)
+from .diversity import max_sum_distance, mmr
+from .encoder import EncodePlanner
+from .grammar import PosIdArray, build_phrase_matcher, to_pos_ids
+from .masking import mask_target
+from .ngrams import NgramVocabulary, enumerate_ngrams
+from .quantization import calibrate_similarities
+from .registry import shared_lock
+from .scoring import OffsetArray, segmented_similarities, segmented_top_k
+from .span_pooling import SpanPoolingEncoder
+
+
+class ExtractionContext:
+    """
+    The state of one `extract_keyphrases` call, kept out of the model so that
+    concurrent calls on the same model do not share it.
+
+    Attributes:
+        planner (EncodePlanner): The encode batches of the call.
+        count_vectorizer (CountVectorizer | None): The given CountVectorizer, fitted
+            to the sentences of the call.
+        ngram_vocab (NDArray[np.str_] | None): The feature names of
+            `count_vectorizer`.
+    """
 
-
-EmbeddingArray = NDArray[np.float32 | np.int8 | np.uint8]
+    def __init__(
+        self,
+        planner: EncodePlanner,
+        count_vectorizer: CountVectorizer | None = None,
+        ngram_vocab: NDArray[np.str_] | None = None,
+    ):
+        self.planner = planner
+        self.count_vectorizer = count_vectorizer
+        self.ngram_vocab = ngram_vocab
 
 
 class JapanesePhraseRankingModel:
+    """
+    Ranks the sentences and phrases of documents with sentence embeddings.
+
+    The model only holds its configuration and shared resources, while the state
+    of each call lives in an `ExtractionContext`, so `extract_keyphrases` can be
+    called from several threads at once. The spaCy pipeline and the embedding
+    model are each used by one thread at a time.
+    """
+
     def __init__(
         self,
         model: SentenceTransformer,
@@ -31,6 +71,9 @@ class JapanesePhraseRankingModel:
         show_progress_bar: bool,
         config: SentenceEmbeddingBasedExtractionConfig,
         count_vectorizer: CountVectorizer | None,
+        embedding_cache: EmbeddingCache | None = None,
+        precision: EmbeddingPrecision = "float32",
+        max_batch_tokens: int | None = None,
         logger: Logger | None = None,
     ):
         self.logger = logger
@@ -38,8 +81,21 @@ class JapanesePhraseRankingModel:
         # Embedding model
         self.model = model
         self.batchsize = batchsize
+        self.max_batch_tokens = max_batch_tokens
         self.use_prompt = use_prompt
         self.show_progress_bar = show_progress_bar
+        self.embedding_cache = embedding_cache
+        self.precision: EmbeddingPrecision = precision
+        self.span_encoder = (
+            SpanPoolingEncoder(
+                model=model,
+                batchsize=batchsize,
+                show_progress_bar=show_progress_bar,
+                precision=precision,
+            )
+            if config.add_source_text and config.source_text_encoding == "span_pooling"
+            else None
+        )
 
         # Initialize a tokenizer
         self.text_processor = text_processor
@@ -47,46 +103,41 @@ class JapanesePhraseRankingModel:
 
         # Others
         self.config = config
-        if (
-            (not self.config.grammar_phrasing)
-            and (count_vectorizer is None)
-            and (self.config.ngram_range is not None)
-        ):
-            self.count_vectorizer = CountVectorizer(
-                tokenizer=str.split,
-                token_pattern=None,
-                lowercase=False,
-                stop_words=list(self.stop_words),
-                ngram_range=self.config.ngram_range,
-                max_df=1.0,
-                min_df=1,
+        self.phrase_matcher = build_phrase_matcher(grammar=self.config.grammar)
+        # A given CountVectorizer is refit on the sentences of every call, while by
+        # default the n-grams are enumerated directly from the words of a sentence
+        self.count_vectorizer = count_vectorizer
+        self.ngram_vocabulary = (
+            NgramVocabulary(
+                min_df=self.config.ngram_min_df,
+                path=self.config.ngram_vocabulary_path,
             )
-        else:
-            self.count_vectorizer = count_vectorizer
+            if (not self.config.grammar_phrasing)
+            and (count_vectorizer is None)
+            and (self.config.ngram_min_df > 1 or self.config.ngram_vocabulary_path)
+            else None
+        )
 
-    def _words_to_phrases(self, words: list[str], words_pos: list[str]) -> set[str]:
+    def _words_to_phrases(
+        self,
+        words: list[str],
+        words_pos: list[str],
+        pos_ids: PosIdArray | None = None,
+    ) -> dict[str, tuple[int, int]]:
         if self.logger:
             self.logger.debug("Phasing based on grammer")
             self.logger.debug(f"Grammer: {self.config.grammar}")
-        grammar_parser = RegexpParser(self.config.grammar)
-        tuples = [(str(i), words_pos[i]) for i in range(len(words))]
-        tree = grammar_parser.parse(tuples)
+        if pos_ids is None:
+            pos_ids = to_pos_ids(words_pos=words_pos)
+        spans = self.phrase_matcher.find_spans(words_pos=words_pos, pos_ids=pos_ids)
 
-        candidates: set[str] = set()
+        # 各候補の最初の出現位置（トークン単位）を保持
+        candidates: dict[str, tuple[int, int]] = {}
         np_indices: set[int] = set()
-        for subtree in tree.subtrees():
-            if subtree.label() == "NP":
-                leaves = subtree.leaves()
-
-                first = int(leaves[0][0])
-                last = int(leaves[-1][0])
-                phrase = " ".join(words[first : last + 1]).strip()
-                candidates.add(phrase)
-
-                for leaf in leaves:
-                    idx_str, _ = leaf
-                    idx = int(idx_str)
-                    np_indices.add(idx)
+        for first, end in spans:
+            phrase = " ".join(words[first:end]).strip()
+            candidates.setdefault(phrase, (first, end))
+            np_indices.update(range(first, end))
 
         for i, (word, pos) in enumerate(zip(words, words_pos, strict=True)):
             word = word.strip()
@@ -96,143 +147,216 @@ class JapanesePhraseRankingModel:
                 and (word not in self.stop_words)
                 and word
             ):
-                candidates.add(word)
+                candidates.setdefault(word, (i, i + 1))
 
         return candidates
 
-    def _words_to_ngrams(self, words: list[str]) -> set[str]:
+    def _enumerate_ngrams(self, words: list[str]) -> list[str]:
+        return enumerate_ngrams(
+            words=words,
+            ngram_range=self.config.ngram_range or (1, 1),
+            stop_words=self.stop_words,
+            stop_word_rule=self.config.ngram_stop_word_rule,
+        )
+
+    def _words_to_ngrams(
+        self, words: list[str], context: ExtractionContext
+    ) -> list[str]:
         if self.logger:
             self.logger.debug("Phasing based on N-gram")
             self.logger.debug(f"N-gram range: {self.config.ngram_range}")
 
-        if self.count_vectorizer:
-            vector = self.count_vectorizer.transform([" ".join(words)])
-        else:
-            raise ValueError("CountVectorizer is not initialized.")
-        vector_array = vector.toarray()[0]
-        non_zero_indices = vector_array.nonzero()[0]
-        candidates: set[str] = set(self.ngram_vocab[non_zero_indices])
-        return candidates
+        if context.count_vectorizer and context.ngram_vocab is not None:
+            # Only the non-zero columns of the sparse row are read
+            vector = context.count_vectorizer.transform([" ".join(words)])
+            return context.ngram_vocab[vector.indices].tolist()  # type: ignore
 
-    def _tokenize_text(self, text: str, grammar_phrasing: bool = True) -> list[str]:
+        ngrams = self._enumerate_ngrams(words=words)
+        if self.ngram_vocabulary:
+            ngrams = self.ngram_vocabulary.filter(ngrams=ngrams)
+        return ngrams
+
+    def _analyze_documents(self, docs: list[str]) -> list[DocumentAnalysis]:
         if self.logger:
-            self.logger.debug(f"Tokenize: {text}")
-        doc: Doc = self.text_processor(text)
+            self.logger.debug(f"Parse {len(docs)} documents")
+        # The SudachiPy tokenizer of a pipeline cannot run in two threads at once
+        with shared_lock(resource=self.text_processor):
+            return [
+                DocumentAnalysis(
+                    text=_doc,
+                    doc=_parsed,
+                    minimum_characters=self.config.minimum_characters,
+                )
+                for _doc, _parsed in zip(
+                    docs,
+                    self.text_processor.pipe(
+                        docs,
+                        batch_size=self.config.spacy_batch_size,
+                        n_process=self.config.spacy_n_process,
+                    ),
+                    strict=True,
+                )
+            ]
 
-        words = [token.text for token in doc]
-        words_pos = [token.pos_ for token in doc]
+    def _tokenize_sentence(
+        self,
+        analysis: DocumentAnalysis,
+        sentence: AnalyzedSentence,
+        context: ExtractionContext,
+    ) -> list[str]:
+        if self.logger:
+            self.logger.debug(f"Tokenize: {sentence.text}")
+
+        words, words_pos = analysis.sentence_words(sentence)
+        if self.config.grammar_phrasing:
+            phrase_spans = self._words_to_phrases(
+                words=words,
+                words_pos=words_pos,
+                pos_ids=analysis.sentence_pos_ids(sentence),
+            )
+            # 元の表記はトークンの文字位置から直接切り出す
+            return [
+                analysis.span_text(
+                    token_start=sentence.token_start + _start,
+                    token_end=sentence.token_start + _end,
+                )
+                for _start, _end in phrase_spans.values()
+            ]
 
-        if grammar_phrasing:
-            tokens = self._words_to_phrases(words=words, words_pos=words_pos)
-        else:
-            tokens = self._words_to_ngrams(words=words)
-        tokens = [
-            to_original_expression(original_text=text, phrase=_token)
-            for _token in tokens
+        return [
+            to_original_expression(original_text=sentence.text, phrase=_token)
+            for _token in self._words_to_ngrams(words=words, context=context)
         ]
-        return tokens
 
-    def _extract_key_contents(
+    def _extract_key_contents_batch(
         self,
-        anchor_embed: EmbeddingArray,
+        anchor_embeds: EmbeddingArray,
         candidate_embeds: EmbeddingArray,
-        candidate_strs: list[str],
+        offsets: OffsetArray,
+        candidate_strs_list: list[list[str]],
         top_n: int,
-        nr_candidates: int,
-        threshold: float | None,
-        use_mmr: bool,
-        use_maxsum: bool,
-        diversity: float,
-        use_masked_distance: bool,
-    ) -> list[tuple[str, float]]:
-        if self.logger:
-            self.logger.debug("Extract key contents")
-
-        selected: list[tuple[str, float]]
-        if use_masked_distance:
-            if self.logger:
-                self.logger.debug("Mode: using masked distance")
-            distances = cosine_distances(anchor_embed, candidate_embeds)
-            top_n = min(top_n, candidate_embeds.shape[0])
-            selected_idx = np.argpartition(distances[0], -top_n)[-top_n:]
-            selected_idx = selected_idx[np.argsort(distances[0][selected_idx])]
-            selected = [
-                (candidate_strs[i], float(distances[0][i]))
-                for i in reversed(selected_idx)
-            ]
-        elif use_mmr:
-            if self.logger:
-                self.logger.debug("Mode: MMR")
-            selected = mmr(
-                anchor_embed, candidate_embeds, candidate_strs, top_n, diversity
-            )
-        elif use_maxsum:
-            if self.logger:
-                self.logger.debug("Mode: Max-Sum")
-            selected = max_sum_distance(
-                anchor_embed,
-                candidate_embeds,
-                candidate_strs,
-                top_n,
-                nr_candidates,
+    ) -> list[list[tuple[str, float]]]:
+        """
+        Selects the key contents of many candidate sets at once.
+
+        The candidates of all sets are given as one ragged array, in which the i-th
+        set spans `candidate_embeds[offsets[i]:offsets[i + 1]]` and is scored against
+        `anchor_embeds[i]`. Both arrays must be L2-normalized. In the normal and the
+        masked distance modes the scores of every set are computed with a single
+        product and the top-k of each set is selected at once, while MMR and
+        Max-Sum run set by set on the same normalized arrays. With binary embeddings
+        the similarities are calibrated to the float32 cosine scale before
+        thresholding.
+
+        Args:
+            anchor_embeds (EmbeddingArray): The normalized anchor of each set.
+            candidate_embeds (EmbeddingArray): The normalized candidates of all sets.
+            offsets (OffsetArray): The offsets of the sets in `candidate_embeds`.
+            candidate_strs_list (list[list[str]]): The candidate strings of each set.
+            top_n (int): The number of contents to select per set.
+
+        Returns:
+            list[list[tuple[str, float]]]: The selected contents and their scores for
+                each set.
+        """
+        if self.config.use_masked_distance or not (
+            self.config.use_mmr or self.config.use_maxsum
+        ):
+            similarities = calibrate_similarities(
+                similarities=segmented_similarities(
+                    anchors=anchor_embeds, candidates=candidate_embeds, offsets=offsets
+                ),
+                precision=self.precision,
             )
-        else:
-            if self.logger:
-                self.logger.debug("Mode: normal")
-            similarities = cosine_similarity(anchor_embed, candidate_embeds)
-            top_n = min(top_n, candidate_embeds.shape[0])
-            selected_idx = np.argpartition(similarities[0], -top_n)[-top_n:]
-            selected_idx = selected_idx[np.argsort(similarities[0][selected_idx])]
-            selected = [
-                (candidate_strs[i], float(similarities[0][i]))
-                for i in reversed(selected_idx)
+            if self.config.use_masked_distance:
+                if self.logger:
+                    self.logger.debug("Mode: using masked distance")
+                scores = np.clip(1.0 - similarities, 0.0, 2.0)
+            else:
+                if self.logger:
+                    self.logger.debug("Mode: normal")
+                scores = similarities
+            selected_list = [
+                [
+                    (_candidate_strs[i], float(scores[_offset + i]))
+                    for i in _selected_idx
+                ]
+                for _candidate_strs, _offset, _selected_idx in zip(
+                    candidate_strs_list,
+                    offsets[:-1],
+                    segmented_top_k(scores=scores, offsets=offsets, top_n=top_n),
+                    strict=True,
+                )
             ]
-
-        if threshold is not None:
-            if self.logger:
-                self.logger.debug(f"Threshold: {threshold}")
-            selected = [item for item in selected if item[1] >= threshold]
-
-        return selected
+            if self.config.threshold is not None:
+                threshold = self.config.threshold
+                selected_list = [
+                    [item for item in _selected if item[1] >= threshold]
+                    for _selected in selected_list
+                ]
+            return selected_list
+
+        selected_list: list[list[tuple[str, float]]] = []
+        for i, _candidate_strs in enumerate(candidate_strs_list):
+            _anchor = anchor_embeds[i]
+            _candidates = candidate_embeds[offsets[i] : offsets[i + 1]]
+            if self.config.use_mmr:
+                if self.logger:
+                    self.logger.debug("Mode: MMR")
+                _selected_idx = mmr(
+                    anchor=_anchor,
+                    candidates=_candidates,
+                    top_n=top_n,
+                    diversity=self.config.diversity,
+                )
+            else:
+                if self.logger:
+                    self.logger.debug("Mode: Max-Sum")
+                _selected_idx = max_sum_distance(
+                    anchor=_anchor,
+                    candidates=_candidates,
+                    top_n=top_n,
+                    nr_candidates=self.config.nr_candidates,
+                    max_exact_combinations=self.config.maxsum_max_exact_combinations,
+                    beam_width=self.config.maxsum_beam_width,
+                )
+            if _selected_idx and self.precision == "binary":
+                calibrated = calibrate_similarities(
+                    similarities=np.array(
+                        [score for _, score in _selected_idx], dtype=np.float32
+                    ),
+                    precision=self.precision,
+                )
+                _selected_idx = [
+                    (j, round(float(score), 4))
+                    for (j, _), score in zip(_selected_idx, calibrated, strict=True)
+                ]
+            _selected = [(_candidate_strs[j], score) for j, score in _selected_idx]
+            if self.config.threshold is not None:
+                _selected = [
+                    item for item in _selected if item[1] >= self.config.threshold
+                ]
+            selected_list.append(_selected)
+        return selected_list
 
     def _mask_text(self, source_text: str, target: str) -> str:
-        mask = " ".join(["[MASK]"] * (len(target) // 2 + 1))
-        pattern = re.compile(
-            r"\s*" + re.escape(source_text) + r"\s*",
-            re.IGNORECASE,
+        return mask_target(
+            source_text=source_text,
+            target=target,
+            window_characters=self.config.masked_window_characters,
         )
-        masked_text = pattern.sub(mask, source_text)
-        return masked_text
 
     def _add_source_text(self, source_text: str, target: str) -> str:
         _target = re.sub(r"\s+", " ", target).strip()
         return f"次の本文における「{_target}」の意味\n本文：\n{source_text.strip()}"
 
     def _extract_sentences(
-        self, docs: list[str], sentences: list[list[str]]
+        self, docs: list[str], sentences: list[list[str]], planner: EncodePlanner
     ) -> list[list[tuple[str, float]]]:
         if self.logger:
             self.logger.info("Extract the key sentences")
 
-        # ドキュメントのベクトル化
-        doc_embeddings: EmbeddingArray
-        if self.use_prompt:
-            doc_embeddings = self.model.encode(  # type: ignore
-                sentences=docs,
-                prompt_name="passage",
-                batch_size=self.batchsize,
-                show_progress_bar=self.show_progress_bar,
-                convert_to_numpy=True,
-            )
-        else:
-            doc_embeddings = self.model.encode(  # type: ignore
-                sentences=docs,
-                batch_size=self.batchsize,
-                show_progress_bar=self.show_progress_bar,
-                convert_to_numpy=True,
-            )
-
-        # 各文のベクトル化
+        # 各文のベクトル化対象
         if self.config.use_masked_distance:
             embedding_target_sentences = [
                 [
@@ -241,7 +365,7 @@ class JapanesePhraseRankingModel:
                 ]
                 for _doc, _sentences in zip(docs, sentences, strict=True)
             ]
-        elif self.config.add_source_text:
+        elif self.config.add_source_text and self.span_encoder is None:
             embedding_target_sentences = [
                 [
                     self._add_source_text(source_text=_doc, target=_sent)
@@ -252,86 +376,50 @@ class JapanesePhraseRankingModel:
         else:
             embedding_target_sentences = sentences
 
-        sentence_embeddings: list[EmbeddingArray]
-        if self.use_prompt:
-            sentence_embeddings = [
-                self.model.encode(  # type: ignore
-                    sentences=_sentences,
-                    prompt_name="query",
-                    batch_size=self.batchsize,
-                    show_progress_bar=self.show_progress_bar,
-                    convert_to_numpy=True,
-                )
-                for _sentences in embedding_target_sentences
-            ]
+        # ドキュメントと文をまとめてベクトル化
+        doc_segment = planner.add(texts=docs, prompt_name="passage")
+        sentence_segments = (
+            planner.add_nested(
+                texts_list=embedding_target_sentences, prompt_name="query"
+            )
+            if self.span_encoder is None
+            else []
+        )
+        planner.encode()
+        doc_embeddings, _ = planner.get_ragged(
+            segment_ids=[doc_segment], normalize=True
+        )
+        if self.span_encoder is None:
+            sentence_embeddings, offsets = planner.get_ragged(
+                segment_ids=sentence_segments, normalize=True
+            )
         else:
-            sentence_embeddings = [
-                self.model.encode(  # type: ignore
-                    sentences=_sentences,
-                    batch_size=self.batchsize,
-                    show_progress_bar=self.show_progress_bar,
-                    convert_to_numpy=True,
-                )
-                for _sentences in embedding_target_sentences
-            ]
-
-        key_sentences: list[list[tuple[str, float]]] = []
-
-        for chunk_idx, (_sent_embeds, _sentences) in enumerate(
-            zip(sentence_embeddings, sentences, strict=True)
-        ):
-            _doc_embed: EmbeddingArray = doc_embeddings[chunk_idx].reshape(1, -1)
-            try:
-                _key_sentences = self._extract_key_contents(
-                    anchor_embed=_doc_embed,
-                    candidate_embeds=_sent_embeds,
-                    candidate_strs=_sentences,
-                    top_n=self.config.max_filtered_sentences,
-                    nr_candidates=self.config.nr_candidates,
-                    threshold=self.config.threshold,
-                    use_mmr=self.config.use_mmr,
-                    use_maxsum=self.config.use_maxsum,
-                    diversity=self.config.diversity,
-                    use_masked_distance=self.config.use_masked_distance,
-                )
-            except ValueError:
-                _key_sentences = []
-
-            key_sentences.append(_key_sentences)
+            # 文書を 1 度だけベクトル化し、各文のトークン埋め込みを平均する
+            sentence_embeddings, offsets = self.span_encoder.encode(
+                sources=docs,
+                targets_list=sentences,
+                prompt_name="query" if self.use_prompt else None,
+                template=self._add_source_text,
+            )
 
-        return key_sentences
+        return self._extract_key_contents_batch(
+            anchor_embeds=doc_embeddings,
+            candidate_embeds=sentence_embeddings,
+            offsets=offsets,
+            candidate_strs_list=sentences,
+            top_n=self.config.max_filtered_sentences,
+        )
 
     def _extract_phrases(
-        self, sentences: list[list[str]], phrases: list[list[list[str]]]
+        self,
+        sentences: list[list[str]],
+        phrases: list[list[list[str]]],
+        planner: EncodePlanner,
     ) -> list[list[list[tuple[str, float]]]]:
         if self.logger:
             self.logger.info("Extract the keyphrases")
 
-        # 文のベクトル化
-        sentence_embeddings: list[EmbeddingArray]
-        if self.use_prompt:
-            sentence_embeddings = [
-                self.model.encode(  # type: ignore
-                    sentences=_sentences,
-                    prompt_name="passage",
-                    batch_size=self.batchsize,
-                    show_progress_bar=self.show_progress_bar,
-                    convert_to_numpy=True,
-                )
-                for _sentences in sentences
-            ]
-        else:
-            sentence_embeddings = [
-                self.model.encode(  # type: ignore
-                    sentences=_sentences,
-                    batch_size=self.batchsize,
-                    show_progress_bar=self.show_progress_bar,
-                    convert_to_numpy=True,
-                )
-                for _sentences in sentences
-            ]
-
-        # フレーズのベクトル化
+        # フレーズのベクトル化対象
         if self.config.use_masked_distance:
             embedding_target_phrases = [
                 [
@@ -343,7 +431,7 @@ class JapanesePhraseRankingModel:
                 ]
                 for _sentences, _phrases in zip(sentences, phrases, strict=True)
             ]
-        elif self.config.add_source_text:
+        elif self.config.add_source_text and self.span_encoder is None:
             embedding_target_phrases = [
                 [
                     [
@@ -357,67 +445,55 @@ class JapanesePhraseRankingModel:
         else:
             embedding_target_phrases = phrases
 
-        phrase_embeddings: list[list[EmbeddingArray]]
-        if self.use_prompt:
-            phrase_embeddings = [
-                [
-                    self.model.encode(  # type: ignore
-                        sentences=_phrases_one_sentence,
-                        prompt_name="query",
-                        batch_size=self.batchsize,
-                        show_progress_bar=self.show_progress_bar,
-                        convert_to_numpy=True,
-                    )
-                    for _phrases_one_sentence in _phrases
-                ]
+        # 文とフレーズをまとめてベクトル化
+        sentence_segments = planner.add_nested(
+            texts_list=sentences, prompt_name="passage"
+        )
+        phrase_segments = (
+            [
+                planner.add_nested(texts_list=_phrases, prompt_name="query")
                 for _phrases in embedding_target_phrases
             ]
+            if self.span_encoder is None
+            else []
+        )
+        planner.encode()
+        # 全チャンクの文と候補フレーズを1つの配列にまとめてスコアリング
+        sentence_embeddings, _ = planner.get_ragged(
+            segment_ids=sentence_segments, normalize=True
+        )
+        if self.span_encoder is None:
+            phrase_embeddings, offsets = planner.get_ragged(
+                segment_ids=[
+                    _segment for _segments in phrase_segments for _segment in _segments
+                ],
+                normalize=True,
+            )
         else:
-            phrase_embeddings = [
-                [
-                    self.model.encode(  # type: ignore
-                        sentences=_phrases_one_sentence,
-                        batch_size=self.batchsize,
-                        show_progress_bar=self.show_progress_bar,
-                    )
-                    for _phrases_one_sentence in _phrases
-                ]
-                for _phrases in embedding_target_phrases
-            ]
+            # 文を 1 度だけベクトル化し、各フレーズのトークン埋め込みを平均する
+            phrase_embeddings, offsets = self.span_encoder.encode(
+                sources=[_sent for _sentences in sentences for _sent in _sentences],
+                targets_list=[
+                    _phrase_set for _phrases in phrases for _phrase_set in _phrases
+                ],
+                prompt_name="query" if self.use_prompt else None,
+                template=self._add_source_text,
+            )
+        key_phrases_flat = self._extract_key_contents_batch(
+            anchor_embeds=sentence_embeddings,
+            candidate_embeds=phrase_embeddings,
+            offsets=offsets,
+            candidate_strs_list=[
+                _phrase_set for _phrases in phrases for _phrase_set in _phrases
+            ],
+            top_n=self.config.max_filtered_phrases,
+        )
 
         key_phrase: list[list[list[tuple[str, float]]]] = []
-
-        for _sentence_embeds, _phrase_embeds_list, _phrases_list in zip(
-            sentence_embeddings, phrase_embeddings, phrases, strict=True
-        ):
-            _key_phrase_chunk: list[list[tuple[str, float]]] = []
-
-            for sent_idx, (_phrase_embeds, _phrases) in enumerate(
-                zip(_phrase_embeds_list, _phrases_list, strict=True)
-            ):
-                _sentence_embed: EmbeddingArray = _sentence_embeds[sent_idx].reshape(
-                    1, -1
-                )
-                try:
-                    _key_phrases = self._extract_key_contents(
-                        anchor_embed=_sentence_embed,
-                        candidate_embeds=_phrase_embeds,
-                        candidate_strs=_phrases,
-                        top_n=self.config.max_filtered_phrases,
-                        nr_candidates=self.config.nr_candidates,
-                        threshold=self.config.threshold,
-                        use_mmr=self.config.use_mmr,
-                        use_maxsum=self.config.use_maxsum,
-                        diversity=self.config.diversity,
-                        use_masked_distance=self.config.use_masked_distance,
-                    )
-                except ValueError:
-                    _key_phrases = []
-
-                _key_phrase_chunk.append(_key_phrases)
-
-            key_phrase.append(_key_phrase_chunk)
-
+        start = 0
+        for _phrases in phrases:
+            key_phrase.append(key_phrases_flat[start : start + len(_phrases)])
+            start += len(_phrases)
         return key_phrase
 
     def _reciprocal_rank_fusion(
@@ -476,55 +552,61 @@ class JapanesePhraseRankingModel:
         )
         return sorted(hybrid_scored_phrases, key=lambda x: x[1], reverse=True)
 
-    def _concat_sentences(self, sentences: list[str]) -> list[str]:
-        concated_sentences: list[str] = []
-        buffer = ""
-        for text in sentences:
-            buffer += "\n" + text.strip()
-            if len(buffer) >= self.config.minimum_characters:
-                concated_sentences.append(buffer)
-                buffer = ""
-        if buffer:
-            concated_sentences.append(buffer)
-        return concated_sentences
-
-    def _split_text_into_sentences(self, text: str) -> list[str]:
-        sentences = [
-            _sentence.strip()
-            for _sentence in re.split(r"(?<=\n)|(?<=[。！？．])|(?<=[\.\!\?]\s)", text)
-        ]
-        sentences = [_sentence for _sentence in sentences if _sentence]
-        return self._concat_sentences(sentences=sentences)
-
-    def _fit_count_vectorizer(self, sentences: list[list[str]]) -> None:
+    def _fit_count_vectorizer(
+        self, words_list: list[list[str]], context: ExtractionContext
+    ) -> None:
         if self.logger:
             self.logger.debug("Fit CountVectorizer.")
-        sentences_add_space: list[str] = [
-            " ".join([token.text for token in self.text_processor(_sent)])
-            for _sent in itertools.chain.from_iterable(sentences)
-        ]
+        sentences_add_space: list[str] = [" ".join(_words) for _words in words_list]
         if self.count_vectorizer:
-            self.count_vectorizer.fit(sentences_add_space)
-            self.ngram_vocab: NDArray[np.str_] = (
-                self.count_vectorizer.get_feature_names_out()
-            )
+            # A copy is fitted, so that the given CountVectorizer is never modified
+            count_vectorizer: CountVectorizer = clone(self.count_vectorizer)  # type: ignore
+            count_vectorizer.fit(sentences_add_space)
+            context.count_vectorizer = count_vectorizer
+            context.ngram_vocab = count_vectorizer.get_feature_names_out()
         else:
             raise ValueError("CountVectorizer is not initialized.")
 
     def extract_keyphrases(self, docs: list[str]) -> list[list[tuple[str, float]]]:
-        sentences: list[list[str]] = []
+        planner = EncodePlanner(
+            model=self.model,
+            batchsize=self.batchsize,
+            use_prompt=self.use_prompt,
+            show_progress_bar=self.show_progress_bar,
+            cache=self.embedding_cache,
+            precision=self.precision,
+            max_batch_tokens=self.max_batch_tokens,
+        )
+        context = ExtractionContext(planner=planner)
+
         if self.logger:
             self.logger.debug("Split documents into sentences")
-        for _doc in docs:
-            sentences.append(self._split_text_into_sentences(text=_doc))
+        analyses: list[DocumentAnalysis] = self._analyze_documents(docs=docs)
+        sentences: list[list[str]] = [
+            _analysis.sentence_texts() for _analysis in analyses
+        ]
 
-        if not self.config.grammar_phrasing:
-            self._fit_count_vectorizer(sentences=sentences)
+        if (not self.config.grammar_phrasing) and (
+            self.count_vectorizer or self.ngram_vocabulary
+        ):
+            words_list = [
+                _analysis.sentence_words(_sentence)[0]
+                for _analysis in analyses
+                for _sentence in _analysis.sentences
+            ]
+            if self.count_vectorizer:
+                self._fit_count_vectorizer(words_list=words_list, context=context)
+            elif self.ngram_vocabulary:
+                self.ngram_vocabulary.update(
+                    documents=(
+                        self._enumerate_ngrams(words=_words) for _words in words_list
+                    )
+                )
 
         if self.config.filter_sentences:
             # Extract the key sentences
             key_sentences: list[list[tuple[str, float]]] = self._extract_sentences(
-                docs=docs, sentences=sentences
+                docs=docs, sentences=sentences, planner=planner
             )
 
             # Identify candidate key phrases
@@ -532,14 +614,13 @@ class JapanesePhraseRankingModel:
                 self.logger.info("Identify candidate key phrases")
             sentences: list[list[str]] = []
             phrases: list[list[list[str]]] = []
-            for _sentences in key_sentences:
+            for _analysis, _sentences in zip(analyses, key_sentences, strict=True):
                 phrases.append(
                     [
-                        list(
-                            self._tokenize_text(
-                                text=_sent[0],
-                                grammar_phrasing=self.config.grammar_phrasing,
-                            )
+                        self._tokenize_sentence(
+                            analysis=_analysis,
+                            sentence=_analysis.get_sentence(_sent[0]),
+                            context=context,
                         )
                         for _sent in _sentences
                     ]
@@ -549,7 +630,7 @@ class JapanesePhraseRankingModel:
             if self.logger:
                 self.logger.info("Extract the keyphrases")
             key_phrases: list[list[list[tuple[str, float]]]] = self._extract_phrases(
-                sentences=sentences, phrases=phrases
+                sentences=sentences, phrases=phrases, planner=planner
             )
 
             # Merge sentence importance and phrase importance
@@ -577,20 +658,19 @@ class JapanesePhraseRankingModel:
             if self.logger:
                 self.logger.info("Identify candidate key phrases")
             phrases: list[list[list[str]]] = []
-            for _sentences in sentences:
+            for _analysis in analyses:
                 _phrases: set[str] = set()
-                for _sent in _sentences:
+                for _sentence in _analysis.sentences:
                     _phrases.update(
-                        self._tokenize_text(
-                            text=_sent,
-                            grammar_phrasing=self.config.grammar_phrasing,
+                        self._tokenize_sentence(
+                            analysis=_analysis, sentence=_sentence, context=context
                         )
                     )
                 phrases.append([list(_phrases)])
 
             # Extract the key phrases
             key_phrases: list[list[list[tuple[str, float]]]] = self._extract_phrases(
-                sentences=docs_nested, phrases=phrases
+                sentences=docs_nested, phrases=phrases, planner=planner
             )
 
             sorted_keyphrases: list[list[tuple[str, float]]] = [
@@ -0,0 +1,174 @@
+import threading
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+from .data import NgramStopWordRule
+
+
+def enumerate_ngrams(
+    words: list[str],
+    ngram_range: tuple[int, int],
+    stop_words: set[str],
+    stop_word_rule: NgramStopWordRule = "remove",
+) -> list[str]:
+    """
+    Enumerates the distinct n-grams of a sentence directly from its words, in the
+    order of their first occurrence.
+
+    Words are split on whitespace like `CountVectorizer(tokenizer=str.split)`.
+    With the "remove" rule, stop words are dropped before the n-grams are built,
+    as `CountVectorizer` does, so an n-gram may span a removed stop word. With the
+    "boundary" rule, stop words split the sentence and no n-gram crosses one.
+
+    Args:
+        words (list[str]): The words of the sentence.
+        ngram_range (tuple[int, int]): The minimum and maximum number of words.
+        stop_words (set[str]): The stop words.
+        stop_word_rule (NgramStopWordRule): How stop words affect the n-grams.
+
+    Returns:
+        list[str]: The space-joined n-grams.
+    """
+    tokens = " ".join(words).split()
+    runs: list[list[str]]
+    if stop_word_rule == "remove":
+        runs = [[_token for _token in tokens if _token not in stop_words]]
+    else:
+        runs = [[]]
+        for token in tokens:
+            if token in stop_words:
+                runs.append([])
+            else:
+                runs[-1].append(token)
+
+    min_n, max_n = ngram_range
+    ngrams: dict[str, None] = {}
+    for run in runs:
+        for n in range(min_n, min(max_n, len(run)) + 1):
+            for i in range(len(run) - n + 1):
+                ngrams.setdefault(" ".join(run[i : i + n]))
+    return list(ngrams)
+
+
+class NgramVocabulary:
+    """
+    A corpus-level vocabulary of n-grams with their document frequencies, where
+    each sentence counts as one document as in `CountVectorizer.fit`.
+
+    Frequencies accumulate over every call to `update`, so that `min_df` is applied
+    against the whole corpus seen so far instead of a single request. When `path`
+    is set, the frequency increments of each update are appended to it as
+    tab-separated lines, and summed back when the vocabulary is reopened; the file
+    is compacted on load once most of its lines are duplicates.
+
+    Attributes:
+        min_df (int): The minimum document frequency of a candidate n-gram.
+        path (Path | None): The file the vocabulary is persisted to.
+        n_documents (int): The number of documents counted.
+    """
+
+    def __init__(self, min_df: int = 1, path: Path | None = None):
+        self.min_df = min_df
+        self.path = path
+        self.n_documents = 0
+        self._frequencies: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        if path is not None and path.exists():
+            n_lines = 0
+            truncated = False
+            with path.open(encoding="utf-8") as file:
+                for line in file:
+                    ngram, _, count = line.rstrip("\n").rpartition("\t")
+                    # skip a line left partially written by an interrupted update
+                    if not line.endswith("\n") or not count.isdigit():
+                        truncated = True
+                        continue
+                    n_lines += 1
+                    if ngram:
+                        self._frequencies[ngram] = self._frequencies.get(
+                            ngram, 0
+                        ) + int(count)
+                    else:
+                        # the first line of an update holds its number of documents
+                        self.n_documents += int(count)
+            # rewrite the file without the skipped line before appending to it
+            if truncated or n_lines > 2 * (len(self._frequencies) + 1):
+                self._compact()
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_lock"] = None
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._frequencies)
+
+    def document_frequency(self, ngram: str) -> int:
+        """
+        Returns the number of documents an n-gram occurs in.
+        """
+        with self._lock:
+            return self._frequencies.get(ngram, 0)
+
+    def update(self, documents: Iterable[Iterable[str]]) -> None:
+        """
+        Counts the distinct n-grams of each document.
+
+        Args:
+            documents (Iterable[Iterable[str]]): The n-grams of each document.
+        """
+        increments: dict[str, int] = {}
+        n_documents = 0
+        for ngrams in documents:
+            n_documents += 1
+            for ngram in set(ngrams):
+                increments[ngram] = increments.get(ngram, 0) + 1
+
+        with self._lock:
+            self.n_documents += n_documents
+            for ngram, count in increments.items():
+                self._frequencies[ngram] = self._frequencies.get(ngram, 0) + count
+            if self.path is not None and n_documents:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with self.path.open("a", encoding="utf-8") as file:
+                    file.write(f"\t{n_documents}\n")
+                    file.writelines(
+                        f"{ngram}\t{count}\n" for ngram, count in increments.items()
+                    )
+
+    def filter(self, ngrams: list[str]) -> list[str]:
+        """
+        Keeps the n-grams whose document frequency reaches `min_df`.
+
+        Args:
+            ngrams (list[str]): The n-grams of a sentence.
+
+        Returns:
+            list[str]: The frequent enough n-grams, in the same order.
+        """
+        if self.min_df <= 1:
+            return ngrams
+        with self._lock:
+            return [
+                _ngram
+                for _ngram in ngrams
+                if self._frequencies.get(_ngram, 0) >= self.min_df
+            ]
+
+    def _compact(self) -> None:
+        if self.path is None:
+            return
+        temporary_path = self.path.with_name(self.path.name + ".tmp")
+        with temporary_path.open("w", encoding="utf-8") as file:
+            file.write(f"\t{self.n_documents}\n")
+            file.writelines(
+                f"{ngram}\t{count}\n" for ngram, count in self._frequencies.items()
+            )
+        temporary_path.replace(self.path)
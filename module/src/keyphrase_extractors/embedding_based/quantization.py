@@ -0,0 +1,89 @@
+import numpy as np
+from numpy.typing import NDArray
+
+from .data import EmbeddingArray, EmbeddingPrecision
+from .scoring import l2_normalize
+
+
+def quantize(
+    embeddings: EmbeddingArray, precision: EmbeddingPrecision
+) -> EmbeddingArray:
+    """
+    Converts float32 embeddings to their storage precision.
+
+    - "float16": half-precision floats.
+    - "int8": each vector is scaled by its own maximum absolute value to
+      [-127, 127] and rounded. Cosine similarity does not depend on the scale of a
+      vector, so the scale is not stored.
+    - "binary": the sign of each dimension, packed eight dimensions per byte.
+
+    Args:
+        embeddings (EmbeddingArray): The float32 embeddings, of shape
+                                     (number of texts, dimension).
+        precision (EmbeddingPrecision): The storage precision.
+
+    Returns:
+        EmbeddingArray: The stored embeddings.
+    """
+    if precision == "float32":
+        return np.asarray(embeddings, dtype=np.float32)
+    if precision == "float16":
+        return np.asarray(embeddings, dtype=np.float16)
+    if precision == "int8":
+        scales = np.abs(embeddings).max(axis=1, keepdims=True) / 127.0
+        scales[scales == 0.0] = 1.0
+        return np.rint(embeddings / scales).astype(np.int8)
+    if precision == "binary":
+        return np.packbits(embeddings > 0, axis=1)
+    raise ValueError(f"Unknown precision: {precision}")
+
+
+def dequantize(
+    embeddings: EmbeddingArray, precision: EmbeddingPrecision, dim: int | None = None
+) -> NDArray[np.float32]:
+    """
+    Converts stored embeddings to L2-normalized float32 vectors for scoring.
+
+    Binary embeddings become vectors of +-1 / sqrt(number of bits), so that the
+    product of two of them is 1 - 2 * (Hamming distance) / (number of bits). The
+    padding bits of the last byte are dropped with `dim`, so that they do not count
+    as dimensions.
+
+    Args:
+        embeddings (EmbeddingArray): The stored embeddings.
+        precision (EmbeddingPrecision): The storage precision.
+        dim (int | None): The dimension of the float32 embeddings, needed for binary
+            embeddings whose dimension is not a multiple of 8.
+
+    Returns:
+        NDArray[np.float32]: The normalized vectors.
+    """
+    if precision == "binary":
+        bits = np.unpackbits(embeddings.astype(np.uint8, copy=False), axis=1, count=dim)
+        return (bits.astype(np.float32) * 2.0 - 1.0) / np.sqrt(
+            np.float32(bits.shape[1])
+        )
+    return l2_normalize(embeddings=embeddings)
+
+
+def calibrate_similarities(
+    similarities: NDArray[np.float32], precision: EmbeddingPrecision
+) -> NDArray[np.float32]:
+    """
+    Maps similarities computed on dequantized vectors to the cosine similarity
+    scale of float32 embeddings, so that thresholds keep their meaning.
+
+    Only binary embeddings need it: the fraction of differing sign bits of two
+    vectors estimates the angle between them divided by pi, so a product `s` of
+    binary vectors corresponds to a cosine similarity of cos(pi * (1 - s) / 2).
+
+    Args:
+        similarities (NDArray[np.float32]): The similarities of dequantized vectors.
+        precision (EmbeddingPrecision): The storage precision.
+
+    Returns:
+        NDArray[np.float32]: The calibrated similarities.
+    """
+    if precision != "binary":
+        return similarities
+    return np.cos(np.pi * (1.0 - similarities) / 2.0).astype(np.float32)
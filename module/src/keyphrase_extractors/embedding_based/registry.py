@@ -0,0 +1,218 @@
+import threading
+from collections.abc import Callable, Hashable
+from typing import Any, TypeVar
+from weakref import WeakKeyDictionary
+
+import spacy
+from sentence_transformers import SentenceTransformer
+from spacy.language import Language
+
+from .backend import load_embedding_model
+from .data import EmbeddingModel
+
+
+T = TypeVar("T")
+
+
+class _Entry:
+    def __init__(self):
+        self.resource: Any = None
+        self.loaded = False
+        self.refcount = 0
+        # held while the resource is loaded, so that only one caller loads it
+        self.lock = threading.Lock()
+
+
+class ResourceRegistry:
+    """
+    A registry of shared, reference-counted resources.
+
+    `acquire` loads a resource the first time its key is requested and hands out
+    the same instance afterwards; `release` drops the registry's reference once
+    every holder has released it. Resources with different keys are loaded
+    concurrently, while concurrent requests for the same key wait for a single
+    load.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: dict[Hashable, _Entry] = {}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def refcount(self, key: Hashable) -> int:
+        """
+        Returns the number of holders of a resource, 0 if it is not loaded.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.refcount if entry else 0
+
+    def acquire(self, key: Hashable, load: Callable[[], T]) -> T:
+        """
+        Returns the resource of a key, loading it if no one holds it.
+
+        Args:
+            key (Hashable): The key identifying the resource.
+            load (Callable[[], T]): Loads the resource.
+
+        Returns:
+            T: The shared resource.
+        """
+        with self._lock:
+            entry = self._entries.setdefault(key, _Entry())
+            entry.refcount += 1
+
+        with entry.lock:
+            if not entry.loaded:
+                try:
+                    entry.resource = load()
+                except BaseException:
+                    self.release(key=key)
+                    raise
+                entry.loaded = True
+            return entry.resource
+
+    def release(self, key: Hashable) -> None:
+        """
+        Releases one hold on the resource of a key.
+
+        Args:
+            key (Hashable): The key identifying the resource.
+
+        Raises:
+            KeyError: If the resource is not held.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                raise KeyError(f"The resource is not held.\nReceived: {key=}.")
+            entry.refcount -= 1
+            if entry.refcount == 0:
+                del self._entries[key]
+
+
+# The registry shared by every extractor of the process
+REGISTRY = ResourceRegistry()
+
+# One lock per shared object whose use is not reentrant
+_LOCKS: WeakKeyDictionary[Any, threading.Lock] = WeakKeyDictionary()
+_LOCKS_LOCK = threading.Lock()
+
+
+def shared_lock(resource: Any) -> threading.Lock:
+    """
+    Returns the lock of a shared object, the same one for every caller, to
+    serialize the uses of an object that is not thread-safe, such as a spaCy
+    pipeline whose SudachiPy tokenizer cannot be called from two threads at once.
+
+    Args:
+        resource (Any): The shared object.
+
+    Returns:
+        threading.Lock: The lock of the object.
+    """
+    with _LOCKS_LOCK:
+        lock = _LOCKS.get(resource)
+        if lock is None:
+            lock = _LOCKS[resource] = threading.Lock()
+        return lock
+
+
+def encode_lock(model: SentenceTransformer) -> threading.Lock:
+    """
+    Returns the lock to hold while tokenizing or encoding with a model.
+
+    Every tokenizer call changes the state of the tokenizer: `encode` and the
+    offset and length lookups of `SpanPoolingEncoder` and `EncodePlanner` set
+    different truncation and padding on the same (Rust) tokenizer, and slow
+    tokenizers, such as `BertJapaneseTokenizer` with a MeCab tagger, are not
+    thread-safe at all. So a model is used by one thread at a time, fast tokenizers
+    included.
+
+    Args:
+        model (SentenceTransformer): The embedding model.
+
+    Returns:
+        threading.Lock: The lock of the model.
+    """
+    return shared_lock(resource=model)
+
+
+def embedding_model_key(model_config: EmbeddingModel) -> tuple[Hashable, ...]:
+    """
+    Returns the registry key of an embedding model: the fields of `model_config`
+    that determine the loaded weights, so that configurations differing only in
+    batch size, cache or precision share the same model.
+
+    Args:
+        model_config (EmbeddingModel): The embedding model configuration.
+
+    Returns:
+        tuple[Hashable, ...]: The key.
+    """
+    return (
+        "embedding_model",
+        model_config.name,
+        model_config.device,
+        model_config.prompts.model_dump_json() if model_config.prompts else None,
+        model_config.trust_remote_code,
+        model_config.backend,
+        model_config.quantization,
+        model_config.model_file_name,
+    )
+
+
+def text_processor_key(
+    name: str, disabled_components: set[str]
+) -> tuple[Hashable, ...]:
+    """
+    Returns the registry key of a spaCy pipeline.
+
+    Args:
+        name (str): The spaCy package name.
+        disabled_components (set[str]): The disabled pipeline components.
+
+    Returns:
+        tuple[Hashable, ...]: The key.
+    """
+    return ("text_processor", name, tuple(sorted(disabled_components)))
+
+
+def acquire_embedding_model(model_config: EmbeddingModel) -> SentenceTransformer:
+    """
+    Returns the shared embedding model of `model_config`, loading it with
+    `load_embedding_model` if no one holds it. Release it with `REGISTRY.release`
+    and `embedding_model_key`.
+
+    Args:
+        model_config (EmbeddingModel): The embedding model configuration.
+
+    Returns:
+        SentenceTransformer: The shared embedding model.
+    """
+    return REGISTRY.acquire(
+        key=embedding_model_key(model_config=model_config),
+        load=lambda: load_embedding_model(model_config=model_config),
+    )
+
+
+def acquire_text_processor(name: str, disabled_components: set[str]) -> Language:
+    """
+    Returns the shared spaCy pipeline of a package with the given components
+    disabled, loading it if no one holds it. Release it with `REGISTRY.release`
+    and `text_processor_key`.
+
+    Args:
+        name (str): The spaCy package name.
+        disabled_components (set[str]): The disabled pipeline components.
+
+    Returns:
+        Language: The shared spaCy pipeline.
+    """
+    return REGISTRY.acquire(
+        key=text_processor_key(name=name, disabled_components=disabled_components),
+        load=lambda: spacy.load(name, disable=sorted(disabled_components)),
+    )
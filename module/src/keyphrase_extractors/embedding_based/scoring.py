@@ -0,0 +1,94 @@
+import numpy as np
+from numpy.typing import NDArray
+
+from .data import EmbeddingArray
+
+
+ScoreArray = NDArray[np.float32]
+OffsetArray = NDArray[np.intp]
+
+
+def l2_normalize(embeddings: EmbeddingArray) -> NDArray[np.float32]:
+    """
+    L2-normalizes each row of an embedding matrix. Zero rows stay zero.
+
+    Args:
+        embeddings (EmbeddingArray): An array of shape (number of texts, dimension).
+
+    Returns:
+        NDArray[np.float32]: The normalized rows.
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0.0] = 1.0
+    return embeddings / norms
+
+
+def segment_ids(offsets: OffsetArray) -> NDArray[np.intp]:
+    """
+    Returns the segment of each row of a ragged array.
+
+    Args:
+        offsets (OffsetArray): The start of each segment followed by the total
+                               number of rows.
+
+    Returns:
+        NDArray[np.intp]: The index of the segment each row belongs to.
+    """
+    return np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+
+
+def segmented_similarities(
+    anchors: EmbeddingArray,
+    candidates: EmbeddingArray,
+    offsets: OffsetArray,
+) -> ScoreArray:
+    """
+    Computes the cosine similarity between every candidate and the anchor of its
+    segment in one pass.
+
+    Args:
+        anchors (EmbeddingArray): The normalized anchor of each segment, of shape
+                                  (number of segments, dimension).
+        candidates (EmbeddingArray): The normalized candidates of all segments, of
+                                     shape (number of candidates, dimension).
+        offsets (OffsetArray): The offsets of the segments in `candidates`.
+
+    Returns:
+        ScoreArray: The similarity of each candidate.
+    """
+    if candidates.shape[0] == 0:
+        return np.zeros(0, dtype=np.float32)
+    products = np.multiply(
+        candidates, anchors[segment_ids(offsets=offsets)], dtype=np.float32
+    )
+    return products.sum(axis=1, dtype=np.float32)
+
+
+def segmented_top_k(
+    scores: ScoreArray, offsets: OffsetArray, top_n: int
+) -> list[NDArray[np.intp]]:
+    """
+    Selects the highest scores of each segment of a ragged score array.
+
+    Args:
+        scores (ScoreArray): The scores of all segments.
+        offsets (OffsetArray): The offsets of the segments in `scores`.
+        top_n (int): The number of scores to select per segment.
+
+    Returns:
+        list[NDArray[np.intp]]: For each segment, the indices of its selected scores
+            within the segment, in descending order of score.
+    """
+    n_segments = len(offsets) - 1
+    if scores.shape[0] == 0 or top_n <= 0:
+        return [np.zeros(0, dtype=np.intp) for _ in range(n_segments)]
+
+    counts = np.diff(offsets)
+    ids = segment_ids(offsets=offsets)
+    # sort by segment, then by descending score
+    order = np.lexsort((-scores, ids))
+    ranks = np.arange(scores.shape[0]) - np.repeat(offsets[:-1], counts)
+    selected = order[ranks < top_n]
+    local = selected - np.repeat(offsets[:-1], np.minimum(counts, top_n))
+    return np.split(local, np.cumsum(np.minimum(counts, top_n))[:-1])
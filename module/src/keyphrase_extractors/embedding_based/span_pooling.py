@@ -0,0 +1,292 @@
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+from numpy.typing import NDArray
+from sentence_transformers import SentenceTransformer
+
+from .data import EmbeddingPrecision, PromptName
+from .masking import target_pattern
+from .quantization import dequantize, quantize
+from .registry import encode_lock
+from .scoring import OffsetArray, l2_normalize
+
+
+# the largest gap, in characters, between two consecutive tokens aligned by
+# `token_offsets` for tokenizers without an offset mapping
+MAX_ALIGNMENT_GAP = 16
+
+
+def token_offsets(tokenizer: Any, text: str) -> list[tuple[int, int]]:
+    """
+    Returns the character span of each token of a text, special tokens excluded.
+
+    Fast tokenizers report the spans themselves. Slow ones, such as
+    `BertJapaneseTokenizer`, do not, so their tokens are aligned to the text from
+    left to right; a token that cannot be found near the previous one (e.g. an
+    unknown token) gets an empty span and is never pooled.
+
+    Args:
+        tokenizer (Any): A Hugging Face tokenizer.
+        text (str): The text to tokenize.
+
+    Returns:
+        list[tuple[int, int]]: The start and end character of each token.
+    """
+    if getattr(tokenizer, "is_fast", False):
+        encoded = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+        return [(int(start), int(end)) for start, end in encoded["offset_mapping"]]
+
+    offsets: list[tuple[int, int]] = []
+    lowered = text.lower()
+    position = 0
+    for token in tokenizer.tokenize(text):
+        piece = token.removeprefix("##").lstrip("▁").lower()
+        start = (
+            lowered.find(piece, position)
+            if piece and token != tokenizer.unk_token
+            else -1
+        )
+        if start < 0 or start - position > MAX_ALIGNMENT_GAP:
+            offsets.append((position, position))
+            continue
+        offsets.append((start, start + len(piece)))
+        position = start + len(piece)
+    return offsets
+
+
+class SpanPoolingEncoder:
+    """
+    Derives the vectors of targets in the context of their source text from a single
+    forward pass over the source, instead of encoding one
+    "次の本文における「X」の意味" template per target.
+
+    Each source is encoded once, with `output_value="token_embeddings"`, and the
+    vector of a target is the mean of the token embeddings covering its occurrences
+    in the source. A source longer than the model's `max_seq_length` is encoded as
+    overlapping windows of tokens, and each occurrence is pooled from the window in
+    which it is the most centered. As in `mask_target`, whitespace in a target
+    matches any whitespace in the source, so sentences merged from several pieces
+    are found. A target that does not occur in its source is encoded with the
+    template instead.
+
+    Attributes:
+        model (SentenceTransformer): The embedding model.
+        batchsize (int): Batch size passed to `encode`.
+        show_progress_bar (bool): Whether to show the progress bar while encoding.
+        precision (EmbeddingPrecision): The precision the vectors are rounded to, to
+                                        be scored like the vectors of `EncodePlanner`.
+    """
+
+    def __init__(
+        self,
+        model: SentenceTransformer,
+        batchsize: int,
+        show_progress_bar: bool,
+        precision: EmbeddingPrecision = "float32",
+    ):
+        self.model = model
+        self.batchsize = batchsize
+        self.show_progress_bar = show_progress_bar
+        self.precision: EmbeddingPrecision = precision
+        self._lock = encode_lock(model=model)
+
+        # the number of special tokens before the first token of a text, and in all
+        with self._lock:
+            special_tokens_mask: list[int] = self.model.tokenizer(
+                "a", return_special_tokens_mask=True
+            )["special_tokens_mask"]
+        self._n_prefix_tokens = next(
+            (i for i, special in enumerate(special_tokens_mask) if not special),
+            len(special_tokens_mask),
+        )
+        self._n_special_tokens = sum(special_tokens_mask)
+
+    def _windows(self, source: str, prompt: str) -> list[tuple[int, int]]:
+        offsets = token_offsets(tokenizer=self.model.tokenizer, text=source)
+        n_prompt_tokens = len(
+            token_offsets(tokenizer=self.model.tokenizer, text=prompt)
+        )
+        # leave a few tokens of margin for tokenization differences at the borders
+        size = max(
+            2,
+            (self.model.max_seq_length or 512)
+            - self._n_special_tokens
+            - n_prompt_tokens
+            - 4,
+        )
+        if len(offsets) <= size:
+            return [(0, len(source))]
+
+        stride = size // 2
+        windows: list[tuple[int, int]] = []
+        for start in range(0, len(offsets) - stride, stride):
+            end = min(start + size, len(offsets))
+            windows.append((offsets[start][0], offsets[end - 1][1]))
+        return windows
+
+    def _token_embeddings(
+        self, texts: list[str], prompt_name: PromptName | None
+    ) -> list[NDArray[np.float32]]:
+        # a list of tensors of shape (number of tokens, dimension)
+        outputs: list[Any] = self.model.encode(  # type: ignore
+            sentences=texts,
+            prompt_name=prompt_name,
+            batch_size=self.batchsize,
+            show_progress_bar=self.show_progress_bar,
+            output_value="token_embeddings",
+        )
+        return [
+            np.asarray(_output.float().cpu().numpy(), dtype=np.float32)  # type: ignore
+            for _output in outputs  # type: ignore
+        ]
+
+    def encode(
+        self,
+        sources: list[str],
+        targets_list: list[list[str]],
+        prompt_name: PromptName | None,
+        template: Callable[[str, str], str],
+    ) -> tuple[NDArray[np.float32], OffsetArray]:
+        """
+        Encodes the targets of every source.
+
+        Args:
+            sources (list[str]): The source texts.
+            targets_list (list[list[str]]): The targets of each source.
+            prompt_name (PromptName | None): The prompt to encode with.
+            template (Callable[[str, str], str]): Builds the text encoded for a
+                target that does not occur in its source, from the source and the
+                target.
+
+        Returns:
+            tuple[NDArray[np.float32], OffsetArray]: The normalized vectors of all
+                targets and the offsets of the targets of each source.
+        """
+        with self._lock:
+            return self._encode(
+                sources=sources,
+                targets_list=targets_list,
+                prompt_name=prompt_name,
+                template=template,
+            )
+
+    def _encode(
+        self,
+        sources: list[str],
+        targets_list: list[list[str]],
+        prompt_name: PromptName | None,
+        template: Callable[[str, str], str],
+    ) -> tuple[NDArray[np.float32], OffsetArray]:
+        prompt = (self.model.prompts.get(prompt_name) if prompt_name else None) or ""
+
+        # windows of every source, each distinct window text encoded once
+        window_texts: list[str] = []
+        window_ids: dict[str, int] = {}
+        source_windows: list[list[tuple[int, int, int]]] = []
+        for source, targets in zip(sources, targets_list, strict=True):
+            if not targets:
+                source_windows.append([])
+                continue
+            windows: list[tuple[int, int, int]] = []
+            for start, end in self._windows(source=source, prompt=prompt):
+                text = source[start:end]
+                window_id = window_ids.setdefault(text, len(window_texts))
+                if window_id == len(window_texts):
+                    window_texts.append(text)
+                windows.append((start, end, window_id))
+            source_windows.append(windows)
+
+        token_embeddings = (
+            self._token_embeddings(texts=window_texts, prompt_name=prompt_name)
+            if window_texts
+            else []
+        )
+        window_offsets = [
+            token_offsets(tokenizer=self.model.tokenizer, text=prompt + text)
+            for text in window_texts
+        ]
+
+        vectors: list[NDArray[np.float32] | None] = []
+        fallback_texts: list[str] = []
+        fallback_rows: list[int] = []
+        offsets = np.zeros(len(sources) + 1, dtype=np.intp)
+        for i, (source, targets, windows) in enumerate(
+            zip(sources, targets_list, source_windows, strict=True)
+        ):
+            for target in targets:
+                vector = self._pool(
+                    source=source,
+                    target=target,
+                    prompt=prompt,
+                    windows=windows,
+                    window_offsets=window_offsets,
+                    token_embeddings=token_embeddings,
+                )
+                if vector is None:
+                    fallback_texts.append(template(source, target))
+                    fallback_rows.append(len(vectors))
+                vectors.append(vector)
+            offsets[i + 1] = len(vectors)
+
+        if fallback_texts:
+            encoded: NDArray[np.float32] = self.model.encode(  # type: ignore
+                sentences=fallback_texts,
+                prompt_name=prompt_name,
+                batch_size=self.batchsize,
+                show_progress_bar=self.show_progress_bar,
+                convert_to_numpy=True,
+            )
+            for i, row in enumerate(fallback_rows):
+                vectors[row] = encoded[i]
+
+        if not vectors:
+            return np.empty((0, 0), dtype=np.float32), offsets
+        embeddings = np.stack([_vector for _vector in vectors if _vector is not None])
+        return dequantize(
+            embeddings=quantize(
+                embeddings=l2_normalize(embeddings=embeddings), precision=self.precision
+            ),
+            precision=self.precision,
+            dim=embeddings.shape[1],
+        ), offsets
+
+    def _pool(
+        self,
+        source: str,
+        target: str,
+        prompt: str,
+        windows: list[tuple[int, int, int]],
+        window_offsets: list[list[tuple[int, int]]],
+        token_embeddings: list[NDArray[np.float32]],
+    ) -> NDArray[np.float32] | None:
+        pooled: list[NDArray[np.float32]] = []
+        for match in target_pattern(target).finditer(source):
+            # the pattern also matches the whitespace around the occurrence
+            text = match.group()
+            match_start = match.start() + len(text) - len(text.lstrip())
+            match_end = match.end() - len(text) + len(text.rstrip())
+            # the window in which the occurrence is the most centered
+            candidates = [
+                (min(match_start - start, end - match_end), window_id, start)
+                for start, end, window_id in windows
+                if start <= match_start and match_end <= end
+            ]
+            if not candidates:
+                continue
+            _, window_id, window_start = max(candidates)
+
+            span_start = len(prompt) + match_start - window_start
+            span_end = len(prompt) + match_end - window_start
+            embeddings = token_embeddings[window_id]
+            rows = [
+                self._n_prefix_tokens + j
+                for j, (start, end) in enumerate(window_offsets[window_id])
+                if start < end and start < span_end and span_start < end
+            ]
+            rows = [row for row in rows if row < embeddings.shape[0]]
+            if rows:
+                pooled.append(embeddings[rows].mean(axis=0))
+        if not pooled:
+            return None
+        return np.mean(pooled, axis=0, dtype=np.float32)
@@ -1,8 +1,11 @@
+from typing import Literal
+
 import numpy as np
 from pydantic import BaseModel, ConfigDict, Field
 
 
 TYPE_FLOAT = float | np.float_
+ExecutionBackend = Literal["sequential", "thread", "process", "asyncio"]
 
 
 class EvaluationSample(BaseModel):
@@ -12,6 +15,13 @@ class EvaluationSample(BaseModel):
     keyphrase_list: list[list[str]]
 
 
+class PredictionRecord(BaseModel):
+    dataset_name: str
+    sample_id: str | int
+    keyphrases: list[str]
+    time: float
+
+
 class Score(BaseModel):
     model_config = ConfigDict(arbitrary_types_allowed=True)
     precision: TYPE_FLOAT = Field(ge=0, le=1)
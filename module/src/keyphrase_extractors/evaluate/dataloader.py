@@ -22,7 +22,8 @@ class Dataloader:
         ]
 
     def __iter__(self) -> Generator[EvaluationSample, None, None]:
-        common_keys = set(self.dataset.keys()) & set(self.label.keys())
+        # Keep the order of the dataset file so that runs are reproducible
+        common_keys = [key for key in self.dataset if key in self.label]
         for key in common_keys:
             label_dict = {item["sample_id"]: item for item in self.label[key]}
 
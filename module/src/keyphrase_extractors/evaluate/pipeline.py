@@ -1,16 +1,17 @@
 import json
-import time
+from collections.abc import Generator
 from logging import Logger
 from pathlib import Path
 
 import numpy as np
+from pydantic import ValidationError
 from tqdm import tqdm
 
 from ..base_extractor import BaseExtractor
-from ..io_data import Outputs
-from .data import Score, Stats
+from .data import EvaluationSample, ExecutionBackend, PredictionRecord, Score, Stats
 from .dataloader import Dataloader
 from .evaluator import Evaluator
+from .runner import EvaluationRunner
 
 
 class EvaluationPipeline:
@@ -55,7 +56,13 @@ class EvaluationPipeline:
         self.k_list = k_list
         self.output_dirpath = output_dirpath
 
-    def run(self, extractor: BaseExtractor, output_dirname: str = "model_name") -> None:
+    def run(
+        self,
+        extractor: BaseExtractor,
+        output_dirname: str = "model_name",
+        backend: ExecutionBackend = "sequential",
+        max_concurrency: int = 1,
+    ) -> None:
         """
         Runs the evaluation pipeline for a given keyphrase extraction model.
 
@@ -65,42 +72,176 @@ class EvaluationPipeline:
             extractor (BaseExtractor): The keyphrase extraction model to evaluate.
             output_dirname (str): Directory name for saving the evaluation results.
                                   Defaults to "model_name".
+            backend (ExecutionBackend): How samples are run: "sequential", "thread",
+                                        "process" or "asyncio".
+            max_concurrency (int): Maximum number of samples in flight.
 
         Returns:
             None: Results and metrics are saved as JSON files in the output directory.
         """
-        _datasets: set[str] = set()
-        sample_ids: dict[str, list[str | int]] = {}
-        preds: dict[str, list[list[str]]] = {}
-        labels: dict[str, list[list[list[str]]]] = {}
-        process_time: dict[str, list[float]] = {}
-        for eval_sample in tqdm(self.dataloader, desc="Evaluating..."):
-            if eval_sample.dataset_name not in _datasets:
-                _datasets.add(eval_sample.dataset_name)
-                sample_ids[eval_sample.dataset_name] = []
-                preds[eval_sample.dataset_name] = []
-                labels[eval_sample.dataset_name] = []
-                process_time[eval_sample.dataset_name] = []
-
-            if self.logger:
-                self.logger.info(f"Ipunt: {eval_sample.text}")
-            start = time.perf_counter()
-            _preds: Outputs = extractor.get_keyphrase(
-                input_text=eval_sample.text, top_n_phrases=self.top_n_phrases
+        runner = EvaluationRunner(
+            backend=backend,
+            max_concurrency=max_concurrency,
+            top_n_phrases=self.top_n_phrases,
+            logger=self.logger,
+        )
+        records: list[PredictionRecord] = []
+        labels: dict[tuple[str, str | int], list[list[str]]] = {}
+        for eval_sample, record in tqdm(
+            runner.run(extractor=extractor, samples=self.dataloader),
+            desc="Evaluating...",
+        ):
+            records.append(record)
+            labels[(eval_sample.dataset_name, eval_sample.id)] = (
+                eval_sample.keyphrase_list
             )
-            end = time.perf_counter()
+
+        self._save_results(
+            records=records,
+            labels=labels,
+            output_dirpath=self.output_dirpath / output_dirname,
+        )
+
+    def _read_stream(self, filepath: Path) -> list[PredictionRecord]:
+        """
+        Reads the predictions appended to a JSONL file.
+
+        A partially written last line, left by an interrupted run, is removed from
+        the file so that new predictions can be appended after it.
+
+        Args:
+            filepath (Path): The JSONL file of predictions.
+
+        Returns:
+            list[PredictionRecord]: The complete predictions in the file.
+        """
+        records: list[PredictionRecord] = []
+        if not filepath.exists():
+            return records
+
+        valid_size = 0
+        with filepath.open("rb") as file:
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break
+                if not line.strip():
+                    valid_size += len(line)
+                    continue
+                try:
+                    records.append(PredictionRecord.model_validate_json(line))
+                except ValidationError:
+                    break
+                valid_size += len(line)
+
+        if valid_size < filepath.stat().st_size:
             if self.logger:
-                self.logger.info(f"Output: {_preds}")
+                self.logger.warning(f"Discard a partially written line in {filepath}")
+            with filepath.open("r+b") as file:
+                file.truncate(valid_size)
+        return records
 
-            process_time[eval_sample.dataset_name].append((end - start) / 60)
-            sample_ids[eval_sample.dataset_name].append(eval_sample.id)
-            preds[eval_sample.dataset_name].append(
-                [_keyphrase.phrase for _keyphrase in _preds.keyphrases[0]]
-            )
-            labels[eval_sample.dataset_name].append(eval_sample.keyphrase_list)
+    def run_streaming(
+        self,
+        extractor: BaseExtractor,
+        output_dirname: str = "model_name",
+        resume: bool = True,
+        backend: ExecutionBackend = "sequential",
+        max_concurrency: int = 1,
+    ) -> None:
+        """
+        Runs the evaluation pipeline, appending each prediction to a JSONL file as
+        soon as it is produced.
+
+        Predictions are written to `pred_keyphrases.jsonl` and the metrics are
+        computed from that file once every sample has been predicted, so an
+        interrupted run can be resumed without losing finished samples.
+
+        Args:
+            extractor (BaseExtractor): The keyphrase extraction model to evaluate.
+            output_dirname (str): Directory name for saving the evaluation results.
+                                  Defaults to "model_name".
+            resume (bool): Whether to skip the samples whose predictions are already
+                           in the JSONL file. If False, the file is overwritten.
+            backend (ExecutionBackend): How samples are run: "sequential", "thread",
+                                        "process" or "asyncio".
+            max_concurrency (int): Maximum number of samples in flight.
+
+        Returns:
+            None: Results and metrics are saved as JSON files in the output directory.
+        """
+        output_dirpath = self.output_dirpath / output_dirname
+        output_dirpath.mkdir(parents=True, exist_ok=True)
+        stream_filepath = output_dirpath / "pred_keyphrases.jsonl"
+        if not resume:
+            stream_filepath.unlink(missing_ok=True)
+
+        completed: set[tuple[str, str | int]] = {
+            (_record.dataset_name, _record.sample_id)
+            for _record in self._read_stream(filepath=stream_filepath)
+        }
+        if self.logger and completed:
+            self.logger.info(f"Resume after {len(completed)} completed samples")
+
+        labels: dict[tuple[str, str | int], list[list[str]]] = {}
+
+        def pending_samples() -> Generator[EvaluationSample, None, None]:
+            for eval_sample in self.dataloader:
+                key = (eval_sample.dataset_name, eval_sample.id)
+                labels[key] = eval_sample.keyphrase_list
+                if key not in completed:
+                    yield eval_sample
+
+        runner = EvaluationRunner(
+            backend=backend,
+            max_concurrency=max_concurrency,
+            top_n_phrases=self.top_n_phrases,
+            logger=self.logger,
+        )
+        with stream_filepath.open("a", encoding="utf-8") as file:
+            for _, record in tqdm(
+                runner.run(extractor=extractor, samples=pending_samples()),
+                desc="Evaluating...",
+            ):
+                file.write(record.model_dump_json() + "\n")
+                file.flush()
+
+        # evaluate the predictions in the stream
+        self._save_results(
+            records=self._read_stream(filepath=stream_filepath),
+            labels=labels,
+            output_dirpath=output_dirpath,
+        )
+
+    def _save_results(
+        self,
+        records: list[PredictionRecord],
+        labels: dict[tuple[str, str | int], list[list[str]]],
+        output_dirpath: Path,
+    ) -> None:
+        """
+        Evaluates predictions and saves them with their metrics.
+
+        Args:
+            records (list[PredictionRecord]): The predictions of each sample.
+            labels (dict[tuple[str, str | int], list[list[str]]]): The true keyphrase
+                sets of each (dataset name, sample ID).
+            output_dirpath (Path): The directory for saving the evaluation results.
+        """
+        sample_ids: dict[str, list[str | int]] = {}
+        preds: dict[str, list[list[str]]] = {}
+        true_keyphrases: dict[str, list[list[list[str]]]] = {}
+        process_time: dict[str, list[float]] = {}
+        for _record in records:
+            key = (_record.dataset_name, _record.sample_id)
+            if key not in labels:
+                continue
+            sample_ids.setdefault(_record.dataset_name, []).append(_record.sample_id)
+            preds.setdefault(_record.dataset_name, []).append(_record.keyphrases)
+            true_keyphrases.setdefault(_record.dataset_name, []).append(labels[key])
+            process_time.setdefault(_record.dataset_name, []).append(_record.time)
 
         # Backup outputs
-        filepath = self.output_dirpath / output_dirname / "pred_keyphrases.json"
+        filepath = output_dirpath / "pred_keyphrases.json"
         filepath.parent.mkdir(parents=True, exist_ok=True)
         with filepath.open("w") as file:
             json.dump(
@@ -131,7 +272,7 @@ class EvaluationPipeline:
         for _dataset_name in preds:
             results[_dataset_name], stats[_dataset_name] = self.evaluator.evaluate(
                 pred_keyphrases_list=preds[_dataset_name],
-                true_keyphrases_list=labels[_dataset_name],
+                true_keyphrases_list=true_keyphrases[_dataset_name],
                 k_list=self.k_list,
             )
 
@@ -146,7 +287,7 @@ class EvaluationPipeline:
         }
 
         # save results
-        filepath = self.output_dirpath / output_dirname / "evaluation_all_results.json"
+        filepath = output_dirpath / "evaluation_all_results.json"
         filepath.parent.mkdir(parents=True, exist_ok=True)
         with filepath.open("w") as file:
             json.dump(
@@ -162,7 +303,7 @@ class EvaluationPipeline:
                 indent=4,
             )
 
-        filepath = self.output_dirpath / output_dirname / "evaluation_summary.json"
+        filepath = output_dirpath / "evaluation_summary.json"
         filepath.parent.mkdir(parents=True, exist_ok=True)
         with filepath.open("w") as file:
             json.dump(
@@ -177,7 +318,7 @@ class EvaluationPipeline:
                 indent=4,
             )
 
-        filepath = self.output_dirpath / output_dirname / "process_time.json"
+        filepath = output_dirpath / "process_time.json"
         filepath.parent.mkdir(parents=True, exist_ok=True)
         with filepath.open("w") as file:
             json.dump(
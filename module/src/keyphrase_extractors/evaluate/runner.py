@@ -0,0 +1,253 @@
+import asyncio
+import threading
+import time
+from collections.abc import Callable, Generator, Iterable
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from contextlib import contextmanager
+from logging import Logger
+
+from ..base_extractor import BaseExtractor
+from ..io_data import Outputs
+from .data import EvaluationSample, ExecutionBackend, PredictionRecord
+
+
+# The extractor of each worker process of `EvaluationRunner`
+_worker_extractor: BaseExtractor | None = None
+
+
+def _to_record(
+    eval_sample: EvaluationSample, outputs: Outputs, elapsed: float
+) -> PredictionRecord:
+    return PredictionRecord(
+        dataset_name=eval_sample.dataset_name,
+        sample_id=eval_sample.id,
+        keyphrases=[_keyphrase.phrase for _keyphrase in outputs.keyphrases[0]],
+        time=elapsed / 60,
+    )
+
+
+def predict_sample(
+    extractor: BaseExtractor,
+    eval_sample: EvaluationSample,
+    top_n_phrases: int,
+    logger: Logger | None = None,
+) -> PredictionRecord:
+    """
+    Extracts the keyphrases of one evaluation sample.
+
+    Args:
+        extractor (BaseExtractor): The keyphrase extraction model to evaluate.
+        eval_sample (EvaluationSample): The sample to predict.
+        top_n_phrases (int): Maximum number of keyphrases to predict.
+        logger (Logger | None): Logger instance or None for no logging.
+
+    Returns:
+        PredictionRecord: The predicted keyphrases and the processing time in minutes.
+    """
+    if logger:
+        logger.info(f"Ipunt: {eval_sample.text}")
+    start = time.perf_counter()
+    outputs = extractor.get_keyphrase(
+        input_text=eval_sample.text, top_n_phrases=top_n_phrases
+    )
+    end = time.perf_counter()
+    if logger:
+        logger.info(f"Output: {outputs}")
+    return _to_record(eval_sample=eval_sample, outputs=outputs, elapsed=end - start)
+
+
+async def apredict_sample(
+    extractor: BaseExtractor,
+    eval_sample: EvaluationSample,
+    top_n_phrases: int,
+    logger: Logger | None = None,
+) -> PredictionRecord:
+    """
+    Extracts the keyphrases of one evaluation sample with `aget_keyphrase`.
+
+    Args:
+        extractor (BaseExtractor): The keyphrase extraction model to evaluate.
+        eval_sample (EvaluationSample): The sample to predict.
+        top_n_phrases (int): Maximum number of keyphrases to predict.
+        logger (Logger | None): Logger instance or None for no logging.
+
+    Returns:
+        PredictionRecord: The predicted keyphrases and the processing time in minutes.
+    """
+    if logger:
+        logger.info(f"Ipunt: {eval_sample.text}")
+    start = time.perf_counter()
+    outputs = await extractor.aget_keyphrase(
+        input_text=eval_sample.text, top_n_phrases=top_n_phrases
+    )
+    end = time.perf_counter()
+    if logger:
+        logger.info(f"Output: {outputs}")
+    return _to_record(eval_sample=eval_sample, outputs=outputs, elapsed=end - start)
+
+
+def _init_worker(extractor: BaseExtractor) -> None:
+    global _worker_extractor
+    _worker_extractor = extractor
+
+
+def _predict_in_worker(
+    eval_sample: EvaluationSample, top_n_phrases: int
+) -> PredictionRecord:
+    if _worker_extractor is None:
+        raise RuntimeError("The worker process is not initialized.")
+    return predict_sample(
+        extractor=_worker_extractor,
+        eval_sample=eval_sample,
+        top_n_phrases=top_n_phrases,
+    )
+
+
+class EvaluationRunner:
+    """
+    Runs an extractor over evaluation samples with a bounded number of samples in
+    flight.
+
+    - "sequential": one sample at a time in the calling thread.
+    - "thread": a thread pool, for extractors that wait on I/O or release the GIL.
+    - "process": a process pool whose workers each hold a copy of the extractor,
+      for CPU-bound extractors. The extractor is handed to the workers once, when
+      they start.
+    - "asyncio": an event loop running `aget_keyphrase` concurrently.
+
+    Predictions are yielded in the order of the samples, whatever order they
+    finish in, and the time of each one is measured around its own extraction.
+
+    Attributes:
+        backend (ExecutionBackend): How samples are run.
+        max_concurrency (int): Maximum number of samples in flight.
+        top_n_phrases (int): Maximum number of keyphrases to predict.
+        logger (Logger | None): Logger instance or None for no logging.
+    """
+
+    def __init__(
+        self,
+        backend: ExecutionBackend,
+        max_concurrency: int,
+        top_n_phrases: int,
+        logger: Logger | None = None,
+    ):
+        if max_concurrency < 1:
+            raise ValueError(
+                f"'max_concurrency' must be at least 1.\nReceived: {max_concurrency=}."
+            )
+        self.backend = backend
+        self.max_concurrency = max_concurrency
+        self.top_n_phrases = top_n_phrases
+        self.logger = logger
+
+    @contextmanager
+    def _open_backend(
+        self, extractor: BaseExtractor
+    ) -> Generator[Callable[[EvaluationSample], Future[PredictionRecord]], None, None]:
+        """
+        Starts the workers of the backend.
+
+        Args:
+            extractor (BaseExtractor): The keyphrase extraction model to evaluate.
+
+        Yields:
+            Callable[[EvaluationSample], Future[PredictionRecord]]: Submits a sample.
+        """
+        if self.backend == "thread":
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+                yield lambda sample: executor.submit(
+                    predict_sample, extractor, sample, self.top_n_phrases, self.logger
+                )
+        elif self.backend == "process":
+            with ProcessPoolExecutor(
+                max_workers=self.max_concurrency,
+                initializer=_init_worker,
+                initargs=(extractor,),
+            ) as executor:
+                yield lambda sample: executor.submit(
+                    _predict_in_worker, sample, self.top_n_phrases
+                )
+        elif self.backend == "asyncio":
+            loop = asyncio.new_event_loop()
+            # Extractors without a native `aget_keyphrase` run in the default executor
+            loop.set_default_executor(
+                ThreadPoolExecutor(max_workers=self.max_concurrency)
+            )
+            thread = threading.Thread(target=loop.run_forever, daemon=True)
+            thread.start()
+            try:
+                yield lambda sample: asyncio.run_coroutine_threadsafe(
+                    apredict_sample(extractor, sample, self.top_n_phrases, self.logger),
+                    loop,
+                )
+            finally:
+                loop.call_soon_threadsafe(loop.stop)
+                thread.join()
+                loop.run_until_complete(loop.shutdown_default_executor())
+                loop.close()
+        else:
+            raise ValueError(f"Unknown backend: {self.backend}")
+
+    def run(
+        self, extractor: BaseExtractor, samples: Iterable[EvaluationSample]
+    ) -> Generator[tuple[EvaluationSample, PredictionRecord], None, None]:
+        """
+        Predicts the keyphrases of samples.
+
+        Args:
+            extractor (BaseExtractor): The keyphrase extraction model to evaluate.
+            samples (Iterable[EvaluationSample]): The samples to predict.
+
+        Yields:
+            tuple[EvaluationSample, PredictionRecord]: Each sample and its
+                prediction, in the order of `samples`.
+        """
+        if self.backend == "sequential":
+            for sample in samples:
+                yield (
+                    sample,
+                    predict_sample(
+                        extractor=extractor,
+                        eval_sample=sample,
+                        top_n_phrases=self.top_n_phrases,
+                        logger=self.logger,
+                    ),
+                )
+            return
+
+        if self.logger:
+            self.logger.info(
+                f"Run samples on the {self.backend} backend "
+                f"with {self.max_concurrency} in flight"
+            )
+        with self._open_backend(extractor=extractor) as submit:
+            sample_iterator = iter(samples)
+            running: dict[Future[PredictionRecord], tuple[int, EvaluationSample]] = {}
+            finished: dict[int, tuple[EvaluationSample, PredictionRecord]] = {}
+            n_submitted = next_index = 0
+            exhausted = False
+            while True:
+                while not exhausted and len(running) < self.max_concurrency:
+                    sample = next(sample_iterator, None)
+                    if sample is None:
+                        exhausted = True
+                    else:
+                        running[submit(sample)] = (n_submitted, sample)
+                        n_submitted += 1
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, sample = running.pop(future)
+                    finished[index] = (sample, future.result())
+                while next_index in finished:
+                    yield finished.pop(next_index)
+                    next_index += 1
@@ -1,2 +1,43 @@
-from .data import ResponseSchema
-from .extractor import GenerationBasedExtractor
+from typing import TYPE_CHECKING
+
+from ..utils.lazy_import import lazy_attributes
+
+
+if TYPE_CHECKING:
+    from .cache import ResponseCache
+    from .data import (
+        ChunkResponseSchema,
+        PackedResponseSchema,
+        PackingConfig,
+        RequestConfig,
+        ResponseCacheConfig,
+        ResponseCacheStats,
+        ResponseSchema,
+    )
+    from .extractor import GenerationBasedExtractor
+
+__all__ = [
+    "ChunkResponseSchema",
+    "GenerationBasedExtractor",
+    "PackedResponseSchema",
+    "PackingConfig",
+    "RequestConfig",
+    "ResponseCache",
+    "ResponseCacheConfig",
+    "ResponseCacheStats",
+    "ResponseSchema",
+]
+__getattr__, __dir__ = lazy_attributes(
+    module_globals=globals(),
+    attributes={
+        "ResponseCache": ".cache",
+        "ChunkResponseSchema": ".data",
+        "PackedResponseSchema": ".data",
+        "PackingConfig": ".data",
+        "RequestConfig": ".data",
+        "ResponseCacheConfig": ".data",
+        "ResponseCacheStats": ".data",
+        "ResponseSchema": ".data",
+        "GenerationBasedExtractor": ".extractor",
+    },
+)
@@ -0,0 +1,161 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from typing import Any
+
+from .data import ResponseCacheConfig, ResponseCacheStats, ResponseSchema
+
+
+class ResponseCache:
+    """
+    A persistent cache of validated LLM responses keyed by
+    (system prompt, user prompt, model settings).
+
+    Responses are stored in a SQLite file together with the time the request took,
+    so that every hit also reports the generation time it saved. Entries older than
+    `ttl_seconds` are treated as misses and replaced by the next response. With
+    `bypass`, the cache is neither read nor written.
+
+    The connection is opened lazily in each process, so an extractor holding the
+    cache can be sent to worker processes.
+
+    Attributes:
+        config (ResponseCacheConfig): The cache file, the TTL and the bypass switch.
+        hits (int): The number of lookups served from the cache.
+        misses (int): The number of lookups that had to be requested.
+        saved_seconds (float): The total generation time of the responses served
+            from the cache.
+    """
+
+    def __init__(self, config: ResponseCacheConfig):
+        self.config = config
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+        self._lock = threading.Lock()
+        self._connection: sqlite3.Connection | None = None
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_lock"] = None
+        state["_connection"] = None
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.config.cache_filepath.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(
+                self.config.cache_filepath, timeout=30.0, check_same_thread=False
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, "
+                "elapsed REAL NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._connection.commit()
+        return self._connection
+
+    @staticmethod
+    def make_key(system_prompt: str, user_prompt: str, model_settings: str) -> str:
+        """
+        Hashes the inputs that determine a response.
+
+        Args:
+            system_prompt (str): The serialized system prompt.
+            user_prompt (str): The serialized user prompt.
+            model_settings (str): The serialized settings of the agent.
+
+        Returns:
+            str: The cache key.
+        """
+        content = "\0".join([system_prompt, user_prompt, model_settings])
+        return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, key: str) -> ResponseSchema | None:
+        """
+        Looks up a response.
+
+        Args:
+            key (str): The key made by `make_key`.
+
+        Returns:
+            ResponseSchema | None: The cached response, or None on a miss.
+        """
+        if self.config.bypass:
+            return None
+        with self._lock:
+            row = (
+                self._connect()
+                .execute(
+                    "SELECT response, elapsed, created_at FROM responses WHERE key = ?",
+                    (key,),
+                )
+                .fetchone()
+            )
+            if row is not None and self.config.ttl_seconds is not None:
+                if time.time() - row[2] > self.config.ttl_seconds:
+                    row = None
+
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.saved_seconds += row[1]
+            return ResponseSchema.model_validate_json(row[0])
+
+    def put(self, key: str, response: ResponseSchema, elapsed: float) -> None:
+        """
+        Stores a response.
+
+        Args:
+            key (str): The key made by `make_key`.
+            response (ResponseSchema): The validated response.
+            elapsed (float): The time the request took in seconds.
+        """
+        if self.config.bypass:
+            return
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (key, response.model_dump_json(), elapsed, time.time()),
+            )
+            connection.commit()
+
+    @property
+    def stats(self) -> ResponseCacheStats:
+        """The hit/miss counters, the number of entries and the time saved."""
+        with self._lock:
+            entries = (
+                0
+                if self.config.bypass
+                else self._connect()
+                .execute("SELECT COUNT(*) FROM responses")
+                .fetchone()[0]
+            )
+            return ResponseCacheStats(
+                hits=self.hits,
+                misses=self.misses,
+                entries=entries,
+                saved_seconds=self.saved_seconds,
+            )
+
+    def clear_stats(self) -> None:
+        """Resets the hit/miss counters and the time saved."""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.saved_seconds = 0.0
+
+    def close(self) -> None:
+        """Closes the connection to the cache file."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
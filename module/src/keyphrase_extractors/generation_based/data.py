@@ -1,7 +1,43 @@
-from pydantic import BaseModel
+from pathlib import Path
+
+from pydantic import BaseModel, Field
 
 from ..io_data import Keyphrase
 
 
 class ResponseSchema(BaseModel):
     keyphrases: list[Keyphrase]
+
+
+class ChunkResponseSchema(ResponseSchema):
+    chunk_id: int
+
+
+class PackedResponseSchema(BaseModel):
+    chunks: list[ChunkResponseSchema]
+
+
+class PackingConfig(BaseModel):
+    max_characters: int = Field(default=4000, ge=1)
+    max_chunks: int = Field(default=8, ge=1)
+
+
+class RequestConfig(BaseModel):
+    max_concurrency: int = Field(default=8, ge=1)
+    timeout: float | None = Field(default=120.0, gt=0)
+    max_retries: int = Field(default=3, ge=0)
+    backoff_seconds: float = Field(default=1.0, ge=0)
+    max_backoff_seconds: float = Field(default=30.0, ge=0)
+
+
+class ResponseCacheConfig(BaseModel):
+    cache_filepath: Path
+    ttl_seconds: float | None = Field(default=None, gt=0)
+    bypass: bool = False
+
+
+class ResponseCacheStats(BaseModel):
+    hits: int
+    misses: int
+    entries: int
+    saved_seconds: float
@@ -1,9 +1,16 @@
+import asyncio
+import json
 import os
+import time
+from collections.abc import Callable, Coroutine
+from concurrent.futures import ThreadPoolExecutor
 from logging import Logger
 from pathlib import Path
+from typing import Any, TypeVar
+from weakref import WeakKeyDictionary
 
 from langrila import Agent, Prompt, SystemPrompt
-from langrila.core.response import TextResponse
+from langrila.core.response import Response, TextResponse
 from langrila.core.typing import (
     ClientMessage,
     ClientMessageContent,
@@ -13,11 +20,41 @@ from langrila.core.typing import (
 
 from ..base_extractor import BaseExtractor
 from ..io_data import Inputs, Keyphrase, Outputs
-from .data import ResponseSchema
+from .cache import ResponseCache
+from .data import (
+    PackedResponseSchema,
+    PackingConfig,
+    RequestConfig,
+    ResponseCacheConfig,
+    ResponseSchema,
+)
 
 
 PROMPT_DIRPATH = Path(os.path.abspath(__file__)).parent / "prompt_texts"
 
+T = TypeVar("T")
+
+
+def _run_sync(coroutine: Coroutine[Any, Any, T]) -> T:
+    """
+    Runs a coroutine to completion from synchronous code.
+
+    If an event loop is already running in this thread (e.g. in Jupyter), the
+    coroutine runs on a new loop in another thread.
+
+    Args:
+        coroutine (Coroutine[Any, Any, T]): The coroutine to run.
+
+    Returns:
+        T: The result of the coroutine.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
 
 class GenerationBasedExtractor(BaseExtractor):
     """
@@ -27,10 +64,30 @@ class GenerationBasedExtractor(BaseExtractor):
     instructions. It supports customization of system prompts and handles multi-document
     extraction.
 
+    Requests for the chunks of a document, or of several documents, are sent
+    concurrently, at most `request_config.max_concurrency` at a time per event loop.
+    A request that fails or exceeds `request_config.timeout` is retried with
+    exponential backoff, and a chunk whose retries are exhausted yields no
+    keyphrases.
+
+    With `response_cache`, validated responses are stored persistently and a request
+    whose prompts and model settings were seen before is answered from the cache
+    without calling the agent.
+
+    With `packing_config`, the distinct chunks of the documents are packed into
+    requests of several chunks each, within a character and a chunk budget, and the
+    agent answers each chunk separately following `PackedResponseSchema`. The
+    keyphrases of each chunk are then fused as usual.
+
     Attributes:
         agent (Agent): The AI agent used for generating keyphrases.
         system_prompt (SystemPrompt): The system prompt containing instructions for
                                       the agent.
+        request_config (RequestConfig): Concurrency, timeout and retry settings.
+        response_cache (ResponseCache | None): The response cache, enabled by the
+            `response_cache` argument.
+        packing_config (PackingConfig | None): The budgets of packed requests, or
+            None to send one request per chunk.
     """
 
     def __init__(
@@ -43,6 +100,9 @@ class GenerationBasedExtractor(BaseExtractor):
         flat_output: bool = True,
         use_order: bool = False,
         rrf_k: int = 60,
+        request_config: RequestConfig | None = None,
+        response_cache: ResponseCacheConfig | None = None,
+        packing_config: PackingConfig | None = None,
         logger: Logger | None = None,
     ):
         """
@@ -57,10 +117,25 @@ class GenerationBasedExtractor(BaseExtractor):
             flat_output (bool): Whether to flatten the output structure.
             use_order (bool): Whether to consider order during ranking.
             rrf_k (int): Parameter for Reciprocal Rank Fusion (RRF) scoring.
+            request_config (RequestConfig | None): Concurrency, timeout and retry
+                settings of the requests, or None for the defaults.
+            response_cache (ResponseCacheConfig | None): Settings of the response
+                cache, or None to disable it.
+            packing_config (PackingConfig | None): Budgets for packing several chunks
+                into one request, or None to send one request per chunk.
             logger (Logger | None): Logger instance or None for no logging.
         """
         super().__init__(set(), max_characters, flat_output, use_order, rrf_k, logger)
         self.agent = agent
+        self.request_config = request_config or RequestConfig()
+        self._semaphores: WeakKeyDictionary[
+            asyncio.AbstractEventLoop, asyncio.Semaphore
+        ] = WeakKeyDictionary()
+        self.response_cache = (
+            ResponseCache(config=response_cache) if response_cache else None
+        )
+        self.packing_config = packing_config
+        self._model_settings = self._serialize_model_settings()
 
         if isinstance(system_prompt, SystemPrompt):
             self.system_prompt = system_prompt
@@ -111,7 +186,189 @@ class GenerationBasedExtractor(BaseExtractor):
             contents=f"N={top_n_phrases}\n文章:\n{text}",
         )
 
-    def _extract(self, text: str, top_n_phrases: int) -> list[Keyphrase]:
+    def _serialize_model_settings(self) -> str:
+        """
+        Serializes the settings of the agent that affect its responses, such as the
+        client, the model name and the sampling parameters.
+
+        Returns:
+            str: The settings as a JSON string.
+        """
+        client = getattr(self.agent, "_client", None)
+        return json.dumps(
+            {
+                "client": type(client).__name__,
+                "settings": getattr(self.agent, "init_kwargs", {}),
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+            default=repr,
+        )
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """
+        Returns the semaphore bounding the requests sent from the running event loop.
+
+        Returns:
+            asyncio.Semaphore: The semaphore of the running event loop.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.request_config.max_concurrency)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    def _make_packed_user_prompt(self, texts: list[str], top_n_phrases: int) -> Prompt:
+        """
+        Creates a user prompt asking for the keyphrases of several texts at once.
+
+        Args:
+            texts (list[str]): The texts for which keyphrases are extracted.
+            top_n_phrases (int): The number of keyphrases to extract per text.
+
+        Returns:
+            Prompt: The generated user prompt.
+        """
+        sections = "\n\n".join(f"文章[{i}]:\n{text}" for i, text in enumerate(texts))
+        return Prompt(
+            role="user",
+            contents=(
+                f"N={top_n_phrases}\n"
+                f"以下の{len(texts)}件の文章それぞれについて、独立にキーワードを抽出し、"
+                "文章の番号を chunk_id として文章ごとに返してください。\n\n"
+                f"{sections}"
+            ),
+        )
+
+    def _cache_key(self, user_prompt: Prompt) -> str:
+        """
+        Makes the response cache key of a user prompt. The keyphrases of a text are
+        stored under the key of its single-text prompt, whether they were answered
+        by a request of their own or by a packed one, so that both paths share the
+        cached entries.
+
+        Args:
+            user_prompt (Prompt): The user prompt of a single text.
+
+        Returns:
+            str: The cache key.
+        """
+        return ResponseCache.make_key(
+            system_prompt=self.system_prompt.model_dump_json(),
+            user_prompt=user_prompt.model_dump_json(),
+            model_settings=self._model_settings,
+        )
+
+    def _response_text(self, response: Response) -> str:
+        """
+        Returns the text of a response of the AI agent.
+
+        Args:
+            response (Response): The response of the AI agent.
+
+        Returns:
+            str: The text of the first content.
+        """
+        if isinstance(response.contents[0], TextResponse):
+            return response.contents[0].text
+        else:
+            raise ValueError(
+                "Response contents[0] is not of type TextResponse. Actual type: "
+                f"{type(response.contents[0])}"
+            )
+
+    def _parse_response(self, response: Response) -> list[Keyphrase]:
+        """
+        Parses the keyphrases in a response of the AI agent.
+
+        Args:
+            response (Response): The response of the AI agent.
+
+        Returns:
+            list[Keyphrase]: The keyphrases sorted by their scores.
+        """
+        _keyphrases = ResponseSchema.model_validate_json(
+            self._response_text(response=response)
+        )
+        return sorted(_keyphrases.keyphrases, key=lambda x: x.score, reverse=True)
+
+    def _parse_packed_response(
+        self, response: Response, n_chunks: int
+    ) -> dict[int, list[Keyphrase]]:
+        """
+        Parses the keyphrases of each text in a response to a packed request.
+
+        Args:
+            response (Response): The response of the AI agent.
+            n_chunks (int): The number of texts in the request.
+
+        Returns:
+            dict[int, list[Keyphrase]]: The keyphrases sorted by their scores for each
+                text index answered in the response.
+        """
+        _packed = PackedResponseSchema.model_validate_json(
+            self._response_text(response=response)
+        )
+        return {
+            _chunk.chunk_id: sorted(
+                _chunk.keyphrases, key=lambda x: x.score, reverse=True
+            )
+            for _chunk in _packed.chunks
+            if 0 <= _chunk.chunk_id < n_chunks
+        }
+
+    async def _arequest(
+        self, user_prompt: Prompt, parse: Callable[[Response], T], **kwargs: Any
+    ) -> tuple[T, float] | None:
+        """
+        Sends a request to the AI agent, retrying failed requests with exponential
+        backoff.
+
+        Args:
+            user_prompt (Prompt): The user prompt.
+            parse (Callable[[Response], T]): Parses the response. A response that
+                fails to parse is retried.
+            **kwargs (Any): Generation parameters overriding those of the agent.
+
+        Returns:
+            tuple[T, float] | None: The parsed response and the time the request took
+                in seconds, or None if every attempt failed.
+        """
+        config = self.request_config
+        semaphore = self._get_semaphore()
+        for attempt in range(config.max_retries + 1):
+            try:
+                async with semaphore:
+                    start = time.perf_counter()
+                    response = await asyncio.wait_for(
+                        self.agent.generate_text_async(
+                            prompt=user_prompt,
+                            system_instruction=self.system_prompt,
+                            **kwargs,
+                        ),
+                        timeout=config.timeout,
+                    )
+                    elapsed = time.perf_counter() - start
+                if self.logger:
+                    self.logger.info(f"Response: {response}")
+                return parse(response), elapsed
+            except Exception as e:
+                if attempt == config.max_retries:
+                    if self.logger:
+                        self.logger.warning(
+                            f"Give up after {attempt + 1} attempts: {e!r}"
+                        )
+                    return None
+                delay = min(
+                    config.backoff_seconds * 2**attempt, config.max_backoff_seconds
+                )
+                if self.logger:
+                    self.logger.warning(f"Retry in {delay} seconds: {e!r}")
+                await asyncio.sleep(delay)
+        return None
+
+    async def _aextract(self, text: str, top_n_phrases: int) -> list[Keyphrase]:
         """
         Extracts keyphrases from the text using the AI agent.
 
@@ -120,30 +377,230 @@ class GenerationBasedExtractor(BaseExtractor):
             top_n_phrases (int): The number of keyphrases to extract.
 
         Returns:
-            list[Keyphrase]: A sorted list of extracted keyphrases.
+            list[Keyphrase]: A sorted list of extracted keyphrases, or an empty list if
+                every attempt failed.
         """
         user_prompt = self._make_user_prompt(text=text, top_n_phrases=top_n_phrases)
         if self.logger:
             self.logger.info(f"User prompt: {user_prompt}")
 
-        try:
-            response = self.agent.generate_text(
-                prompt=user_prompt, system_instruction=self.system_prompt
-            )
-            if self.logger:
-                self.logger.info(f"Response: {response}")
-        except Exception as e:
-            print(e)
+        cache_key = None
+        if self.response_cache:
+            cache_key = self._cache_key(user_prompt=user_prompt)
+            cached = self.response_cache.get(key=cache_key)
+            if cached is not None:
+                if self.logger:
+                    self.logger.info(f"Response cache hit: {cached}")
+                return cached.keyphrases
+
+        result = await self._arequest(
+            user_prompt=user_prompt, parse=self._parse_response
+        )
+        if result is None:
             return []
+        keyphrases, elapsed = result
+        if self.response_cache and cache_key is not None:
+            self.response_cache.put(
+                key=cache_key,
+                response=ResponseSchema(keyphrases=keyphrases),
+                elapsed=elapsed,
+            )
+        return keyphrases
 
-        if isinstance(response.contents[0], TextResponse):
-            _keyphrases = ResponseSchema.model_validate_json(response.contents[0].text)
-            return sorted(_keyphrases.keyphrases, key=lambda x: x.score, reverse=True)
+    async def _aextract_pack(
+        self, texts: list[str], top_n_phrases: int
+    ) -> list[list[Keyphrase] | None]:
+        """
+        Extracts keyphrases from several texts with a single request. A single text
+        is requested with the usual prompt.
+
+        Args:
+            texts (list[str]): The texts for keyphrase extraction.
+            top_n_phrases (int): The number of keyphrases to extract per text.
+
+        Returns:
+            list[list[Keyphrase] | None]: The sorted keyphrases of each text, or None
+                for a text the response did not answer, and for every text if every
+                attempt failed.
+        """
+        if len(texts) == 1:
+            return [await self._aextract(text=texts[0], top_n_phrases=top_n_phrases)]
+
+        user_prompt = self._make_packed_user_prompt(
+            texts=texts, top_n_phrases=top_n_phrases
+        )
+        if self.logger:
+            self.logger.info(f"User prompt: {user_prompt}")
+
+        # Structured outputs follow the packed schema instead of the agent's one
+        kwargs: dict[str, Any] = (
+            {"response_format": PackedResponseSchema}
+            if "response_format" in getattr(self.agent, "init_kwargs", {})
+            else {}
+        )
+        result = await self._arequest(
+            user_prompt=user_prompt,
+            parse=lambda response: self._parse_packed_response(
+                response=response, n_chunks=len(texts)
+            ),
+            **kwargs,
+        )
+        if result is None:
+            return [None for _ in texts]
+        keyphrases_by_id, elapsed = result
+        if self.response_cache:
+            for i, text in enumerate(texts):
+                if i in keyphrases_by_id:
+                    self.response_cache.put(
+                        key=self._cache_key(
+                            user_prompt=self._make_user_prompt(
+                                text=text, top_n_phrases=top_n_phrases
+                            )
+                        ),
+                        response=ResponseSchema(keyphrases=keyphrases_by_id[i]),
+                        elapsed=elapsed / len(texts),
+                    )
+        return [keyphrases_by_id.get(i) for i in range(len(texts))]
+
+    def _pack(self, chunks: list[str]) -> list[list[int]]:
+        """
+        Groups chunks into requests in order, keeping each request within the
+        character and chunk budgets of `packing_config`.
+
+        Args:
+            chunks (list[str]): The chunks to pack.
+
+        Returns:
+            list[list[int]]: The indices of the chunks of each request. A chunk longer
+                than the character budget gets a request of its own.
+        """
+        if self.packing_config is None:
+            return [[i] for i in range(len(chunks))]
+        packs: list[list[int]] = []
+        n_characters = 0
+        for i, chunk in enumerate(chunks):
+            if (
+                packs
+                and len(packs[-1]) < self.packing_config.max_chunks
+                and n_characters + len(chunk) <= self.packing_config.max_characters
+            ):
+                packs[-1].append(i)
+                n_characters += len(chunk)
+            else:
+                packs.append([i])
+                n_characters = len(chunk)
+        return packs
+
+    async def _aextract_packed(
+        self, chunks: list[str], top_n_phrases: int
+    ) -> list[list[Keyphrase]]:
+        """
+        Extracts keyphrases from chunks, packing several chunks into each request.
+
+        Chunks found in the response cache are not requested, and chunks a packed
+        response does not answer, or whose packed request failed, are requested one
+        by one.
+
+        Args:
+            chunks (list[str]): The distinct chunks.
+            top_n_phrases (int): The number of keyphrases to extract per chunk.
+
+        Returns:
+            list[list[Keyphrase]]: The keyphrases of each chunk.
+        """
+        results: list[list[Keyphrase] | None] = [None] * len(chunks)
+        if self.response_cache:
+            for i, chunk in enumerate(chunks):
+                cached = self.response_cache.get(
+                    key=self._cache_key(
+                        user_prompt=self._make_user_prompt(
+                            text=chunk, top_n_phrases=top_n_phrases
+                        )
+                    )
+                )
+                if cached is not None:
+                    results[i] = cached.keyphrases
+
+        pending = [i for i, result in enumerate(results) if result is None]
+        packs = [
+            [pending[j] for j in pack]
+            for pack in self._pack(chunks=[chunks[i] for i in pending])
+        ]
+        if self.logger:
+            self.logger.info(f"Pack {len(pending)} chunks into {len(packs)} requests")
+        packed_results = await asyncio.gather(
+            *(
+                self._aextract_pack(
+                    texts=[chunks[i] for i in pack], top_n_phrases=top_n_phrases
+                )
+                for pack in packs
+            )
+        )
+        for pack, packed_result in zip(packs, packed_results, strict=True):
+            for i, keyphrases in zip(pack, packed_result, strict=True):
+                results[i] = keyphrases
+
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing and self.logger:
+            self.logger.warning(f"Request {len(missing)} unanswered chunks one by one")
+        for i, keyphrases in zip(
+            missing,
+            await asyncio.gather(
+                *(
+                    self._aextract(text=chunks[i], top_n_phrases=top_n_phrases)
+                    for i in missing
+                )
+            ),
+            strict=True,
+        ):
+            results[i] = keyphrases
+        return [result or [] for result in results]
+
+    async def _aextract_batch(
+        self, docs: list[list[str]], top_n_phrases: int
+    ) -> list[list[list[Keyphrase]]]:
+        """
+        Extracts keyphrases from the chunks of several documents, sending the requests
+        for the distinct chunks concurrently.
+
+        Args:
+            docs (list[list[str]]): The preprocessed chunks of each document.
+            top_n_phrases (int): The number of keyphrases to extract per chunk.
+
+        Returns:
+            list[list[list[Keyphrase]]]: The keyphrases of each chunk of each document.
+        """
+        chunks, chunk_indices = self._unique_chunks(docs=docs)
+        if self.packing_config:
+            keyphrases_list = await self._aextract_packed(
+                chunks=chunks, top_n_phrases=top_n_phrases
+            )
         else:
-            raise ValueError(
-                "Response contents[0] is not of type TextResponse. Actual type: "
-                f"{type(response.contents[0])}"
+            keyphrases_list = await asyncio.gather(
+                *(
+                    self._aextract(text=chunk, top_n_phrases=top_n_phrases)
+                    for chunk in chunks
+                )
             )
+        if self.logger and self.response_cache:
+            self.logger.info(f"Response cache: {self.response_cache.stats}")
+        return [[keyphrases_list[i] for i in indices] for indices in chunk_indices]
+
+    def _extract_batch(
+        self, docs: list[list[str]], top_n_phrases: int
+    ) -> list[list[list[Keyphrase]]]:
+        """
+        Extracts keyphrases from the chunks of several documents, sending one request
+        per distinct chunk concurrently.
+
+        Args:
+            docs (list[list[str]]): The preprocessed chunks of each document.
+            top_n_phrases (int): The number of keyphrases to extract per chunk.
+
+        Returns:
+            list[list[list[Keyphrase]]]: The keyphrases of each chunk of each document.
+        """
+        return _run_sync(self._aextract_batch(docs=docs, top_n_phrases=top_n_phrases))
 
     def get_keyphrase(
         self, input_text: str | list[str] | Inputs, top_n_phrases: int = 10
@@ -151,6 +608,8 @@ class GenerationBasedExtractor(BaseExtractor):
         """
         Extracts keyphrases from the input text using the generative agent.
 
+        This is a synchronous wrapper of `aget_keyphrase`.
+
         Args:
             input_text (str | list[str] | Inputs): The input text(s) or preprocessed data.
             top_n_phrases (int): The number of keyphrases to extract.
@@ -158,21 +617,54 @@ class GenerationBasedExtractor(BaseExtractor):
         Returns:
             Outputs: Extracted keyphrases with their corresponding scores.
         """
-        verify_input: Inputs = self._verify_input(input_text=input_text)
-        docs: list[str] = verify_input.docs
-        outputs: Outputs = Outputs(
-            keyphrases=[
-                self._extract(text=doc, top_n_phrases=top_n_phrases) for doc in docs
-            ]
+        return _run_sync(
+            self.aget_keyphrase(input_text=input_text, top_n_phrases=top_n_phrases)
         )
-        if self.logger:
-            self.logger.debug(f"Outputs: {outputs.model_dump_json(indent=4)}")
-
-        if self.flat_output and len(outputs.keyphrases) > 1:
-            outputs = self._flatten_outputs(
-                keyphrases_list=outputs.keyphrases,
-                use_order=self.use_order,
-                descending=True,
-                rrf_k=self.rrf_k,
+
+    async def aget_keyphrase(
+        self, input_text: str | list[str] | Inputs, top_n_phrases: int = 10
+    ) -> Outputs:
+        """
+        Extracts keyphrases from the input text, requesting all chunks concurrently.
+
+        Args:
+            input_text (str | list[str] | Inputs): The input text(s) or preprocessed data.
+            top_n_phrases (int): The number of keyphrases to extract.
+
+        Returns:
+            Outputs: Extracted keyphrases with their corresponding scores.
+        """
+        verify_input: Inputs = self._verify_input(input_text=input_text)
+        keyphrases_list = (
+            await self._aextract_batch(
+                docs=[verify_input.docs], top_n_phrases=top_n_phrases
             )
-        return outputs
+        )[0]
+        return self._make_outputs(keyphrases_list=keyphrases_list)
+
+    async def aget_keyphrase_batch(
+        self, docs: list[str] | list[Inputs], top_n_phrases: int = 10
+    ) -> list[Outputs]:
+        """
+        Extracts keyphrases from many independent documents, requesting the chunks of
+        all documents concurrently.
+
+        Args:
+            docs (list[str] | list[Inputs]): The documents, each given as a text or as
+                preprocessed chunks.
+            top_n_phrases (int): The number of keyphrases to extract.
+
+        Returns:
+            list[Outputs]: Extracted keyphrase outputs in the same order as `docs`.
+        """
+        verified_inputs: list[Inputs] = [
+            self._verify_input(input_text=doc) for doc in docs
+        ]
+        keyphrases_lists = await self._aextract_batch(
+            docs=[verified_input.docs for verified_input in verified_inputs],
+            top_n_phrases=top_n_phrases,
+        )
+        return [
+            self._make_outputs(keyphrases_list=keyphrases_list)
+            for keyphrases_list in keyphrases_lists
+        ]
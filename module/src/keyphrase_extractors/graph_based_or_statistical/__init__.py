@@ -1 +1,12 @@
-from .extractor import ClassicalExtractor
+from typing import TYPE_CHECKING
+
+from ..utils.lazy_import import lazy_attributes
+
+
+if TYPE_CHECKING:
+    from .extractor import ClassicalExtractor
+
+__all__ = ["ClassicalExtractor"]
+__getattr__, __dir__ = lazy_attributes(
+    module_globals=globals(), attributes={"ClassicalExtractor": ".extractor"}
+)
@@ -1,3 +1,6 @@
+import threading
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
 from logging import Logger
 from typing import Any
 
@@ -8,6 +11,50 @@ from ..io_data import Inputs, Keyphrase, Outputs
 from ..utils import to_original_expression
 
 
+# The extractor of each worker process of `ClassicalExtractor`
+_worker_extractor: "ClassicalExtractor | None" = None
+
+
+def _init_worker(
+    extractor_factory: Callable[[], LoadFile],
+    args_candidate_selection: dict[str, Any],
+    args_candidate_weighting: dict[str, Any],
+    stop_words: set[str],
+) -> None:
+    """
+    Builds the pke extractor of a worker process.
+
+    Args:
+        extractor_factory (Callable[[], LoadFile]): Creates a pke extractor.
+        args_candidate_selection (dict[str, Any]): Parameters for candidate selection.
+        args_candidate_weighting (dict[str, Any]): Parameters for candidate weighting.
+        stop_words (set[str]): Stop words to exclude during processing.
+    """
+    global _worker_extractor
+    _worker_extractor = ClassicalExtractor(
+        extractor=extractor_factory(),
+        args_candidate_selection=args_candidate_selection,
+        args_candidate_weighting=args_candidate_weighting,
+        stop_words=stop_words,
+    )
+
+
+def _extract_in_worker(doc: str, top_n_phrases: int) -> list[Keyphrase]:
+    """
+    Extracts keyphrases from a single chunk in a worker process.
+
+    Args:
+        doc (str): The preprocessed chunk.
+        top_n_phrases (int): The maximum number of keyphrases to return.
+
+    Returns:
+        list[Keyphrase]: The top-n keyphrases of the chunk.
+    """
+    if _worker_extractor is None:
+        raise RuntimeError("The worker process is not initialized.")
+    return _worker_extractor._extract(doc=doc, top_n_phrases=top_n_phrases)  # type: ignore
+
+
 class ClassicalExtractor(BaseExtractor):
     """
     An extractor class for graph-based or statistical keyphrase extraction.
@@ -16,11 +63,19 @@ class ClassicalExtractor(BaseExtractor):
     library (pke). It supports candidate selection, weighting, and filtering
     with customizable parameters.
 
+    A pke extractor holds the document it is processing, so each thread runs its
+    own: the thread that creates the ClassicalExtractor uses `extractor`, and other
+    threads one made by `extractor_factory`. A single instance can therefore be
+    called from a thread pool.
+
     Attributes:
         extractor (LoadFile): An instance of the keyphrase extractor from the pke library.
         args_candidate_selection (dict[str, Any]): Parameters for candidate selection.
         args_candidate_weighting (dict[str, Any]): Parameters for candidate weighting.
         stop_words (list[str]): A list of stop words to exclude during processing.
+        n_workers (int): The number of worker processes. 1 runs pke in this process.
+        extractor_factory (Callable[[], LoadFile]): Creates the pke extractor of each
+                                                   worker process and thread.
     """
 
     def __init__(
@@ -33,6 +88,8 @@ class ClassicalExtractor(BaseExtractor):
         flat_output: bool = True,
         use_order: bool = False,
         rrf_k: int = 60,
+        n_workers: int = 1,
+        extractor_factory: Callable[[], LoadFile] | None = None,
         logger: Logger | None = None,
     ):
         """
@@ -48,6 +105,12 @@ class ClassicalExtractor(BaseExtractor):
             flat_output (bool): Whether to flatten output structure.
             use_order (bool): Whether to consider keyphrase order during ranking.
             rrf_k (int): Parameter for Reciprocal Rank Fusion (RRF) scoring.
+            n_workers (int): The number of worker processes that run pke on chunks in
+                             parallel. 1 runs pke in this process.
+            extractor_factory (Callable[[], LoadFile] | None): A picklable callable
+                that creates the pke extractor of each worker process and thread,
+                such as a pke class or a module-level function. Defaults to the class
+                of `extractor`.
             logger (Logger | None): Logger instance or None for no logging.
         """
         super().__init__(
@@ -59,9 +122,159 @@ class ClassicalExtractor(BaseExtractor):
         self.args_candidate_weighting = args_candidate_weighting
         self.stop_words = list(self.stop_words)
 
+        if n_workers < 1:
+            raise ValueError(
+                f"'n_workers' must be at least 1.\nReceived: {n_workers=}."
+            )
+        self.n_workers = n_workers
+        self.extractor_factory: Callable[[], LoadFile] = extractor_factory or type(
+            self.extractor
+        )
+        self._executor: ProcessPoolExecutor | None = None
+        self._executor_lock = threading.Lock()
+        self._local = threading.local()
+        self._local.extractor = self.extractor
+
         if self.logger:
             self.logger.debug(f"Model: {type(self.extractor).__name__}")
 
+    def __getstate__(self) -> dict[str, Any]:
+        # The extractors of the threads and the worker processes of this process
+        # are not copied; a copy starts its own workers on first use
+        state = self.__dict__.copy()
+        del state["_local"], state["_executor_lock"]
+        state["_executor"] = None
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._executor_lock = threading.Lock()
+        self._local = threading.local()
+        self._local.extractor = self.extractor
+
+    def _thread_extractor(self) -> LoadFile:
+        """
+        Returns the pke extractor of the calling thread, creating it on first use.
+
+        Returns:
+            LoadFile: The pke extractor.
+        """
+        extractor: LoadFile | None = getattr(self._local, "extractor", None)
+        if extractor is None:
+            extractor = self.extractor_factory()
+            self._local.extractor = extractor
+        return extractor
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """
+        Returns the worker pool, starting it on first use.
+
+        Returns:
+            ProcessPoolExecutor: The pool whose workers each hold a pke extractor.
+        """
+        with self._executor_lock:
+            if self._executor is None:
+                if self.logger:
+                    self.logger.info(f"Start {self.n_workers} worker processes")
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.n_workers,
+                    initializer=_init_worker,
+                    initargs=(
+                        self.extractor_factory,
+                        self.args_candidate_selection,
+                        self.args_candidate_weighting,
+                        set(self.stop_words),
+                    ),
+                )
+            return self._executor
+
+    def close(self) -> None:
+        """Shuts down the worker processes, if any."""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    def _extract(self, doc: str, top_n_phrases: int) -> list[Keyphrase]:
+        """
+        Extracts keyphrases from a single chunk with the pke extractor.
+
+        Args:
+            doc (str): The preprocessed chunk.
+            top_n_phrases (int): The maximum number of keyphrases to return.
+
+        Returns:
+            list[Keyphrase]: The top-n keyphrases of the chunk.
+        """
+        if self.logger:
+            self.logger.debug(f"Extract keyphrases from: {doc}")
+
+        extractor = self._thread_extractor()
+        extractor.load_document(
+            input=doc,
+            language="ja",
+            stoplist=self.stop_words,
+            normalization=None,
+        )
+        if self.logger:
+            self.logger.debug("Candidate filtering")
+        extractor.candidate_filtering(pos_blacklist=self.stop_words)
+        if self.logger:
+            self.logger.debug("Candidate Selection")
+        extractor.candidate_selection(**self.args_candidate_selection)
+        if self.logger:
+            self.logger.debug("Candidate weighting")
+        extractor.candidate_weighting(**self.args_candidate_weighting)
+
+        # get top-k keyphrases
+        results: list[tuple[str, float]] = extractor.get_n_best(top_n_phrases)
+
+        _phrases = [
+            to_original_expression(original_text=doc, phrase=t[0]) for t in results
+        ]
+        _scores = [t[1] for t in results]
+
+        keyphrases = [
+            Keyphrase(phrase=_phrase, score=_score)
+            for _phrase, _score in zip(_phrases, _scores, strict=True)
+        ]
+        if self.logger:
+            self.logger.debug(f"Result: {keyphrases}")
+        return keyphrases
+
+    def _extract_batch(
+        self, docs: list[list[str]], top_n_phrases: int
+    ) -> list[list[list[Keyphrase]]]:
+        """
+        Extracts keyphrases from the chunks of several documents, running the pke
+        extractor once per distinct chunk.
+
+        With `n_workers` > 1, the distinct chunks of all documents are distributed
+        over the worker processes.
+
+        Args:
+            docs (list[list[str]]): The preprocessed chunks of each document.
+            top_n_phrases (int): The maximum number of keyphrases per chunk.
+
+        Returns:
+            list[list[list[Keyphrase]]]: The keyphrases of each chunk of each document.
+        """
+        chunks, chunk_indices = self._unique_chunks(docs=docs)
+        if self.logger:
+            self.logger.info("Run keyphrase extraction.")
+        if self.n_workers > 1 and len(chunks) > 1:
+            keyphrases_list = list(
+                self._get_executor().map(
+                    _extract_in_worker, chunks, [top_n_phrases] * len(chunks)
+                )
+            )
+        else:
+            keyphrases_list = [
+                self._extract(doc=chunk, top_n_phrases=top_n_phrases)
+                for chunk in chunks
+            ]
+        return [[keyphrases_list[i] for i in indices] for indices in chunk_indices]
+
     def get_keyphrase(
         self, input_text: str | list[str] | Inputs, top_n_phrases: int = 10
     ) -> Outputs:
@@ -76,56 +289,7 @@ class ClassicalExtractor(BaseExtractor):
             Outputs: Extracted keyphrases with their corresponding scores.
         """
         verify_input: Inputs = self._verify_input(input_text=input_text)
-        docs: list[str] = verify_input.docs
-
-        outputs: Outputs = Outputs(keyphrases=[])
-        if self.logger:
-            self.logger.info("Run keyphrase extraction.")
-        for i in range(len(docs)):
-            doc: str = docs[i]
-            if self.logger:
-                self.logger.debug(f"Extract keyphrases from: {doc}")
-
-            self.extractor.load_document(
-                input=doc,
-                language="ja",
-                stoplist=self.stop_words,
-                normalization=None,
-            )
-            if self.logger:
-                self.logger.debug("Candidate filtering")
-            self.extractor.candidate_filtering(pos_blacklist=self.stop_words)
-            if self.logger:
-                self.logger.debug("Candidate Selection")
-            self.extractor.candidate_selection(**self.args_candidate_selection)
-            if self.logger:
-                self.logger.debug("Candidate weighting")
-            self.extractor.candidate_weighting(**self.args_candidate_weighting)
-
-            # get top-k keyphrases
-            results: list[tuple[str, float]] = self.extractor.get_n_best(top_n_phrases)
-
-            _phrases = [
-                to_original_expression(original_text=doc, phrase=t[0]) for t in results
-            ]
-            _scores = [t[1] for t in results]
-
-            outputs.keyphrases.append(
-                [
-                    Keyphrase(phrase=_phrase, score=_score)
-                    for _phrase, _score in zip(_phrases, _scores, strict=True)
-                ]
-            )
-            if self.logger:
-                self.logger.debug(f"Result: {outputs.keyphrases[-1]}")
-
-        if self.flat_output and len(outputs.keyphrases) > 1:
-            if self.logger:
-                self.logger.info("Flatten outputs")
-            outputs = self._flatten_outputs(
-                keyphrases_list=outputs.keyphrases,
-                use_order=self.use_order,
-                descending=True,
-                rrf_k=self.rrf_k,
-            )
-        return outputs
+        keyphrases_list = self._extract_batch(
+            docs=[verify_input.docs], top_n_phrases=top_n_phrases
+        )[0]
+        return self._make_outputs(keyphrases_list=keyphrases_list)
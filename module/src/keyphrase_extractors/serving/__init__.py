@@ -0,0 +1,3 @@
+from .batcher import MicroBatcher, QueueFullError
+from .data import BatchingConfig, ExtractionRequest, ServerConfig, ServerMetrics
+from .server import ExtractionServer
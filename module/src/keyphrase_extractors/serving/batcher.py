@@ -0,0 +1,278 @@
+import asyncio
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from logging import Logger
+
+import numpy as np
+
+from ..base_extractor import BaseExtractor
+from ..io_data import Inputs, Outputs
+from .data import (
+    PRIORITIES,
+    BatchingConfig,
+    ExtractionRequest,
+    LaneMetrics,
+    LatencyStats,
+    Priority,
+    ServerMetrics,
+)
+
+
+class QueueFullError(RuntimeError):
+    """Raised when a request is rejected because its lane's queue is full."""
+
+
+@dataclass
+class _Pending:
+    request: ExtractionRequest
+    future: asyncio.Future[Outputs]
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+    @property
+    def document(self) -> str | Inputs:
+        # a list is taken as already chunked, as in `get_keyphrase`
+        if isinstance(self.request.text, list):
+            return Inputs(docs=self.request.text)
+        return self.request.text
+
+
+def _latency_stats(latencies: deque[float] | list[float]) -> LatencyStats:
+    if not latencies:
+        return LatencyStats(count=0, p50_ms=0.0, p99_ms=0.0)
+    p50, p99 = np.percentile(np.asarray(latencies) * 1000.0, [50, 99])
+    return LatencyStats(count=len(latencies), p50_ms=float(p50), p99_ms=float(p99))
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent extraction requests into micro-batches.
+
+    Requests wait in a bounded queue per priority lane. A worker takes the first
+    waiting request, then keeps collecting requests, interactive ones first, until
+    `max_batch_size` requests are taken or `max_wait_ms` has passed, and runs them
+    through `get_keyphrase_batch` in a worker thread. While a batch runs, new
+    requests keep queueing, so batches grow with the load. A request is rejected
+    with `QueueFullError` when its lane is full, instead of waiting without bound.
+
+    Attributes:
+        extractor (BaseExtractor): The extractor the batches are run through.
+        config (BatchingConfig): The batching and admission settings.
+        logger (Logger | None): Optional logger instance for logging operations.
+    """
+
+    def __init__(
+        self,
+        extractor: BaseExtractor,
+        config: BatchingConfig | None = None,
+        logger: Logger | None = None,
+    ):
+        self.extractor = extractor
+        self.config = config or BatchingConfig()
+        self.logger = logger
+
+        self._queues: dict[Priority, asyncio.Queue[_Pending]] = {
+            "interactive": asyncio.Queue(maxsize=self.config.interactive_queue_size),
+            "bulk": asyncio.Queue(maxsize=self.config.bulk_queue_size),
+        }
+        self._arrived = asyncio.Event()
+        self._workers: list[asyncio.Task[None]] = []
+
+        self._accepted: Counter[Priority] = Counter()
+        self._rejected: Counter[Priority] = Counter()
+        self._latencies: dict[Priority, deque[float]] = {
+            _priority: deque(maxlen=self.config.latency_window)
+            for _priority in PRIORITIES
+        }
+        self._batch_sizes: Counter[int] = Counter()
+        self._in_flight = 0
+        self._failed = 0
+
+    async def start(self) -> None:
+        """
+        Starts the workers, `max_concurrent_batches` of them.
+        """
+        if self._workers:
+            return
+        self._workers = [
+            asyncio.create_task(self._work())
+            for _ in range(self.config.max_concurrent_batches)
+        ]
+
+    async def close(self) -> None:
+        """
+        Stops the workers and fails the requests still waiting in the queues or
+        in a running batch.
+        """
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        for queue in self._queues.values():
+            while not queue.empty():
+                self._abandon(batch=[queue.get_nowait()])
+
+    async def submit(self, request: ExtractionRequest) -> Outputs:
+        """
+        Queues a request and waits for its batch to be processed.
+
+        Args:
+            request (ExtractionRequest): The extraction request.
+
+        Returns:
+            Outputs: Extracted keyphrase outputs.
+
+        Raises:
+            QueueFullError: If the queue of the request's lane is full.
+        """
+        if not self._workers:
+            raise RuntimeError("The batcher is not started. Call `start` first.")
+        pending = _Pending(
+            request=request, future=asyncio.get_running_loop().create_future()
+        )
+        try:
+            self._queues[request.priority].put_nowait(pending)
+        except asyncio.QueueFull:
+            self._rejected[request.priority] += 1
+            raise QueueFullError(
+                f"The {request.priority} queue is full.\n"
+                f"Received: queue_size={self._queues[request.priority].maxsize}."
+            ) from None
+        self._accepted[request.priority] += 1
+        self._arrived.set()
+
+        outputs = await pending.future
+        self._latencies[request.priority].append(
+            time.perf_counter() - pending.enqueued_at
+        )
+        return outputs
+
+    def metrics(self) -> ServerMetrics:
+        """
+        Returns a snapshot of the queue depths, batch sizes and latencies.
+        """
+        lanes: dict[Priority, LaneMetrics] = {
+            _priority: LaneMetrics(
+                queue_depth=self._queues[_priority].qsize(),
+                queue_size=self._queues[_priority].maxsize,
+                accepted=self._accepted[_priority],
+                rejected=self._rejected[_priority],
+                latency=_latency_stats(self._latencies[_priority]),
+            )
+            for _priority in PRIORITIES
+        }
+        return ServerMetrics(
+            lanes=lanes,
+            in_flight=self._in_flight,
+            batches=sum(self._batch_sizes.values()),
+            failed_requests=self._failed,
+            batch_size_histogram=dict(sorted(self._batch_sizes.items())),
+            latency=_latency_stats(
+                [
+                    _latency
+                    for _priority in PRIORITIES
+                    for _latency in self._latencies[_priority]
+                ]
+            ),
+        )
+
+    def _take(self, batch: list[_Pending]) -> None:
+        for priority in PRIORITIES:
+            queue = self._queues[priority]
+            while len(batch) < self.config.max_batch_size and not queue.empty():
+                pending = queue.get_nowait()
+                # the client is gone, e.g. the connection was closed
+                if not pending.future.done():
+                    batch.append(pending)
+
+    async def _collect(self) -> list[_Pending]:
+        batch: list[_Pending] = []
+        while not batch:
+            while all(_queue.empty() for _queue in self._queues.values()):
+                self._arrived.clear()
+                await self._arrived.wait()
+            self._take(batch=batch)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.config.max_wait_ms / 1000.0
+        while len(batch) < self.config.max_batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            self._arrived.clear()
+            try:
+                await asyncio.wait_for(self._arrived.wait(), timeout=remaining)
+            except TimeoutError:
+                pass
+            except asyncio.CancelledError:
+                # the requests taken so far are in neither a queue nor a batch
+                self._abandon(batch=batch)
+                raise
+            self._take(batch=batch)
+        return batch
+
+    async def _work(self) -> None:
+        while True:
+            batch = await self._collect()
+            self._batch_sizes[len(batch)] += 1
+            self._in_flight += len(batch)
+            try:
+                await self._run(batch=batch)
+            except asyncio.CancelledError:
+                # `close` does not wait for the running batch to finish
+                self._abandon(batch=batch)
+                raise
+            finally:
+                self._in_flight -= len(batch)
+
+    async def _run(self, batch: list[_Pending]) -> None:
+        if self.logger:
+            self.logger.info(f"Run a batch of {len(batch)} requests.")
+        groups: dict[int, list[_Pending]] = {}
+        for pending in batch:
+            groups.setdefault(pending.request.top_n_phrases, []).append(pending)
+
+        for top_n_phrases, pendings in groups.items():
+            try:
+                outputs_list = await asyncio.to_thread(
+                    self.extractor.get_keyphrase_batch,
+                    docs=[_pending.document for _pending in pendings],  # type: ignore
+                    top_n_phrases=top_n_phrases,
+                )
+            except Exception as e:
+                if len(pendings) == 1:
+                    self._fail(pending=pendings[0], error=e)
+                    continue
+                if self.logger:
+                    self.logger.warning(
+                        f"A batch failed, retrying its requests one by one: {e!r}"
+                    )
+                # isolate the request that failed the batch
+                for pending in pendings:
+                    try:
+                        (outputs,) = await asyncio.to_thread(
+                            self.extractor.get_keyphrase_batch,
+                            docs=[pending.document],  # type: ignore
+                            top_n_phrases=top_n_phrases,
+                        )
+                    except Exception as e:
+                        self._fail(pending=pending, error=e)
+                    else:
+                        self._resolve(pending=pending, outputs=outputs)
+            else:
+                for pending, outputs in zip(pendings, outputs_list, strict=True):
+                    self._resolve(pending=pending, outputs=outputs)
+
+    def _resolve(self, pending: _Pending, outputs: Outputs) -> None:
+        if not pending.future.done():
+            pending.future.set_result(outputs)
+
+    def _abandon(self, batch: list[_Pending]) -> None:
+        for pending in batch:
+            if not pending.future.done():
+                pending.future.set_exception(RuntimeError("The batcher was closed."))
+
+    def _fail(self, pending: _Pending, error: Exception) -> None:
+        self._failed += 1
+        if not pending.future.done():
+            pending.future.set_exception(error)
@@ -0,0 +1,52 @@
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+Priority = Literal["interactive", "bulk"]
+PRIORITIES: tuple[Priority, ...] = ("interactive", "bulk")
+
+
+class BatchingConfig(BaseModel):
+    max_batch_size: int = Field(default=16, ge=1)
+    max_wait_ms: float = Field(default=10.0, ge=0.0)
+    max_concurrent_batches: int = Field(default=1, ge=1)
+    interactive_queue_size: int = Field(default=256, ge=1)
+    bulk_queue_size: int = Field(default=1024, ge=1)
+    latency_window: int = Field(default=10_000, ge=1)
+
+
+class ServerConfig(BaseModel):
+    host: str = "127.0.0.1"
+    port: int = Field(default=8000, ge=0, le=65535)
+    max_body_bytes: int = Field(default=1_000_000, ge=1)
+    batching: BatchingConfig = BatchingConfig()
+
+
+class ExtractionRequest(BaseModel):
+    text: str | list[str]
+    top_n_phrases: int = Field(default=10, ge=1)
+    priority: Priority = "interactive"
+
+
+class LatencyStats(BaseModel):
+    count: int
+    p50_ms: float
+    p99_ms: float
+
+
+class LaneMetrics(BaseModel):
+    queue_depth: int
+    queue_size: int
+    accepted: int
+    rejected: int
+    latency: LatencyStats
+
+
+class ServerMetrics(BaseModel):
+    lanes: dict[Priority, LaneMetrics]
+    in_flight: int
+    batches: int
+    failed_requests: int
+    batch_size_histogram: dict[int, int]
+    latency: LatencyStats
@@ -0,0 +1,311 @@
+import argparse
+import asyncio
+import json
+import sys
+from http import HTTPStatus
+from logging import Logger, getLogger
+from pathlib import Path
+from typing import Any
+
+from pydantic import ValidationError
+
+from ..base_extractor import BaseExtractor
+from .batcher import MicroBatcher, QueueFullError
+from .data import BatchingConfig, ExtractionRequest, ServerConfig
+
+
+class _HTTPError(Exception):
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class ExtractionServer:
+    """
+    A minimal local HTTP/1.1 server for keyphrase extraction, built on asyncio
+    streams so that it needs no web framework.
+
+    Endpoints:
+        POST /extract: Takes an `ExtractionRequest` as JSON and returns `Outputs`.
+            Responds 429 with `Retry-After` when the request's lane is full.
+        GET /metrics: Returns `ServerMetrics`.
+        GET /health: Returns {"status": "ok"}.
+
+    Attributes:
+        config (ServerConfig): The server settings.
+        batcher (MicroBatcher): The batcher the requests are queued to.
+        logger (Logger | None): Optional logger instance for logging operations.
+    """
+
+    def __init__(
+        self,
+        extractor: BaseExtractor,
+        config: ServerConfig | None = None,
+        logger: Logger | None = None,
+    ):
+        self.config = config or ServerConfig()
+        self.logger = logger
+        self.batcher = MicroBatcher(
+            extractor=extractor, config=self.config.batching, logger=logger
+        )
+        self._server: asyncio.Server | None = None
+
+    @property
+    def port(self) -> int:
+        """The bound port, which differs from `config.port` when it is 0."""
+        if self._server is None:
+            return self.config.port
+        return self._server.sockets[0].getsockname()[1]
+
+    async def start(self) -> None:
+        """
+        Starts the batcher and binds the server.
+        """
+        await self.batcher.start()
+        self._server = await asyncio.start_server(
+            self._handle, host=self.config.host, port=self.config.port
+        )
+        if self.logger:
+            self.logger.info(f"Serving on http://{self.config.host}:{self.port}")
+
+    async def close(self) -> None:
+        """
+        Stops accepting connections and stops the batcher.
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        await self.batcher.close()
+
+    async def serve_forever(self) -> None:
+        """
+        Starts the server and serves until cancelled.
+        """
+        await self.start()
+        assert self._server is not None
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.IncompleteReadError:
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._respond(
+                        writer=writer,
+                        status=HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE,
+                        body={"detail": "The request header is too large."},
+                        keep_alive=False,
+                    )
+                    break
+
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                headers: dict[str, str] = {}
+                for line in header_lines:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+                keep_alive = headers.get("connection", "").lower() != "close"
+
+                try:
+                    method, path, _ = request_line.split(" ", 2)
+                    body = await self._read_body(reader=reader, headers=headers)
+                    status, payload = await self._route(
+                        method=method, path=path, body=body
+                    )
+                except _HTTPError as e:
+                    status, payload = e.status, {"detail": str(e)}
+                    # the unread body would be taken as the next request
+                    keep_alive = (
+                        keep_alive and e.status != HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+                    )
+                except ValueError:
+                    status = HTTPStatus.BAD_REQUEST
+                    payload = {"detail": "Malformed request."}
+                    keep_alive = False
+                await self._respond(
+                    writer=writer, status=status, body=payload, keep_alive=keep_alive
+                )
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_body(
+        self, reader: asyncio.StreamReader, headers: dict[str, str]
+    ) -> bytes:
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise _HTTPError(
+                HTTPStatus.LENGTH_REQUIRED, "Chunked request bodies are not supported."
+            )
+        content_length = int(headers.get("content-length", "0"))
+        if content_length > self.config.max_body_bytes:
+            raise _HTTPError(
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                "The request body is too large.\n"
+                f"Received: {content_length=}, max_body_bytes={self.config.max_body_bytes}.",
+            )
+        return await reader.readexactly(content_length)
+
+    async def _route(
+        self, method: str, path: str, body: bytes
+    ) -> tuple[HTTPStatus, Any]:
+        path = path.split("?", 1)[0]
+        if path == "/health":
+            self._allow(method=method, allowed="GET")
+            return HTTPStatus.OK, {"status": "ok"}
+        if path == "/metrics":
+            self._allow(method=method, allowed="GET")
+            return HTTPStatus.OK, self.batcher.metrics().model_dump(mode="json")
+        if path == "/extract":
+            self._allow(method=method, allowed="POST")
+            try:
+                request = ExtractionRequest.model_validate_json(body)
+            except ValidationError as e:
+                raise _HTTPError(HTTPStatus.BAD_REQUEST, str(e)) from None
+            try:
+                outputs = await self.batcher.submit(request=request)
+            except QueueFullError as e:
+                raise _HTTPError(HTTPStatus.TOO_MANY_REQUESTS, str(e)) from None
+            except Exception as e:
+                if self.logger:
+                    self.logger.exception("Extraction failed")
+                raise _HTTPError(HTTPStatus.INTERNAL_SERVER_ERROR, repr(e)) from None
+            return HTTPStatus.OK, outputs.model_dump(mode="json")
+        raise _HTTPError(HTTPStatus.NOT_FOUND, f"Not found.\nReceived: {path=}.")
+
+    def _allow(self, method: str, allowed: str) -> None:
+        if method != allowed:
+            raise _HTTPError(
+                HTTPStatus.METHOD_NOT_ALLOWED,
+                f"Use {allowed}.\nReceived: {method=}.",
+            )
+
+    async def _respond(
+        self,
+        writer: asyncio.StreamWriter,
+        status: HTTPStatus,
+        body: Any,
+        keep_alive: bool,
+    ) -> None:
+        content = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        headers = [
+            f"HTTP/1.1 {status.value} {status.phrase}",
+            "Content-Type: application/json; charset=utf-8",
+            f"Content-Length: {len(content)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        if status == HTTPStatus.TOO_MANY_REQUESTS:
+            headers.append("Retry-After: 1")
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode("latin-1") + content)
+        await writer.drain()
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Serves a `SentenceEmbeddingBasedExtractor` over HTTP on the local machine.
+
+    Usage:
+        python -m keyphrase_extractors.serving.server cl-nagoya/ruri-base \\
+            --port 8000 --max-batch-size 16 --max-wait-ms 10
+        curl -X POST http://127.0.0.1:8000/extract \\
+            -d '{"text": "...", "top_n_phrases": 10, "priority": "interactive"}'
+        curl http://127.0.0.1:8000/metrics
+
+    Returns:
+        int: The exit status.
+    """
+    # the extractor and its dependencies are only needed to run the server
+    from ..embedding_based import (
+        EmbeddingModel,
+        SentenceEmbeddingBasedExtractionConfig,
+        SentenceEmbeddingBasedExtractor,
+    )
+
+    parser = argparse.ArgumentParser(prog="keyphrase_extractors.serving.server")
+    parser.add_argument("model_name", help="The embedding model.")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument(
+        "--backend", choices=["torch", "onnx", "openvino"], default="torch"
+    )
+    parser.add_argument("--trust-remote-code", action="store_true")
+    parser.add_argument(
+        "--extraction-config",
+        type=Path,
+        default=None,
+        help="A JSON file of SentenceEmbeddingBasedExtractionConfig.",
+    )
+    parser.add_argument("--max-characters", type=int, default=None)
+    parser.add_argument("--host", default=ServerConfig().host)
+    parser.add_argument("--port", type=int, default=ServerConfig().port)
+    parser.add_argument(
+        "--max-batch-size", type=int, default=BatchingConfig().max_batch_size
+    )
+    parser.add_argument(
+        "--max-wait-ms", type=float, default=BatchingConfig().max_wait_ms
+    )
+    parser.add_argument(
+        "--max-concurrent-batches",
+        type=int,
+        default=BatchingConfig().max_concurrent_batches,
+    )
+    parser.add_argument(
+        "--interactive-queue-size",
+        type=int,
+        default=BatchingConfig().interactive_queue_size,
+    )
+    parser.add_argument(
+        "--bulk-queue-size", type=int, default=BatchingConfig().bulk_queue_size
+    )
+    args = parser.parse_args(argv)
+
+    logger = getLogger("keyphrase_extractors.serving")
+    model_config = EmbeddingModel(
+        name=args.model_name,
+        device=args.device,
+        trust_remote_code=args.trust_remote_code,
+        backend=args.backend,
+    )
+    extraction_config = (
+        SentenceEmbeddingBasedExtractionConfig.model_validate_json(
+            args.extraction_config.read_text(encoding="utf-8")
+        )
+        if args.extraction_config
+        else None
+    )
+    extractor = SentenceEmbeddingBasedExtractor(
+        model_config=model_config,
+        extraction_config=extraction_config,
+        max_characters=args.max_characters,
+    )
+    config = ServerConfig(
+        host=args.host,
+        port=args.port,
+        batching=BatchingConfig(
+            max_batch_size=args.max_batch_size,
+            max_wait_ms=args.max_wait_ms,
+            max_concurrent_batches=args.max_concurrent_batches,
+            interactive_queue_size=args.interactive_queue_size,
+            bulk_queue_size=args.bulk_queue_size,
+        ),
+    )
+    server = ExtractionServer(extractor=extractor, config=config, logger=logger)
+    print(f"Serving on http://{config.host}:{config.port}")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
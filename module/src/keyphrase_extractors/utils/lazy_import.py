@@ -0,0 +1,44 @@
+from collections.abc import Callable
+from importlib import import_module
+from typing import Any
+
+
+def lazy_attributes(
+    module_globals: dict[str, Any], attributes: dict[str, str]
+) -> tuple[Callable[[str], Any], Callable[[], list[str]]]:
+    """
+    Builds the module-level `__getattr__` and `__dir__` of a package whose public
+    names are imported on first access, so that importing the package does not
+    import the heavy dependencies of its submodules.
+
+    Usage in a package `__init__.py`:
+
+        __getattr__, __dir__ = lazy_attributes(
+            module_globals=globals(),
+            attributes={"ClassicalExtractor": ".graph_based_or_statistical"},
+        )
+
+    Args:
+        module_globals (dict[str, Any]): The `globals()` of the package, where
+                                         imported names are cached.
+        attributes (dict[str, str]): The module each public name is imported from,
+                                     relative to the package.
+
+    Returns:
+        tuple[Callable[[str], Any], Callable[[], list[str]]]: The `__getattr__` and
+            `__dir__` of the package.
+    """
+    package = module_globals["__name__"]
+
+    def __getattr__(name: str) -> Any:
+        module_name = attributes.get(name)
+        if module_name is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(import_module(module_name, package), name)
+        module_globals[name] = value
+        return value
+
+    def __dir__() -> list[str]:
+        return sorted({*module_globals, *attributes})
+
+    return __getattr__, __dir__
@@ -1,4 +1,28 @@
 import re
+from functools import lru_cache
+
+
+PHRASE_PATTERN_CACHE_SIZE = 8192
+
+
+@lru_cache(maxsize=PHRASE_PATTERN_CACHE_SIZE)
+def _compile_phrase_pattern(phrase: str) -> re.Pattern[str]:
+    """
+    Compiles the pattern of a phrase whose words may be separated by any whitespace.
+
+    Patterns are kept in an LRU cache, since the same candidates are looked up in
+    many texts.
+
+    Args:
+        phrase (str): The phrase with its words separated by spaces.
+
+    Returns:
+        re.Pattern[str]: The case-insensitive pattern of the phrase.
+    """
+    return re.compile(
+        r"\s*" + r"\s*".join([re.escape(word) for word in phrase.split()]) + r"\s*",
+        re.IGNORECASE,
+    )
 
 
 def to_original_expression(original_text: str, phrase: str) -> str:
@@ -17,11 +41,7 @@ def to_original_expression(original_text: str, phrase: str) -> str:
         str: The matched text from the original text, or the input phrase if no match
              is found.
     """
-    pattern = re.compile(
-        r"\s*" + r"\s*".join([re.escape(word) for word in phrase.split()]) + r"\s*",
-        re.IGNORECASE,
-    )
-    match = pattern.search(original_text)
+    match = _compile_phrase_pattern(phrase).search(original_text)
     if match:
         return match.group(0).strip()
     else:
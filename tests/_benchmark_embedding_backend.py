@@ -0,0 +1,82 @@
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+from keyphrase_extractors import EmbeddingModel, EmbeddingPrompts
+from keyphrase_extractors.embedding_based import (
+    SentenceEmbeddingBasedExtractionConfig,
+    SentenceEmbeddingBasedExtractor,
+)
+from keyphrase_extractors.embedding_based.backend import export_model
+
+
+# 推論バックエンドごとに、評価用データセットの length_* の分割でレイテンシとスループットを計測
+model_name = "cl-nagoya/ruri-base"
+exported_dirpath = Path("../output/models/ruri-base")
+if not (exported_dirpath / "onnx" / "model_qint8_avx2.onnx").exists():
+    export_model(
+        model_name=model_name,
+        output_dirpath=exported_dirpath,
+        quantization="avx2",
+        trust_remote_code=True,
+    )
+
+dataset_json_path = Path("../dataset/evaluation/dataset.json")
+with dataset_json_path.open(encoding="utf-8") as f:
+    dataset = json.load(f)
+
+prompts = EmbeddingPrompts(query="クエリ: ", passage="文章: ")
+model_configs = {
+    "torch": EmbeddingModel(
+        name=model_name, device="cpu", prompts=prompts, trust_remote_code=True
+    ),
+    "onnx": EmbeddingModel(
+        name=str(exported_dirpath),
+        device="cpu",
+        prompts=prompts,
+        trust_remote_code=True,
+        backend="onnx",
+    ),
+    "onnx (qint8 avx2)": EmbeddingModel(
+        name=str(exported_dirpath),
+        device="cpu",
+        prompts=prompts,
+        trust_remote_code=True,
+        backend="onnx",
+        quantization="avx2",
+    ),
+}
+extraction_config = SentenceEmbeddingBasedExtractionConfig(
+    diversity_mode="normal",
+    max_filtered_phrases=30,
+    filter_sentences=False,
+    minimum_characters=10,
+)
+
+for backend_name, model_config in model_configs.items():
+    extractor = SentenceEmbeddingBasedExtractor(
+        model_config=model_config,
+        extraction_config=extraction_config,
+        max_characters=10000,
+        stop_words=None,
+        flat_output=True,
+        use_order=False,
+    )
+    # ウォームアップ
+    extractor.get_keyphrase(input_text="これはテスト用のテキストです。")
+
+    for split_name, samples in dataset.items():
+        latencies: list[float] = []
+        for sample in samples:
+            start = time.perf_counter()
+            extractor.get_keyphrase(input_text=sample["text"], top_n_phrases=30)
+            latencies.append(time.perf_counter() - start)
+        n_characters = sum(len(sample["text"]) for sample in samples)
+        print(
+            f"{backend_name:18s} {split_name:13s}: "
+            f"p50 {np.percentile(latencies, 50):.3f} sec, "
+            f"p95 {np.percentile(latencies, 95):.3f} sec, "
+            f"{len(samples) / sum(latencies):.2f} docs/sec, "
+            f"{n_characters / sum(latencies):.0f} chars/sec"
+        )
@@ -0,0 +1,93 @@
+import json
+import re
+import time
+from pathlib import Path
+
+import spacy
+from keyphrase_extractors.base_extractor import BaseExtractor
+from keyphrase_extractors.embedding_based.analysis import DocumentAnalysis
+from keyphrase_extractors.embedding_based.grammar import NounPhraseMatcher
+from keyphrase_extractors.utils import to_original_expression
+
+
+# 1分割あたりのサンプル数（None で全サンプル）
+MAX_SAMPLES_PER_SPLIT: int | None = None
+
+
+def regex_per_phrase(original_text: str, phrase: str) -> str:
+    # 従来の実装：フレーズごとに正規表現をコンパイルして全文を検索
+    pattern = re.compile(
+        r"\s*" + r"\s*".join([re.escape(word) for word in phrase.split()]) + r"\s*",
+        re.IGNORECASE,
+    )
+    match = pattern.search(original_text)
+    return match.group(0).strip() if match else phrase
+
+
+dataset_json_path = Path("../dataset/evaluation/dataset.json")
+with dataset_json_path.open(encoding="utf-8") as f:
+    dataset = json.load(f)
+
+# 評価と同じく 10000 文字単位のチャンクに分割
+chunker = BaseExtractor(max_characters=10000)
+nlp = spacy.load("ja_ginza", disable=["bunsetu_recognizer", "ner", "parser"])
+matcher = NounPhraseMatcher()
+
+for dataset_name, samples in dataset.items():
+    texts = [
+        _chunk
+        for _sample in samples[:MAX_SAMPLES_PER_SPLIT]
+        for _chunk in chunker._verify_input(input_text=_sample["text"]).docs
+    ]
+    analyses = [
+        DocumentAnalysis(text=_text, doc=_doc, minimum_characters=30)
+        for _text, _doc in zip(texts, nlp.pipe(texts, batch_size=4), strict=True)
+    ]
+
+    # 文ごとの候補フレーズ（トークン範囲）
+    candidates: list[tuple[DocumentAnalysis, str, str, int, int]] = []
+    for _analysis in analyses:
+        for _sentence in _analysis.sentences:
+            words, words_pos = _analysis.sentence_words(_sentence)
+            spans = matcher.find_spans(
+                words_pos=words_pos, pos_ids=_analysis.sentence_pos_ids(_sentence)
+            )
+            for _start, _end in spans:
+                candidates.append(
+                    (
+                        _analysis,
+                        _sentence.text,
+                        " ".join(words[_start:_end]).strip(),
+                        _sentence.token_start + _start,
+                        _sentence.token_start + _end,
+                    )
+                )
+    print(f"{dataset_name}: {len(texts)} chunks, {len(candidates)} candidates")
+
+    # 文中の検索
+    start = time.perf_counter()
+    expected = [regex_per_phrase(_c[1], _c[2]) for _c in candidates]
+    print(f"  sentence, regex per phrase  : {time.perf_counter() - start:8.4f} sec")
+
+    start = time.perf_counter()
+    cached = [to_original_expression(_c[1], _c[2]) for _c in candidates]
+    print(f"  sentence, cached patterns   : {time.perf_counter() - start:8.4f} sec")
+
+    start = time.perf_counter()
+    sliced = [_c[0].span_text(_c[3], _c[4]) for _c in candidates]
+    print(f"  sentence, token offsets     : {time.perf_counter() - start:8.4f} sec")
+
+    # pke の結果と同様に文書全体を検索
+    start = time.perf_counter()
+    for _c in candidates:
+        regex_per_phrase(_c[0].text, _c[2])
+    print(f"  document, regex per phrase  : {time.perf_counter() - start:8.4f} sec")
+
+    start = time.perf_counter()
+    for _c in candidates:
+        to_original_expression(_c[0].text, _c[2])
+    print(f"  document, cached patterns   : {time.perf_counter() - start:8.4f} sec")
+
+    assert cached == expected
+    n_same = sum(_s == _e for _s, _e in zip(sliced, expected, strict=True))
+    print(f"  token offsets equal to regex: {n_same}/{len(candidates)}")
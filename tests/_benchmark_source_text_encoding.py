@@ -0,0 +1,73 @@
+import json
+import time
+from pathlib import Path
+
+from keyphrase_extractors import EmbeddingModel, EmbeddingPrompts
+from keyphrase_extractors.embedding_based import (
+    SentenceEmbeddingBasedExtractionConfig,
+    SentenceEmbeddingBasedExtractor,
+)
+
+
+# add_source_text の 2 つのベクトル化方法を、評価用データセットの length_* の分割で比較
+# - template: 候補ごとに「次の本文における「X」の意味」と本文をベクトル化
+# - span_pooling: 本文を 1 度だけベクトル化し、候補のトークン埋め込みを平均
+dataset_json_path = Path("../dataset/evaluation/dataset.json")
+with dataset_json_path.open(encoding="utf-8") as f:
+    dataset = json.load(f)
+
+model_config = EmbeddingModel(
+    name="cl-nagoya/ruri-base",
+    device="cpu",
+    prompts=EmbeddingPrompts(query="クエリ: ", passage="文章: "),
+    trust_remote_code=True,
+    batchsize=32,
+)
+top_n = 10
+
+keyphrases: dict[str, dict[str, list[list[str]]]] = {}
+for source_text_encoding in ["template", "span_pooling"]:
+    extractor = SentenceEmbeddingBasedExtractor(
+        model_config=model_config,
+        extraction_config=SentenceEmbeddingBasedExtractionConfig(
+            diversity_mode="normal",
+            max_filtered_phrases=30,
+            max_filtered_sentences=10,
+            filter_sentences=True,
+            add_source_text=True,
+            source_text_encoding=source_text_encoding,
+            minimum_characters=10,
+        ),
+        max_characters=10000,
+        stop_words=None,
+        flat_output=True,
+        use_order=False,
+    )
+    keyphrases[source_text_encoding] = {}
+    for split_name, samples in dataset.items():
+        start = time.perf_counter()
+        keyphrases[source_text_encoding][split_name] = [
+            [
+                _keyphrase.phrase
+                for _keyphrase in extractor.get_keyphrase(
+                    input_text=sample["text"], top_n_phrases=top_n
+                ).keyphrases[0]
+            ]
+            for sample in samples
+        ]
+        elapsed = time.perf_counter() - start
+        print(
+            f"{source_text_encoding:12s} {split_name:13s}: {elapsed:.2f} sec, "
+            f"{elapsed / len(samples):.3f} sec/doc"
+        )
+
+for split_name in dataset:
+    overlaps = [
+        len(set(_template) & set(_span)) / max(1, len(_template))
+        for _template, _span in zip(
+            keyphrases["template"][split_name],
+            keyphrases["span_pooling"][split_name],
+            strict=True,
+        )
+    ]
+    print(f"{split_name:13s}: overlap@{top_n} {sum(overlaps) / len(overlaps):.3f}")
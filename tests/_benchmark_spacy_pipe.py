@@ -0,0 +1,57 @@
+import json
+import re
+import time
+from pathlib import Path
+
+import spacy
+from keyphrase_extractors.utils import TextPreprocessor
+
+
+# 評価用データセットを文単位に分割
+dataset_json_path = Path("../dataset/evaluation/dataset.json")
+with dataset_json_path.open(encoding="utf-8") as f:
+    dataset = json.load(f)
+
+preprocessor = TextPreprocessor()
+sentences: list[str] = []
+for _dataset_name, _samples in dataset.items():
+    for _sample in _samples:
+        text = preprocessor.run(text=_sample["text"])
+        sentences += [
+            _sentence.strip()
+            for _sentence in re.split(r"(?<=\n)|(?<=[。！？．])|(?<=[\.\!\?]\s)", text)
+            if _sentence.strip()
+        ]
+n_characters = sum(len(_sentence) for _sentence in sentences)
+print(f"{len(sentences)} sentences, {n_characters} characters")
+
+
+def report(name: str, elapsed: float) -> None:
+    print(
+        f"{name:<40}: {elapsed:8.2f} sec, "
+        f"{len(sentences) / elapsed:8.1f} sentences/sec, "
+        f"{n_characters / elapsed:10.1f} characters/sec"
+    )
+
+
+# 1文ずつ解析（全コンポーネント有効）
+nlp = spacy.load("ja_ginza")
+start = time.perf_counter()
+for _sentence in sentences:
+    nlp(_sentence)
+report("per-sentence, all components", time.perf_counter() - start)
+
+# Language.pipe による一括解析
+disabled_components = ["bunsetu_recognizer", "ner", "parser"]
+nlp = spacy.load("ja_ginza", disable=disabled_components)
+for batch_size in [64, 256, 1024]:
+    start = time.perf_counter()
+    for _doc in nlp.pipe(sentences, batch_size=batch_size):
+        pass
+    report(f"pipe, batch_size={batch_size}", time.perf_counter() - start)
+
+for n_process in [2, 4]:
+    start = time.perf_counter()
+    for _doc in nlp.pipe(sentences, batch_size=256, n_process=n_process):
+        pass
+    report(f"pipe, batch_size=256, n_process={n_process}", time.perf_counter() - start)
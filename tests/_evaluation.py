@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -10,7 +11,7 @@ from keyphrase_extractors import (
 )
 from keyphrase_extractors.embedding_based import SentenceEmbeddingBasedExtractionConfig
 from keyphrase_extractors.evaluate import EvaluationPipeline
-from keyphrase_extractors.generation_based import ResponseSchema
+from keyphrase_extractors.generation_based import ResponseCacheConfig, ResponseSchema
 from langrila import Agent
 from langrila.openai import OpenAIClient
 from pke.unsupervised import (
@@ -33,6 +34,9 @@ evaluation = EvaluationPipeline(
     output_dirpath=output_dirpath,
 )
 
+# pke の抽出器は CPU バウンドのため、サンプルをプロセスに分散して評価
+n_processes = os.cpu_count() or 1
+
 # Graph-based extractor
 extractor = ClassicalExtractor(
     extractor=TextRank(),
@@ -48,7 +52,12 @@ extractor = ClassicalExtractor(
     flat_output=True,
     use_order=False,
 )
-evaluation.run(extractor=extractor, output_dirname="TextRank")
+evaluation.run(
+    extractor=extractor,
+    output_dirname="TextRank",
+    backend="process",
+    max_concurrency=n_processes,
+)
 
 extractor = ClassicalExtractor(
     extractor=SingleRank(),
@@ -63,7 +72,12 @@ extractor = ClassicalExtractor(
     flat_output=True,
     use_order=False,
 )
-evaluation.run(extractor=extractor, output_dirname="SingleRank")
+evaluation.run(
+    extractor=extractor,
+    output_dirname="SingleRank",
+    backend="process",
+    max_concurrency=n_processes,
+)
 
 extractor = ClassicalExtractor(
     extractor=TopicRank(),
@@ -78,7 +92,12 @@ extractor = ClassicalExtractor(
     flat_output=True,
     use_order=False,
 )
-evaluation.run(extractor=extractor, output_dirname="TopicRank")
+evaluation.run(
+    extractor=extractor,
+    output_dirname="TopicRank",
+    backend="process",
+    max_concurrency=n_processes,
+)
 
 extractor = ClassicalExtractor(
     extractor=MultipartiteRank(),
@@ -89,7 +108,12 @@ extractor = ClassicalExtractor(
     flat_output=True,
     use_order=False,
 )
-evaluation.run(extractor=extractor, output_dirname="MultipartiteRank")
+evaluation.run(
+    extractor=extractor,
+    output_dirname="MultipartiteRank",
+    backend="process",
+    max_concurrency=n_processes,
+)
 
 # Statistical extractor
 extractor = ClassicalExtractor(
@@ -101,7 +125,12 @@ extractor = ClassicalExtractor(
     flat_output=True,
     use_order=False,
 )
-evaluation.run(extractor=extractor, output_dirname="TfIdf")
+evaluation.run(
+    extractor=extractor,
+    output_dirname="TfIdf",
+    backend="process",
+    max_concurrency=n_processes,
+)
 
 extractor = ClassicalExtractor(
     extractor=KPMiner(),
@@ -112,7 +141,12 @@ extractor = ClassicalExtractor(
     flat_output=True,
     use_order=False,
 )
-evaluation.run(extractor=extractor, output_dirname="KPMiner")
+evaluation.run(
+    extractor=extractor,
+    output_dirname="KPMiner",
+    backend="process",
+    max_concurrency=n_processes,
+)
 
 extractor = ClassicalExtractor(
     extractor=YAKE(),
@@ -123,7 +157,12 @@ extractor = ClassicalExtractor(
     flat_output=True,
     use_order=False,
 )
-evaluation.run(extractor=extractor, output_dirname="YAKE")
+evaluation.run(
+    extractor=extractor,
+    output_dirname="YAKE",
+    backend="process",
+    max_concurrency=n_processes,
+)
 
 # Embedding model-based
 embedding_model_config = EmbeddingModel(
@@ -608,6 +647,17 @@ agent = Agent(
 )
 
 extractor = GenerationBasedExtractor(
-    agent=agent, max_characters=None, flat_output=True, use_order=False
+    agent=agent,
+    max_characters=None,
+    flat_output=True,
+    use_order=False,
+    response_cache=ResponseCacheConfig(
+        cache_filepath=Path("../output/cache/llm_responses.db")
+    ),
+)
+evaluation.run(
+    extractor=extractor,
+    output_dirname="GPT4o-2024-11-20",
+    backend="asyncio",
+    max_concurrency=8,
 )
-evaluation.run(extractor=extractor, output_dirname="GPT4o-2024-11-20")
@@ -0,0 +1,84 @@
+import json
+import time
+from pathlib import Path
+
+from keyphrase_extractors import EmbeddingModel, EmbeddingPrompts
+from keyphrase_extractors.embedding_based import (
+    SentenceEmbeddingBasedExtractionConfig,
+    SentenceEmbeddingBasedExtractor,
+)
+from keyphrase_extractors.embedding_based.data import EmbeddingPrecision
+from keyphrase_extractors.embedding_based.quantization import quantize
+from keyphrase_extractors.embedding_based.scoring import l2_normalize
+
+
+# 埋め込みの保存精度ごとに、float32 とのキーフレーズの一致率と 1 ベクトルあたりのバイト数を比較
+dataset_json_path = Path("../dataset/evaluation/dataset.json")
+with dataset_json_path.open(encoding="utf-8") as f:
+    dataset = json.load(f)
+texts: list[str] = [
+    _sample["text"] for _samples in dataset.values() for _sample in _samples
+]
+k_list = [5, 10, 25]
+
+extraction_config = SentenceEmbeddingBasedExtractionConfig(
+    diversity_mode="normal",
+    max_filtered_phrases=30,
+    filter_sentences=False,
+    minimum_characters=10,
+)
+
+
+def extract(precision: EmbeddingPrecision) -> tuple[list[list[str]], float, int]:
+    extractor = SentenceEmbeddingBasedExtractor(
+        model_config=EmbeddingModel(
+            name="cl-nagoya/ruri-base",
+            device="cpu",
+            prompts=EmbeddingPrompts(query="クエリ: ", passage="文章: "),
+            trust_remote_code=True,
+            batchsize=32,
+            precision=precision,
+        ),
+        extraction_config=extraction_config,
+        max_characters=10000,
+        stop_words=None,
+        flat_output=True,
+        use_order=False,
+    )
+    start = time.perf_counter()
+    # flat_output=True なので、文書ごとにキーフレーズのリストが 1 つ返る
+    keyphrases = [
+        [
+            _keyphrase.phrase
+            for _keyphrase in extractor.get_keyphrase(
+                input_text=_text, top_n_phrases=max(k_list)
+            ).keyphrases[0]
+        ]
+        for _text in texts
+    ]
+    elapsed = time.perf_counter() - start
+    vector = l2_normalize(
+        embeddings=extractor.kw_model.model.encode(["サンプル"], convert_to_numpy=True)
+    )
+    n_bytes = quantize(embeddings=vector, precision=precision).nbytes
+    return keyphrases, elapsed, n_bytes
+
+
+reference, elapsed, n_bytes = extract(precision="float32")
+print(f"float32 : {n_bytes} bytes/vector, {elapsed:.2f} sec")
+precisions: list[EmbeddingPrecision] = ["float16", "int8", "binary"]
+for precision in precisions:
+    keyphrases, elapsed, n_bytes = extract(precision=precision)
+    overlaps = {
+        k: sum(
+            len(set(_reference[:k]) & set(_keyphrases[:k]))
+            / max(1, min(k, len(_reference)))
+            for _reference, _keyphrases in zip(reference, keyphrases, strict=True)
+        )
+        / len(texts)
+        for k in k_list
+    }
+    print(
+        f"{precision:8s}: {n_bytes} bytes/vector, {elapsed:.2f} sec, "
+        + ", ".join(f"overlap@{k}={overlap:.3f}" for k, overlap in overlaps.items())
+    )
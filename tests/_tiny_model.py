@@ -0,0 +1,43 @@
+from pathlib import Path
+
+from sentence_transformers import SentenceTransformer, models
+from transformers import BertConfig, BertModel, BertTokenizerFast
+
+
+CHARACTERS = list(
+    "自然言語処理文章語句抽出埋込類似度計算東京都日本首都企業本社機械学習モデル"
+)
+
+
+def build_model(
+    dirpath: Path,
+    words: list[str] | None = None,
+    max_seq_length: int = 128,
+    prompts: dict[str, str] | None = None,
+) -> str:
+    # ネットワークに依存しないよう、ランダム初期化の小さな BERT を保存して使う
+    # （語彙は `CHARACTERS` の各文字と `words`）
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", *CHARACTERS, *(words or [])]
+    (dirpath / "bert").mkdir(parents=True)
+    (dirpath / "bert" / "vocab.txt").write_text("\n".join(vocab))
+    BertTokenizerFast.from_pretrained(dirpath / "bert").save_pretrained(
+        dirpath / "bert"
+    )
+    BertModel(
+        BertConfig(
+            vocab_size=len(vocab),
+            hidden_size=64,
+            num_hidden_layers=2,
+            num_attention_heads=2,
+            intermediate_size=128,
+        )
+    ).save_pretrained(dirpath / "bert")
+    SentenceTransformer(
+        modules=[
+            models.Transformer(str(dirpath / "bert"), max_seq_length=max_seq_length),
+            models.Pooling(64),
+        ],
+        device="cpu",
+        prompts=prompts,
+    ).save(str(dirpath / "model"))
+    return str(dirpath / "model")
@@ -1,7 +1,9 @@
 import logging
+import pickle
 import re
 from logging.handlers import RotatingFileHandler
 from pathlib import Path
+from typing import Any
 
 from keyphrase_extractors import ClassicalExtractor
 from pke.unsupervised import (
@@ -173,3 +175,34 @@ keyphrases = extractor.get_keyphrase(input_text=input_text, top_n_phrases=30)
 print("YAKE")
 print(keyphrases.keyphrases)
 print("-" * 80)
+
+# ワーカープロセスでの並列実行（直列実行と同じ結果になること）
+parallel_args: dict[str, Any] = {
+    "stop_words": None,
+    "max_characters": 2000,
+    "args_candidate_selection": {"pos": {"NOUN", "PROPN", "ADJ", "NUM"}},
+    "args_candidate_weighting": {
+        "threshold": 0.74,
+        "method": "average",
+        "heuristic": None,
+    },
+    "flat_output": True,
+    "use_order": False,
+}
+extractor = ClassicalExtractor(extractor=TopicRank(), **parallel_args)
+serial_keyphrases = extractor.get_keyphrase(input_text=input_text, top_n_phrases=30)
+extractor = ClassicalExtractor(
+    extractor=TopicRank(), n_workers=4, logger=logger, **parallel_args
+)
+keyphrases = extractor.get_keyphrase(input_text=input_text, top_n_phrases=30)
+# ワーカープロセスを起動した後でも pickle でき、複製は自身のワーカーを起動する
+copied_extractor = pickle.loads(pickle.dumps(extractor))
+assert copied_extractor.get_keyphrase(input_text=input_text, top_n_phrases=30) == (
+    serial_keyphrases
+)
+copied_extractor.close()
+extractor.close()
+assert keyphrases == serial_keyphrases
+print("TopicRank (n_workers=4)")
+print(keyphrases.keyphrases)
+print("-" * 80)
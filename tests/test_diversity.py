@@ -0,0 +1,132 @@
+import time
+
+import numpy as np
+from keybert._maxsum import max_sum_distance as keybert_max_sum_distance
+from keybert._mmr import mmr as keybert_mmr
+from keyphrase_extractors.embedding_based.diversity import max_sum_distance, mmr
+from keyphrase_extractors.embedding_based.scoring import l2_normalize
+from numpy.typing import NDArray
+
+
+rng = np.random.default_rng(0)
+DIM = 256
+
+
+def make_set(
+    n_candidates: int,
+) -> tuple[NDArray[np.float32], NDArray[np.float32], list[str]]:
+    anchor = rng.standard_normal((1, DIM)).astype(np.float32)
+    # 似た候補が多い状況を再現するため、共通成分を足す
+    candidates = (rng.standard_normal((n_candidates, DIM)) + 0.5 * anchor).astype(
+        np.float32
+    )
+    words = [f"word{i}" for i in range(n_candidates)]
+    return anchor, candidates, words
+
+
+def pairwise_sum(candidates: NDArray[np.float32], idx: list[int]) -> float:
+    normalized = l2_normalize(embeddings=candidates[idx])
+    similarities = normalized @ normalized.T
+    return float(similarities.sum() - np.trace(similarities))
+
+
+def test_mmr_parity():
+    for n_candidates in [1, 2, 10, 50, 200]:
+        for diversity in [0.0, 0.3, 0.7, 1.0]:
+            anchor, candidates, words = make_set(n_candidates=n_candidates)
+            expected = keybert_mmr(anchor, candidates, words, 10, diversity)
+            actual = mmr(
+                anchor=l2_normalize(embeddings=anchor)[0],
+                candidates=l2_normalize(embeddings=candidates),
+                top_n=10,
+                diversity=diversity,
+            )
+            assert [words[i] for i, _ in actual] == [w for w, _ in expected]
+            assert np.allclose([s for _, s in actual], [s for _, s in expected])
+
+
+def test_max_sum_exact_parity():
+    for n_candidates, top_n, nr_candidates in [(5, 3, 5), (30, 5, 12), (8, 9, 10)]:
+        anchor, candidates, words = make_set(n_candidates=n_candidates)
+        expected = keybert_max_sum_distance(
+            anchor, candidates, words, top_n, nr_candidates
+        )
+        actual = max_sum_distance(
+            anchor=l2_normalize(embeddings=anchor)[0],
+            candidates=l2_normalize(embeddings=candidates),
+            top_n=top_n,
+            nr_candidates=nr_candidates,
+        )
+        assert [words[i] for i, _ in actual] == [w for w, _ in expected]
+
+
+def test_max_sum_beam_quality():
+    # ビームサーチで全探索の最適解に近い組み合わせが得られるか
+    gaps: list[float] = []
+    for _ in range(20):
+        anchor, candidates, _ = make_set(n_candidates=40)
+        normalized_anchor = l2_normalize(embeddings=anchor)[0]
+        normalized_candidates = l2_normalize(embeddings=candidates)
+        exact, beam = (
+            max_sum_distance(
+                anchor=normalized_anchor,
+                candidates=normalized_candidates,
+                top_n=6,
+                nr_candidates=16,
+                max_exact_combinations=max_exact_combinations,
+            )
+            # 16 choose 6 = 8,008 通りなので 1 ではビームサーチになる
+            for max_exact_combinations in [10_000, 1]
+        )
+        optimum = pairwise_sum(candidates, [i for i, _ in exact])
+        found = pairwise_sum(candidates, [i for i, _ in beam])
+        assert found >= optimum - 1e-4
+        gaps.append(found - optimum)
+    print(f"beam - exact (sum of similarities): max {max(gaps):.4f}")
+    assert np.mean(gaps) < 0.05
+
+
+def test_speed():
+    anchor, candidates, words = make_set(n_candidates=100)
+    normalized_anchor = l2_normalize(embeddings=anchor)[0]
+    normalized_candidates = l2_normalize(embeddings=candidates)
+
+    start = time.perf_counter()
+    for _ in range(20):
+        keybert_mmr(anchor, candidates, words, 10, 0.7)
+    keybert_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(20):
+        mmr(
+            anchor=normalized_anchor,
+            candidates=normalized_candidates,
+            top_n=10,
+            diversity=0.7,
+        )
+    native_time = time.perf_counter() - start
+    print(f"MMR     keybert: {keybert_time:.4f} sec, native: {native_time:.4f} sec")
+
+    # 20 choose 10 = 184,756 通り
+    start = time.perf_counter()
+    expected = keybert_max_sum_distance(anchor, candidates, words, 10, 20)
+    keybert_time = time.perf_counter() - start
+    start = time.perf_counter()
+    actual = max_sum_distance(
+        anchor=normalized_anchor,
+        candidates=normalized_candidates,
+        top_n=10,
+        nr_candidates=20,
+    )
+    native_time = time.perf_counter() - start
+    print(f"Max-Sum keybert: {keybert_time:.4f} sec, native: {native_time:.4f} sec")
+    optimum = pairwise_sum(candidates, [words.index(w) for w, _ in expected])
+    found = pairwise_sum(candidates, [i for i, _ in actual])
+    print(f"Max-Sum sum of similarities keybert: {optimum:.4f}, native: {found:.4f}")
+    assert native_time < keybert_time
+
+
+test_mmr_parity()
+test_max_sum_exact_parity()
+test_max_sum_beam_quality()
+test_speed()
+print("OK")
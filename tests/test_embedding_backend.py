@@ -0,0 +1,58 @@
+from pathlib import Path
+
+from keyphrase_extractors import EmbeddingModel, EmbeddingPrompts
+from keyphrase_extractors.embedding_based.backend import (
+    SAMPLE_TEXTS,
+    export_model,
+    load_embedding_model,
+    verify_backend,
+)
+from keyphrase_extractors.embedding_based.data import OnnxQuantization, PromptName
+
+
+model_name = "cl-nagoya/ruri-base"
+exported_dirpath = Path("../output/models/ruri-base")
+prompts = EmbeddingPrompts(query="クエリ: ", passage="文章: ")
+
+
+def test_export_and_verify():
+    path = export_model(
+        model_name=model_name,
+        output_dirpath=exported_dirpath,
+        quantization="avx2",
+        trust_remote_code=True,
+    )
+    assert path.exists()
+
+    reference = load_embedding_model(
+        model_config=EmbeddingModel(
+            name=model_name, device="cpu", prompts=prompts, trust_remote_code=True
+        )
+    )
+    # 量子化なしの ONNX は torch とほぼ一致し、量子化ありでも近い埋め込みになるか
+    cases: list[tuple[OnnxQuantization | None, float]] = [(None, 0.999), ("avx2", 0.95)]
+    prompt_names: list[PromptName | None] = [None, "query", "passage"]
+    for quantization, min_cosine in cases:
+        candidate = load_embedding_model(
+            model_config=EmbeddingModel(
+                name=str(exported_dirpath),
+                device="cpu",
+                prompts=prompts,
+                trust_remote_code=True,
+                backend="onnx",
+                quantization=quantization,
+            )
+        )
+        for prompt_name in prompt_names:
+            verification = verify_backend(
+                reference=reference,
+                candidate=candidate,
+                texts=SAMPLE_TEXTS,
+                prompt_name=prompt_name,
+            )
+            print(quantization, prompt_name, verification)
+            assert verification.min_cosine >= min_cosine
+
+
+test_export_and_verify()
+print("OK")
@@ -0,0 +1,154 @@
+import gc
+import pickle
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from keyphrase_extractors.embedding_based import (
+    EmbeddingCache,
+    EmbeddingCacheConfig,
+    EmbeddingPrompts,
+)
+
+
+DIM = 4
+
+
+def vector(value: float) -> np.ndarray[tuple[int], np.dtype[np.float32]]:
+    return np.full(DIM, value, dtype=np.float32)
+
+
+def open_cache(dirpath: Path) -> EmbeddingCache:
+    # メモリ上の LRU を使わず、ディスクの保存先から読み出す
+    return EmbeddingCache(
+        model_name="dummy_model",
+        config=EmbeddingCacheConfig(max_memory_entries=0, cache_dirpath=dirpath),
+    )
+
+
+def assert_cached(
+    cache: EmbeddingCache, expected: dict[str, float], prompt_name: str | None = None
+):
+    for text, value in expected.items():
+        cached = cache.get(text=text, prompt_name=prompt_name)
+        assert cached is not None, text
+        assert np.array_equal(cached, vector(value)), (text, cached)
+
+
+def test_shared_directory():
+    with tempfile.TemporaryDirectory() as dirpath:
+        # 同じ保存先を使う 2 つのキャッシュが交互に書き込んでも、行がずれない
+        a = open_cache(dirpath=Path(dirpath))
+        b = open_cache(dirpath=Path(dirpath))
+        a.put(text="x", prompt_name=None, vector=vector(1.0))
+        b.put(text="y", prompt_name=None, vector=vector(2.0))
+        a.put(text="z", prompt_name=None, vector=vector(3.0))
+        expected = {"x": 1.0, "y": 2.0, "z": 3.0}
+        assert_cached(cache=a, expected=expected)
+        assert_cached(cache=b, expected=expected)
+        del a, b
+        gc.collect()
+
+        # 開き直しても同じベクトルが読み出せる
+        assert_cached(cache=open_cache(dirpath=Path(dirpath)), expected=expected)
+
+
+def test_crash_recovery():
+    with tempfile.TemporaryDirectory() as dirpath:
+        cache = open_cache(dirpath=Path(dirpath))
+        cache.put(text="x", prompt_name=None, vector=vector(1.0))
+        cache.put(text="y", prompt_name=None, vector=vector(2.0))
+        del cache
+        gc.collect()
+        store_dirpath = Path(dirpath) / "dummy_model"
+        row_bytes = DIM * np.dtype(np.float32).itemsize
+
+        # ベクトルだけが書き込まれ、キーが書き込まれる前に中断した場合
+        with (store_dirpath / "vectors.bin").open("ab") as file:
+            file.write(vector(9.0).tobytes())
+        cache = open_cache(dirpath=Path(dirpath))
+        cache.put(text="z", prompt_name=None, vector=vector(3.0))
+        assert_cached(cache=cache, expected={"x": 1.0, "y": 2.0, "z": 3.0})
+        del cache
+        gc.collect()
+
+        # ベクトルとキーの途中で中断した場合
+        with (store_dirpath / "vectors.bin").open("ab") as file:
+            file.write(vector(9.0).tobytes()[: row_bytes // 2])
+        with (store_dirpath / "keys.txt").open("a", encoding="utf-8") as file:
+            file.write("0123")
+        cache = open_cache(dirpath=Path(dirpath))
+        assert cache.stats.disk_entries == 3
+        cache.put(text="w", prompt_name=None, vector=vector(4.0))
+        cache.put(text="v", prompt_name=None, vector=vector(5.0))
+        expected = {"x": 1.0, "y": 2.0, "z": 3.0, "w": 4.0, "v": 5.0}
+        assert_cached(cache=cache, expected=expected)
+        del cache
+        gc.collect()
+
+        # 2 つのファイルの行数が揃っている
+        assert (store_dirpath / "vectors.bin").stat().st_size == 5 * row_bytes
+        assert (
+            len((store_dirpath / "keys.txt").read_text(encoding="utf-8").splitlines())
+            == 5
+        )
+        assert_cached(cache=open_cache(dirpath=Path(dirpath)), expected=expected)
+
+
+def test_model_variants():
+    with tempfile.TemporaryDirectory() as dirpath:
+        config = EmbeddingCacheConfig(cache_dirpath=Path(dirpath))
+        torch_cache = EmbeddingCache(model_name="dummy_model", config=config)
+        onnx_cache = EmbeddingCache(
+            model_name="dummy_model", config=config, backend="onnx", quantization="avx2"
+        )
+        prompts = EmbeddingPrompts(query="クエリ: ", passage="文章: ")
+        prompt_cache = EmbeddingCache(
+            model_name="dummy_model", config=config, prompts=prompts
+        )
+        other_prompt_cache = EmbeddingCache(
+            model_name="dummy_model",
+            config=config,
+            prompts=prompts.model_copy(update={"query": "query: "}),
+        )
+        caches = [torch_cache, onnx_cache, prompt_cache, other_prompt_cache]
+        for i, cache in enumerate(caches):
+            cache.put(text="x", prompt_name="query", vector=vector(float(i)))
+
+        # バックエンド、量子化、プロンプトの文字列が異なれば別のベクトルとして扱う
+        for i, cache in enumerate(caches):
+            assert_cached(cache=cache, expected={"x": float(i)}, prompt_name="query")
+        # プロンプトを使わない場合は、従来の保存先とキーのまま
+        assert sorted(path.name for path in Path(dirpath).iterdir())[:2] == [
+            "dummy_model",
+            "dummy_model__onnx__avx2",
+        ]
+        assert len(list(Path(dirpath).iterdir())) == 4
+
+
+def test_pickle():
+    with tempfile.TemporaryDirectory() as dirpath:
+        # プロセスをまたいで渡せるよう、ロックと保存先を除いて pickle できる
+        cache = open_cache(dirpath=Path(dirpath))
+        cache.put(text="x", prompt_name=None, vector=vector(1.0))
+        restored: EmbeddingCache = pickle.loads(pickle.dumps(cache))
+        assert_cached(cache=restored, expected={"x": 1.0})
+
+        # 復元したキャッシュは同じ保存先を開き直して共有する
+        restored.put(text="y", prompt_name=None, vector=vector(2.0))
+        assert_cached(cache=cache, expected={"x": 1.0, "y": 2.0})
+
+        # メモリ上だけのキャッシュも復元できる
+        memory_cache = EmbeddingCache(
+            model_name="dummy_model", config=EmbeddingCacheConfig()
+        )
+        memory_cache.put(text="x", prompt_name=None, vector=vector(1.0))
+        restored = pickle.loads(pickle.dumps(memory_cache))
+        assert_cached(cache=restored, expected={"x": 1.0})
+
+
+test_shared_directory()
+test_crash_recovery()
+test_model_variants()
+test_pickle()
+print("OK")
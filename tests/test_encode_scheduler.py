@@ -0,0 +1,115 @@
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from _tiny_model import CHARACTERS, build_model
+from keyphrase_extractors.embedding_based.data import EmbeddingArray
+from keyphrase_extractors.embedding_based.encoder import (
+    EncodePlanner,
+    token_budget_batches,
+)
+from numpy.typing import NDArray
+from sentence_transformers import SentenceTransformer
+
+
+rng = np.random.default_rng(0)
+PROMPTS = {"query": "語句", "passage": "文章"}
+
+
+def make_texts() -> list[str]:
+    # 短い語句と長い文が混在する状況を再現
+    lengths = [
+        *rng.choice(np.arange(1, 6), size=300),
+        *rng.choice(np.arange(100, 250), size=30),
+    ]
+    rng.shuffle(lengths)
+    return ["".join(rng.choice(CHARACTERS, size=length)) for length in lengths]
+
+
+def token_lengths(model: SentenceTransformer, texts: list[str]) -> NDArray[np.intp]:
+    input_ids: list[list[int]] = model.tokenizer(
+        [PROMPTS["query"] + _text for _text in texts],
+        truncation=True,
+        max_length=model.max_seq_length,
+    )["input_ids"]
+    return np.array([len(_ids) for _ids in input_ids], dtype=np.intp)
+
+
+def padded_tokens(batches: list[NDArray[np.intp]], lengths: NDArray[np.intp]) -> int:
+    return sum(len(_batch) * int(lengths[_batch].max()) for _batch in batches)
+
+
+def test_token_budget_batches():
+    lengths = rng.choice(np.arange(1, 200, dtype=np.intp), size=500)
+    batches = token_budget_batches(
+        token_lengths=lengths, max_batch_tokens=1024, max_batch_size=32
+    )
+    assert sorted(np.concatenate(batches).tolist()) == list(range(500))
+    for batch in batches:
+        assert 1 <= len(batch) <= 32
+        assert len(batch) * lengths[batch].max() <= 1024
+
+    # 予算より長いテキストは単独のバッチになる
+    batches = token_budget_batches(
+        token_lengths=np.array([5000, 3], dtype=np.intp),
+        max_batch_tokens=1024,
+        max_batch_size=32,
+    )
+    assert [_batch.tolist() for _batch in batches] == [[0], [1]]
+
+
+def test_planner():
+    texts = make_texts()
+    with tempfile.TemporaryDirectory() as dirpath:
+        model = SentenceTransformer(
+            build_model(dirpath=Path(dirpath), max_seq_length=256, prompts=PROMPTS),
+            device="cpu",
+        )
+        # ウォームアップ
+        planner = EncodePlanner(
+            model=model, batchsize=32, use_prompt=True, show_progress_bar=False
+        )
+        planner.add(texts=texts[:8], prompt_name="query")
+        planner.encode()
+
+        embeddings: dict[str, EmbeddingArray] = {}
+        for name, max_batch_tokens in [("count", None), ("token budget", 8192)]:
+            elapsed: list[float] = []
+            for _ in range(3):
+                planner = EncodePlanner(
+                    model=model,
+                    batchsize=32,
+                    use_prompt=True,
+                    show_progress_bar=False,
+                    max_batch_tokens=max_batch_tokens,
+                )
+                segment_id = planner.add(texts=texts, prompt_name="query")
+                start = time.perf_counter()
+                planner.encode()
+                elapsed.append(time.perf_counter() - start)
+                embeddings[name] = planner.get(segment_id=segment_id)
+            print(f"{name:12s}: {min(elapsed):.4f} sec")
+
+        # 元の順序で同じ埋め込みが得られるか
+        assert np.allclose(embeddings["count"], embeddings["token budget"], atol=1e-4)
+
+        # sentence-transformers も 1 回の encode 内で長さ順に並べてから件数で区切る
+        # ため、予算で区切ってもパディング量は減らない（1 バッチの上限が決まるだけ）
+        lengths = token_lengths(model=model, texts=texts)
+        order = np.argsort(-lengths, kind="stable")
+        by_count = [order[i : i + 32] for i in range(0, len(texts), 32)]
+        by_budget = token_budget_batches(token_lengths=lengths, max_batch_tokens=8192)
+        print(
+            f"count       : {len(by_count)} batches, "
+            f"{padded_tokens(batches=by_count, lengths=lengths)} padded tokens\n"
+            f"token budget: {len(by_budget)} batches, "
+            f"{padded_tokens(batches=by_budget, lengths=lengths)} padded tokens"
+        )
+        for batch in by_budget:
+            assert len(batch) == 1 or padded_tokens([batch], lengths) <= 8192
+
+
+test_token_budget_batches()
+test_planner()
+print("OK")
@@ -1,3 +1,4 @@
+import json
 import logging
 from logging.handlers import RotatingFileHandler
 from pathlib import Path
@@ -90,6 +91,21 @@ evaluation.run(
     output_dirname="static-embedding-japanese",
 )
 
+# JSONL に逐次書き出すモード（再実行時は完了済みのサンプルをスキップ）
+evaluation.run_streaming(
+    extractor=extractor,
+    output_dirname="static-embedding-japanese-streaming",
+    resume=False,
+)
+with (
+    output_dirpath / "static-embedding-japanese" / "evaluation_summary.json"
+).open() as f:
+    summary = json.load(f)
+with (
+    output_dirpath / "static-embedding-japanese-streaming" / "evaluation_summary.json"
+).open() as f:
+    assert json.load(f) == summary
+
 ## cl-nagoya/ruri-small, grammar_phrasing=True, threshold=0.7, filter_sentences=True, minimum_characters=100
 embedding_model_config = EmbeddingModel(
     name="cl-nagoya/ruri-base",
@@ -0,0 +1,74 @@
+import random
+
+from keyphrase_extractors.embedding_based.data import DEFAULT_GRAMMAR
+from keyphrase_extractors.embedding_based.grammar import (
+    NounPhraseMatcher,
+    RegexpPhraseMatcher,
+    build_phrase_matcher,
+    to_pos_ids,
+)
+
+
+POS_TAGS = ["NOUN", "PROPN", "ADJ", "ADP", "VERB", "AUX", "PUNCT", "NUM", "SPACE"]
+
+native_matcher = NounPhraseMatcher()
+nltk_matcher = RegexpPhraseMatcher(grammar=DEFAULT_GRAMMAR)
+
+
+def find_both(words_pos: list[str]) -> tuple[list[tuple[int, int]], ...]:
+    pos_ids = to_pos_ids(words_pos=words_pos)
+    return (
+        native_matcher.find_spans(words_pos=words_pos, pos_ids=pos_ids),
+        sorted(nltk_matcher.find_spans(words_pos=words_pos, pos_ids=pos_ids)),
+    )
+
+
+def test_build_phrase_matcher():
+    assert isinstance(build_phrase_matcher(grammar=DEFAULT_GRAMMAR), NounPhraseMatcher)
+    # 空白の違いは同じ文法とみなす
+    assert isinstance(
+        build_phrase_matcher(grammar=" ".join(DEFAULT_GRAMMAR.split())),
+        NounPhraseMatcher,
+    )
+    custom_grammar = "NP: {<ADJ>*<NOUN>+}"
+    assert isinstance(build_phrase_matcher(grammar=custom_grammar), RegexpPhraseMatcher)
+
+
+def test_known_sequences():
+    cases: list[tuple[list[str], list[tuple[int, int]]]] = [
+        ([], []),
+        (["VERB", "AUX"], []),
+        (["ADJ", "ADJ"], []),
+        (["NOUN"], [(0, 1)]),
+        (["ADJ", "NOUN", "PROPN"], [(0, 3)]),
+        (["NOUN", "ADJ"], [(0, 1)]),
+        (["NOUN", "ADP", "NOUN"], [(0, 1), (2, 3)]),
+        (["ADJ", "NOUN", "ADJ", "NOUN", "ADJ", "VERB", "PROPN"], [(0, 4), (6, 7)]),
+    ]
+    for words_pos, expected in cases:
+        native_spans, nltk_spans = find_both(words_pos=words_pos)
+        assert native_spans == expected, words_pos
+        assert nltk_spans == expected, words_pos
+
+
+def test_random_sequences():
+    # ランダムな品詞列で NLTK の RegexpParser と一致することを確認
+    rng = random.Random(0)
+    for _ in range(5000):
+        words_pos = [rng.choice(POS_TAGS) for _ in range(rng.randint(0, 30))]
+        native_spans, nltk_spans = find_both(words_pos=words_pos)
+        assert native_spans == nltk_spans, words_pos
+
+
+def test_custom_grammar():
+    matcher = build_phrase_matcher(grammar="NP: {<NOUN><ADP><NOUN>}")
+    words_pos = ["NOUN", "ADP", "NOUN", "VERB", "NOUN"]
+    spans = matcher.find_spans(words_pos=words_pos, pos_ids=to_pos_ids(words_pos))
+    assert spans == [(0, 3)]
+
+
+test_build_phrase_matcher()
+test_known_sequences()
+test_random_sequences()
+test_custom_grammar()
+print("OK")
@@ -0,0 +1,75 @@
+import os
+import subprocess
+import sys
+
+
+# トップレベルのパッケージの import にかけてよい時間（ミリ秒）
+IMPORT_TIME_BUDGET_MS = float(os.environ.get("IMPORT_TIME_BUDGET_MS", "500"))
+HEAVY_MODULES = [
+    "torch",
+    "sentence_transformers",
+    "transformers",
+    "spacy",
+    "sklearn",
+    "pke",
+    "nltk",
+    "langrila",
+]
+
+
+def run(code: str, *options: str) -> subprocess.CompletedProcess[str]:
+    return subprocess.run(
+        [sys.executable, *options, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def imported_modules(statement: str) -> set[str]:
+    # 別プロセスで import し、読み込まれた重い依存を調べる
+    code = (
+        f"import sys\n{statement}\n"
+        f"print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    return set(run(code).stdout.split())
+
+
+def test_import_time_budget():
+    # python -X importtime の累積時間（マイクロ秒）から、パッケージの import 時間を得る
+    stderr = run("import keyphrase_extractors", "-X", "importtime").stderr
+    cumulative_us = next(
+        int(_line.split("|")[1])
+        for _line in stderr.splitlines()
+        if _line.startswith("import time:")
+        and _line.split("|")[2].strip() == "keyphrase_extractors"
+    )
+    print(f"import keyphrase_extractors: {cumulative_us / 1000:.1f} ms")
+    assert cumulative_us / 1000 <= IMPORT_TIME_BUDGET_MS
+
+
+def test_lazy_imports():
+    assert imported_modules("import keyphrase_extractors") == set()
+    assert (
+        imported_modules(
+            "from keyphrase_extractors.embedding_based import "
+            "SentenceEmbeddingBasedExtractionConfig"
+        )
+        == set()
+    )
+
+    # 古典的な抽出器だけを使うワーカーは、埋め込みモデルや LLM の依存を読み込まない
+    modules = imported_modules("from keyphrase_extractors import ClassicalExtractor")
+    assert "pke" in modules
+    assert not modules & {"sentence_transformers", "langrila"}
+
+    modules = imported_modules(
+        "from keyphrase_extractors import SentenceEmbeddingBasedExtractor"
+    )
+    assert {"sentence_transformers", "spacy"} <= modules
+    assert "langrila" not in modules
+
+
+test_import_time_budget()
+test_lazy_imports()
+print("OK")
@@ -0,0 +1,337 @@
+import asyncio
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, cast
+
+from keyphrase_extractors import GenerationBasedExtractor
+from keyphrase_extractors.generation_based import (
+    ChunkResponseSchema,
+    PackedResponseSchema,
+    PackingConfig,
+    RequestConfig,
+    ResponseCacheConfig,
+    ResponseSchema,
+)
+from keyphrase_extractors.io_data import Keyphrase
+from langrila import Prompt, SystemPrompt
+from langrila.core.prompt import TextPrompt
+from langrila.core.response import Response, TextResponse
+
+
+class StubAgent:
+    """
+    API を呼ばずに `ResponseSchema` 形式の JSON を返す Agent の代替
+    （複数文章のリクエストには `PackedResponseSchema` 形式で返す）
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.1,
+        n_failures: int = 0,
+        hang: bool = False,
+        dropped_chunk_ids: set[int] | None = None,
+        n_packed_failures: int = 0,
+    ):
+        self.latency = latency
+        self.n_failures = n_failures
+        self.hang = hang
+        self.dropped_chunk_ids = dropped_chunk_ids or set()
+        self.n_packed_failures = n_packed_failures
+        self.n_calls = 0
+        self.n_packed_calls = 0
+        self.n_running = 0
+        self.max_running = 0
+
+    async def generate_text_async(
+        self, prompt: Prompt, system_instruction: SystemPrompt | None = None
+    ) -> Response:
+        self.n_calls += 1
+        self.n_running += 1
+        self.max_running = max(self.max_running, self.n_running)
+        try:
+            if self.hang:
+                await asyncio.sleep(3600)
+            await asyncio.sleep(self.latency)
+            if self.n_failures > 0:
+                self.n_failures -= 1
+                raise ConnectionError("Temporary failure")
+
+            text = "".join(
+                _content.text
+                for _content in prompt.contents
+                if isinstance(_content, TextPrompt)
+            )
+            sections = re.findall(r"文章\[(\d+)\]:\n(.*?)(?=\n\n文章\[|\Z)", text, re.S)
+            if not sections:
+                schema = self._respond(text=text.split("文章:\n", 1)[1])
+                return Response(contents=[TextResponse(text=schema.model_dump_json())])
+
+            self.n_packed_calls += 1
+            if self.n_packed_failures > 0:
+                self.n_packed_failures -= 1
+                raise ConnectionError("Temporary failure")
+            packed = PackedResponseSchema(
+                chunks=[
+                    ChunkResponseSchema(
+                        chunk_id=int(_id),
+                        keyphrases=self._respond(text=_section).keyphrases,
+                    )
+                    for _id, _section in sections
+                    if int(_id) not in self.dropped_chunk_ids
+                ]
+            )
+            return Response(contents=[TextResponse(text=packed.model_dump_json())])
+        finally:
+            self.n_running -= 1
+
+    def _respond(self, text: str) -> ResponseSchema:
+        words = [_word for _word in text.split() if _word]
+        return ResponseSchema(
+            keyphrases=[
+                Keyphrase(phrase=_word, score=1.0 / (i + 1))
+                for i, _word in enumerate(words[:3])
+            ]
+        )
+
+
+def build_extractor(
+    agent: StubAgent,
+    config: RequestConfig,
+    cache_config: ResponseCacheConfig | None = None,
+    packing_config: PackingConfig | None = None,
+) -> GenerationBasedExtractor:
+    return GenerationBasedExtractor(
+        agent=cast(Any, agent),
+        system_prompt="キーフレーズを抽出してください。",
+        request_config=config,
+        response_cache=cache_config,
+        packing_config=packing_config,
+    )
+
+
+# 8チャンクに分割済みの文書
+input_text = [f"chunk{i} alpha{i} beta{i}" for i in range(8)]
+
+
+def test_concurrent_chunks():
+    agent = StubAgent(latency=0.2)
+    extractor = build_extractor(agent=agent, config=RequestConfig(max_concurrency=4))
+    start = time.perf_counter()
+    outputs = extractor.get_keyphrase(input_text=input_text, top_n_phrases=3)
+    elapsed = time.perf_counter() - start
+
+    assert agent.n_calls == 8
+    assert agent.max_running == 4
+    # 8リクエストを4並列で処理するので、逐次実行（1.6秒）の約半分以下
+    assert elapsed < 0.8, elapsed
+    assert len(outputs.keyphrases) == 1
+    assert {_keyphrase.phrase for _keyphrase in outputs.keyphrases[0]} == {
+        f"{_prefix}{i}" for _prefix in ["chunk", "alpha", "beta"] for i in range(8)
+    }
+
+
+def test_batch_shares_semaphore():
+    agent = StubAgent(latency=0.05)
+    extractor = build_extractor(agent=agent, config=RequestConfig(max_concurrency=3))
+    docs = [*input_text[:4], "gamma delta", input_text[0]]
+    outputs = asyncio.run(extractor.aget_keyphrase_batch(docs=docs, top_n_phrases=3))
+
+    # 重複する文書は1回だけリクエストする
+    assert agent.n_calls == 5
+    assert agent.max_running == 3
+    assert outputs[0] == outputs[5]
+    assert [_keyphrase.phrase for _keyphrase in outputs[4].keyphrases[0]] == [
+        "gamma",
+        "delta",
+    ]
+
+
+def test_retry_with_backoff():
+    agent = StubAgent(latency=0.0, n_failures=2)
+    extractor = build_extractor(
+        agent=agent,
+        config=RequestConfig(max_concurrency=1, max_retries=2, backoff_seconds=0.01),
+    )
+    outputs = extractor.get_keyphrase(input_text=["gamma delta"], top_n_phrases=3)
+    assert agent.n_calls == 3
+    assert [_keyphrase.phrase for _keyphrase in outputs.keyphrases[0]] == [
+        "gamma",
+        "delta",
+    ]
+
+
+def test_timeout():
+    agent = StubAgent(hang=True)
+    extractor = build_extractor(
+        agent=agent,
+        config=RequestConfig(timeout=0.1, max_retries=1, backoff_seconds=0.0),
+    )
+    start = time.perf_counter()
+    outputs = extractor.get_keyphrase(input_text=["gamma delta"], top_n_phrases=3)
+    assert time.perf_counter() - start < 1.0
+    assert agent.n_calls == 2
+    assert outputs.keyphrases == [[]]
+
+
+def test_sync_wrapper_in_running_loop():
+    async def call_sync() -> list[list[Keyphrase]]:
+        agent = StubAgent(latency=0.0)
+        extractor = build_extractor(agent=agent, config=RequestConfig())
+        return extractor.get_keyphrase(input_text=["gamma"]).keyphrases
+
+    assert asyncio.run(call_sync())[0][0].phrase == "gamma"
+
+
+def test_response_cache():
+    with tempfile.TemporaryDirectory() as dirname:
+        cache_config = ResponseCacheConfig(cache_filepath=Path(dirname) / "cache.db")
+        agent = StubAgent(latency=0.05)
+        extractor = build_extractor(
+            agent=agent, config=RequestConfig(), cache_config=cache_config
+        )
+        expected = extractor.get_keyphrase(input_text=input_text, top_n_phrases=3)
+        assert agent.n_calls == 8
+
+        # 別のインスタンスでもファイルから読み込まれ、Agent は呼ばれない
+        agent = StubAgent(latency=0.05)
+        extractor = build_extractor(
+            agent=agent, config=RequestConfig(), cache_config=cache_config
+        )
+        outputs = extractor.get_keyphrase(input_text=input_text, top_n_phrases=3)
+        assert agent.n_calls == 0
+        assert outputs == expected
+        assert extractor.response_cache is not None
+        stats = extractor.response_cache.stats
+        assert (stats.hits, stats.misses, stats.entries) == (8, 0, 8)
+        assert stats.saved_seconds >= 8 * 0.05
+
+        # プロンプトが変われば別のキー
+        extractor.get_keyphrase(input_text=input_text, top_n_phrases=5)
+        assert agent.n_calls == 8
+
+        # bypass ではキャッシュを使わない
+        agent = StubAgent(latency=0.0)
+        extractor = build_extractor(
+            agent=agent,
+            config=RequestConfig(),
+            cache_config=cache_config.model_copy(update={"bypass": True}),
+        )
+        extractor.get_keyphrase(input_text=input_text, top_n_phrases=3)
+        assert agent.n_calls == 8
+
+        # 期限切れのエントリは再リクエストする
+        agent = StubAgent(latency=0.0)
+        extractor = build_extractor(
+            agent=agent,
+            config=RequestConfig(),
+            cache_config=cache_config.model_copy(update={"ttl_seconds": 1e-6}),
+        )
+        extractor.get_keyphrase(input_text=input_text, top_n_phrases=3)
+        assert agent.n_calls == 8
+        assert extractor.response_cache is not None
+        extractor.response_cache.close()
+
+
+def test_packing():
+    expected = build_extractor(
+        agent=StubAgent(latency=0.0), config=RequestConfig()
+    ).get_keyphrase(input_text=input_text, top_n_phrases=3)
+
+    # 3チャンクずつ詰めて 3 リクエスト
+    agent = StubAgent(latency=0.0)
+    extractor = build_extractor(
+        agent=agent,
+        config=RequestConfig(),
+        packing_config=PackingConfig(max_chunks=3),
+    )
+    assert extractor.get_keyphrase(input_text=input_text, top_n_phrases=3) == expected
+    assert (agent.n_calls, agent.n_packed_calls) == (3, 3)
+
+    # 文字数の上限（1チャンク19文字）で 2 チャンクずつ
+    agent = StubAgent(latency=0.0)
+    extractor = build_extractor(
+        agent=agent,
+        config=RequestConfig(),
+        packing_config=PackingConfig(max_characters=40),
+    )
+    assert extractor.get_keyphrase(input_text=input_text, top_n_phrases=3) == expected
+    assert (agent.n_calls, agent.n_packed_calls) == (4, 4)
+
+    # 短い文書の集まりも文書をまたいで詰める
+    agent = StubAgent(latency=0.0)
+    extractor = build_extractor(
+        agent=agent, config=RequestConfig(), packing_config=PackingConfig()
+    )
+    outputs = extractor.get_keyphrase_batch(docs=input_text, top_n_phrases=3)
+    assert (agent.n_calls, agent.n_packed_calls) == (1, 1)
+    assert [
+        [_keyphrase.phrase for _keyphrase in _outputs.keyphrases[0]]
+        for _outputs in outputs
+    ] == [_text.split() for _text in input_text]
+
+    # 応答に含まれないチャンクは個別にリクエストする
+    agent = StubAgent(latency=0.0, dropped_chunk_ids={1})
+    extractor = build_extractor(
+        agent=agent, config=RequestConfig(), packing_config=PackingConfig()
+    )
+    assert extractor.get_keyphrase(input_text=input_text, top_n_phrases=3) == expected
+    assert (agent.n_calls, agent.n_packed_calls) == (2, 1)
+
+    # 詰めたリクエストが失敗し続けたら、チャンクごとにリクエストし直す
+    agent = StubAgent(latency=0.0, n_packed_failures=2)
+    extractor = build_extractor(
+        agent=agent,
+        config=RequestConfig(max_retries=1, backoff_seconds=0.0),
+        packing_config=PackingConfig(),
+    )
+    assert extractor.get_keyphrase(input_text=input_text, top_n_phrases=3) == expected
+    assert (agent.n_calls, agent.n_packed_calls) == (2 + 8, 2)
+
+
+def test_packing_cache():
+    with tempfile.TemporaryDirectory() as dirname:
+        cache_config = ResponseCacheConfig(cache_filepath=Path(dirname) / "cache.db")
+        # チャンクごとのリクエストで保存した応答を、詰める場合にも使う
+        build_extractor(
+            agent=StubAgent(latency=0.0),
+            config=RequestConfig(),
+            cache_config=cache_config,
+        ).get_keyphrase(input_text=input_text[:4], top_n_phrases=3)
+        agent = StubAgent(latency=0.0)
+        extractor = build_extractor(
+            agent=agent,
+            config=RequestConfig(),
+            cache_config=cache_config,
+            packing_config=PackingConfig(max_chunks=3),
+        )
+        extractor.get_keyphrase(input_text=input_text, top_n_phrases=3)
+        # 残りの 4 チャンクを 3 + 1 に詰める。1 チャンクだけのリクエストも保存される
+        assert (agent.n_calls, agent.n_packed_calls) == (2, 1)
+        assert extractor.response_cache is not None
+        extractor.response_cache.close()
+
+        agent = StubAgent(latency=0.0)
+        extractor = build_extractor(
+            agent=agent,
+            config=RequestConfig(),
+            cache_config=cache_config,
+            packing_config=PackingConfig(),
+        )
+        extractor.get_keyphrase(input_text=input_text, top_n_phrases=3)
+        assert agent.n_calls == 0
+        assert extractor.response_cache is not None
+        assert extractor.response_cache.stats.hits == 8
+        extractor.response_cache.close()
+
+
+test_concurrent_chunks()
+test_batch_shares_semaphore()
+test_retry_with_backoff()
+test_timeout()
+test_sync_wrapper_in_running_loop()
+test_response_cache()
+test_packing()
+test_packing_cache()
+print("OK")
@@ -0,0 +1,108 @@
+import json
+import re
+from pathlib import Path
+
+import spacy
+from keyphrase_extractors.embedding_based.analysis import DocumentAnalysis
+from keyphrase_extractors.embedding_based.masking import mask_target
+
+
+def test_mask_target():
+    source_text = "東京は日本の首都です。東京には多くの企業があります。"
+    masked = mask_target(source_text=source_text, target="東京")
+    assert "東京" not in masked
+    assert masked.count("[MASK] [MASK]") == 2
+    assert masked.endswith("には多くの企業があります。")
+
+    # 含まれない場合は元の文章のまま
+    assert mask_target(source_text=source_text, target="大阪") == source_text
+
+
+def test_window():
+    filler = "あ" * 1000
+    source_text = f"{filler}東京{filler}東京{filler}"
+    masked = mask_target(source_text=source_text, target="東京", window_characters=10)
+    # 出現箇所ごとの前後 10 文字だけが残る
+    assert masked == "\n".join(["あ" * 10 + "[MASK] [MASK]" + "あ" * 10] * 2)
+
+    # 重なる窓は 1 つにまとめる
+    masked = mask_target(
+        source_text=f"{filler}東京ああ東京{filler}", target="東京", window_characters=10
+    )
+    assert masked == "あ" * 10 + "[MASK] [MASK]ああ[MASK] [MASK]" + "あ" * 10
+
+    # 窓を付けても同じ周辺文脈の候補は同じ文字列になり、まとめてベクトル化される
+    assert mask_target(
+        source_text=f"{filler}東京{filler}", target="東京", window_characters=10
+    ) == mask_target(
+        source_text=f"あ{filler}東京{filler}", target="東京", window_characters=10
+    )
+
+
+def test_merged_sentence():
+    # 短い文をつなげた文は改行で区切られるが、元の文章では空白なしで続いている
+    source_text = "東京は首都です。 人口が多い。\n企業も多い。大阪は西にあります。"
+    target = "東京は首都です。\n人口が多い。\n企業も多い。"
+    masked = mask_target(source_text=source_text, target=target)
+    assert masked.startswith("[MASK]")
+    assert masked.endswith("[MASK]大阪は西にあります。")
+    assert mask_target(
+        source_text=source_text, target=target, window_characters=3
+    ).endswith("[MASK]大阪は")
+
+    # DocumentAnalysis がつなげた文は、すべて元の文章の中でマスクされる
+    dataset_json_path = Path("../dataset/evaluation/dataset.json")
+    with dataset_json_path.open(encoding="utf-8") as f:
+        dataset = json.load(f)
+    nlp = spacy.load("ja_ginza", disable=["ner", "parser", "bunsetu_recognizer"])
+    for split_name in ["length_200", "length_2000"]:
+        text = dataset[split_name][0]["text"]
+        analysis = DocumentAnalysis(text=text, doc=nlp(text), minimum_characters=100)
+        assert any("\n" in _sentence for _sentence in analysis.sentence_texts())
+        for sentence in analysis.sentence_texts():
+            for window_characters in [None, 50]:
+                masked = mask_target(
+                    source_text=text,
+                    target=sentence,
+                    window_characters=window_characters,
+                )
+                assert "[MASK]" in masked, (split_name, sentence)
+
+
+def test_encoded_characters():
+    # 長い文書の各文をマスクしたときに、ベクトル化する文字数がどれだけ減るか
+    dataset_json_path = Path("../dataset/evaluation/dataset.json")
+    with dataset_json_path.open(encoding="utf-8") as f:
+        dataset = json.load(f)
+    for split_name, samples in dataset.items():
+        n_characters = {None: 0, 200: 0}
+        for sample in samples[:5]:
+            text = sample["text"]
+            sentences = [
+                _sentence.strip()
+                for _sentence in re.split(r"(?<=[。！？\n])", text)
+                if _sentence.strip()
+            ]
+            for window_characters in n_characters:
+                n_characters[window_characters] += sum(
+                    len(
+                        mask_target(
+                            source_text=text,
+                            target=_sentence,
+                            window_characters=window_characters,
+                        )
+                    )
+                    for _sentence in sentences
+                )
+        print(
+            f"{split_name:13s}: full text {n_characters[None]} characters, "
+            f"window 200 {n_characters[200]} characters"
+        )
+        assert n_characters[200] <= n_characters[None]
+
+
+test_mask_target()
+test_window()
+test_merged_sentence()
+test_encoded_characters()
+print("OK")
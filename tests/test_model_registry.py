@@ -0,0 +1,119 @@
+import gc
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from _tiny_model import build_model
+from keyphrase_extractors import EmbeddingModel, SentenceEmbeddingBasedExtractor
+from keyphrase_extractors.embedding_based import SentenceEmbeddingBasedExtractionConfig
+from keyphrase_extractors.embedding_based.registry import (
+    REGISTRY,
+    ResourceRegistry,
+    embedding_model_key,
+)
+
+
+def test_resource_registry():
+    registry = ResourceRegistry()
+    n_loads = 0
+
+    def load() -> object:
+        nonlocal n_loads
+        time.sleep(0.1)
+        n_loads += 1
+        return object()
+
+    # 同時に要求されても 1 回だけ読み込まれ、同じインスタンスが返るか
+    resources: list[object] = []
+    threads = [
+        threading.Thread(
+            target=lambda: resources.append(registry.acquire(key="a", load=load))
+        )
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert n_loads == 1
+    assert all(resource is resources[0] for resource in resources)
+    assert registry.refcount(key="a") == 8
+
+    # すべて解放されると登録から外れ、次は読み込み直される
+    for _ in range(8):
+        registry.release(key="a")
+    assert len(registry) == 0
+    registry.acquire(key="a", load=load)
+    assert n_loads == 2
+
+    # 読み込みに失敗したときは参照が残らないか
+    def fail() -> object:
+        raise RuntimeError
+
+    try:
+        registry.acquire(key="b", load=fail)
+    except RuntimeError:
+        pass
+    assert registry.refcount(key="b") == 0
+
+
+def test_shared_extractors():
+    with tempfile.TemporaryDirectory() as dirpath:
+        model_name = build_model(dirpath=Path(dirpath))
+        model_config = EmbeddingModel(name=model_name, device="cpu")
+        start = time.perf_counter()
+        first = SentenceEmbeddingBasedExtractor(
+            model_config=model_config,
+            extraction_config=SentenceEmbeddingBasedExtractionConfig(
+                grammar_phrasing=False, ngram_range=(1, 1)
+            ),
+        )
+        first_time = time.perf_counter() - start
+
+        # 抽出設定やバッチサイズが違っても、モデルと spaCy のパイプラインは共有される
+        start = time.perf_counter()
+        second = SentenceEmbeddingBasedExtractor(
+            model_config=model_config.model_copy(update={"batchsize": 8}),
+            extraction_config=SentenceEmbeddingBasedExtractionConfig(
+                diversity_mode="use_mmr", grammar_phrasing=False
+            ),
+        )
+        second_time = time.perf_counter() - start
+        print(f"first {first_time:.3f} sec, second {second_time:.3f} sec")
+        assert second.kw_model.model is first.kw_model.model
+        assert second.text_processor is first.text_processor
+        assert second_time < first_time
+        assert (
+            REGISTRY.refcount(key=embedding_model_key(model_config=model_config)) == 2
+        )
+
+        # 無効化するコンポーネントが違えば別のパイプラインになる
+        third = SentenceEmbeddingBasedExtractor(
+            model_config=model_config,
+            extraction_config=SentenceEmbeddingBasedExtractionConfig(
+                spacy_disabled_components={"ner"}
+            ),
+        )
+        assert third.kw_model.model is first.kw_model.model
+        assert third.text_processor is not first.text_processor
+
+        outputs = second.get_keyphrase(
+            input_text="東京都は日本の首都です。", top_n_phrases=3
+        )
+        assert len(outputs.keyphrases[0]) > 0
+
+        # close や参照の破棄で解放され、最後の抽出器が解放すると登録から外れる
+        first.close()
+        first.close()
+        assert (
+            REGISTRY.refcount(key=embedding_model_key(model_config=model_config)) == 2
+        )
+        del second, third
+        gc.collect()
+        assert len(REGISTRY) == 0
+
+
+test_resource_registry()
+test_shared_extractors()
+print("OK")
@@ -0,0 +1,126 @@
+import pickle
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from keyphrase_extractors.embedding_based.ngrams import (
+    NgramVocabulary,
+    enumerate_ngrams,
+)
+from sklearn.feature_extraction.text import CountVectorizer
+
+
+rng = np.random.default_rng(0)
+STOP_WORDS = {"の", "は", "を", "に", "が"}
+
+
+def make_sentences(n_sentences: int, n_words: int, vocab_size: int) -> list[list[str]]:
+    vocab = [f"語{i}" for i in range(vocab_size)] + sorted(STOP_WORDS)
+    return [
+        list(rng.choice(vocab, size=int(rng.choice(np.arange(1, n_words + 1)))))
+        for _ in range(n_sentences)
+    ]
+
+
+def count_vectorizer_ngrams(
+    sentences: list[list[str]], ngram_range: tuple[int, int]
+) -> list[set[str]]:
+    # これまでの実装：文ごとに CountVectorizer を学習し直し、密ベクトルから取り出す
+    vectorizer = CountVectorizer(
+        tokenizer=str.split,
+        token_pattern=None,
+        lowercase=False,
+        stop_words=list(STOP_WORDS),
+        ngram_range=ngram_range,
+    )
+    vectorizer.fit([" ".join(_words) for _words in sentences])
+    vocab = vectorizer.get_feature_names_out()
+    return [
+        set(vocab[vectorizer.transform([" ".join(_words)]).toarray()[0].nonzero()[0]])  # type: ignore
+        for _words in sentences
+    ]
+
+
+def test_parity():
+    sentences = make_sentences(n_sentences=200, n_words=30, vocab_size=50)
+    for ngram_range in [(1, 1), (1, 3), (2, 4)]:
+        expected = count_vectorizer_ngrams(sentences=sentences, ngram_range=ngram_range)
+        for words, _expected in zip(sentences, expected, strict=True):
+            ngrams = enumerate_ngrams(
+                words=words, ngram_range=ngram_range, stop_words=STOP_WORDS
+            )
+            assert len(ngrams) == len(set(ngrams))
+            assert set(ngrams) == _expected
+
+
+def test_boundary():
+    words = ["東京", "の", "大学", "病院", "は", "新しい"]
+    # 既定では CountVectorizer と同じく、ストップワードを除いてから n-gram を作る
+    assert "東京 大学" in enumerate_ngrams(
+        words=words, ngram_range=(1, 2), stop_words=STOP_WORDS
+    )
+    # "boundary" ではストップワードをまたぐ n-gram を作らない
+    assert enumerate_ngrams(
+        words=words,
+        ngram_range=(1, 2),
+        stop_words=STOP_WORDS,
+        stop_word_rule="boundary",
+    ) == ["東京", "大学", "病院", "大学 病院", "新しい"]
+
+
+def test_vocabulary():
+    with tempfile.TemporaryDirectory() as dirpath:
+        path = Path(dirpath) / "ngrams.tsv"
+        vocabulary = NgramVocabulary(min_df=2, path=path)
+        vocabulary.update(documents=[["東京", "大学"], ["東京", "東京"]])
+        assert vocabulary.document_frequency("東京") == 2
+        assert vocabulary.filter(ngrams=["大学", "東京"]) == ["東京"]
+
+        # 呼び出しをまたいで文書頻度が積み上がる
+        vocabulary.update(documents=[["大学"]])
+        assert vocabulary.filter(ngrams=["大学", "東京"]) == ["大学", "東京"]
+
+        # 保存した語彙を読み直せるか。書き込み途中の行は無視される
+        with path.open("a", encoding="utf-8") as file:
+            file.write("病院\t")
+        reopened = NgramVocabulary(min_df=2, path=path)
+        assert reopened.n_documents == 3
+        assert reopened.document_frequency("東京") == 2
+        assert reopened.document_frequency("大学") == 2
+        assert reopened.document_frequency("病院") == 0
+        assert path.read_text(encoding="utf-8").endswith("\n")
+
+        # ロックを除いて pickle でき、復元した語彙にも追記できる
+        restored: NgramVocabulary = pickle.loads(pickle.dumps(reopened))
+        assert restored.document_frequency("東京") == 2
+        restored.update(documents=[["病院"]])
+        assert NgramVocabulary(min_df=2, path=path).n_documents == 4
+
+
+def test_speed():
+    # 長い文書：語彙が大きいほど、密ベクトル化の処理が重くなる
+    sentences = make_sentences(n_sentences=2000, n_words=40, vocab_size=5000)
+    start = time.perf_counter()
+    expected = count_vectorizer_ngrams(sentences=sentences, ngram_range=(1, 3))
+    vectorizer_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ngrams_list = [
+        enumerate_ngrams(words=_words, ngram_range=(1, 3), stop_words=STOP_WORDS)
+        for _words in sentences
+    ]
+    enumerate_time = time.perf_counter() - start
+    print(
+        f"CountVectorizer {vectorizer_time:.3f} sec, "
+        f"enumerate_ngrams {enumerate_time:.3f} sec"
+    )
+    assert [set(_ngrams) for _ngrams in ngrams_list] == expected
+    assert enumerate_time < vectorizer_time
+
+
+test_parity()
+test_boundary()
+test_vocabulary()
+test_speed()
+print("OK")
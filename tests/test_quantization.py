@@ -0,0 +1,136 @@
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from keyphrase_extractors.embedding_based import EmbeddingCache, EmbeddingCacheConfig
+from keyphrase_extractors.embedding_based.data import EmbeddingPrecision
+from keyphrase_extractors.embedding_based.quantization import (
+    calibrate_similarities,
+    dequantize,
+    quantize,
+)
+from keyphrase_extractors.embedding_based.scoring import l2_normalize
+from numpy.typing import NDArray
+
+
+rng = np.random.default_rng(0)
+DIM = 768
+PRECISIONS: list[EmbeddingPrecision] = ["float32", "float16", "int8", "binary"]
+
+
+def make_embeddings(n: int) -> NDArray[np.float32]:
+    # 文埋め込みのように、すべてのベクトルが共通成分を持つ状況を再現
+    common = rng.standard_normal(DIM)
+    return (rng.standard_normal((n, DIM)) + 0.5 * common).astype(np.float32)
+
+
+def cosine(
+    anchor: NDArray[np.float32], candidates: NDArray[np.float32]
+) -> NDArray[np.float32]:
+    return l2_normalize(embeddings=candidates) @ l2_normalize(embeddings=anchor)[0]
+
+
+def test_storage_size():
+    embeddings = make_embeddings(n=10)
+    n_bytes = {
+        precision: quantize(embeddings=embeddings, precision=precision).nbytes
+        for precision in PRECISIONS
+    }
+    assert n_bytes["float16"] * 2 == n_bytes["float32"]
+    assert n_bytes["int8"] * 4 == n_bytes["float32"]
+    assert n_bytes["binary"] * 32 == n_bytes["float32"]
+
+
+def test_cosine_agreement():
+    anchor = make_embeddings(n=1)
+    candidates = make_embeddings(n=500)
+    expected = cosine(anchor=anchor, candidates=candidates)
+    expected_top = set(np.argsort(expected)[-20:].tolist())
+
+    cases: list[tuple[EmbeddingPrecision, float, int]] = [
+        ("float32", 1e-6, 20),
+        ("float16", 1e-3, 19),
+        ("int8", 1e-2, 17),
+        ("binary", 0.25, 5),
+    ]
+    for precision, atol, min_overlap in cases:
+        normalized_anchor = dequantize(
+            embeddings=quantize(embeddings=anchor, precision=precision),
+            precision=precision,
+        )
+        normalized_candidates = dequantize(
+            embeddings=quantize(embeddings=candidates, precision=precision),
+            precision=precision,
+        )
+        assert normalized_candidates.dtype == np.float32
+        actual = calibrate_similarities(
+            similarities=normalized_candidates @ normalized_anchor[0],
+            precision=precision,
+        )
+        error = float(np.abs(actual - expected).max())
+        overlap = len(expected_top & set(np.argsort(actual)[-20:].tolist()))
+        print(f"{precision:8s} max error: {error:.4f}, overlap@20: {overlap}")
+        assert error < atol
+        assert overlap >= min_overlap
+
+
+def test_zero_vectors():
+    embeddings = np.zeros((2, DIM), dtype=np.float32)
+    for precision in PRECISIONS:
+        normalized = dequantize(
+            embeddings=quantize(embeddings=embeddings, precision=precision),
+            precision=precision,
+        )
+        assert np.isfinite(normalized).all()
+
+
+def test_binary_padding():
+    # 8 の倍数でない次元では、最後のバイトの余りのビットを次元に数えない
+    embeddings = rng.standard_normal((50, 12)).astype(np.float32)
+    normalized = dequantize(
+        embeddings=quantize(embeddings=embeddings, precision="binary"),
+        precision="binary",
+        dim=12,
+    )
+    assert normalized.shape == (50, 12)
+    signs = np.where(embeddings > 0, 1.0, -1.0)
+    assert np.allclose(normalized @ normalized.T, signs @ signs.T / 12, atol=1e-6)
+
+
+def test_cache_roundtrip():
+    embeddings = make_embeddings(n=3)
+    with tempfile.TemporaryDirectory() as dirpath:
+        config = EmbeddingCacheConfig(cache_dirpath=Path(dirpath))
+        for precision in PRECISIONS:
+            stored = quantize(embeddings=embeddings, precision=precision)
+            cache = EmbeddingCache(
+                model_name="dummy/model", config=config, precision=precision
+            )
+            for i, vector in enumerate(stored):
+                cache.put(text=f"text{i}", prompt_name=None, vector=vector)
+
+            # 再起動後もディスクから同じ精度で読み出せるか
+            reloaded = EmbeddingCache(
+                model_name="dummy/model", config=config, precision=precision
+            )
+            for i, vector in enumerate(stored):
+                cached = reloaded.get(text=f"text{i}", prompt_name=None)
+                assert cached is not None
+                assert cached.dtype == vector.dtype
+                assert np.array_equal(cached, vector)
+
+        # 精度ごとに別の保存先になり、float32 は従来の保存先のまま
+        assert sorted(path.name for path in Path(dirpath).iterdir()) == [
+            "dummy_model",
+            "dummy_model__binary",
+            "dummy_model__float16",
+            "dummy_model__int8",
+        ]
+
+
+test_storage_size()
+test_cosine_agreement()
+test_zero_vectors()
+test_binary_padding()
+test_cache_roundtrip()
+print("OK")
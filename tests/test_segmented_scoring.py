@@ -0,0 +1,124 @@
+import time
+
+import numpy as np
+from keyphrase_extractors.embedding_based.scoring import (
+    l2_normalize,
+    segmented_similarities,
+    segmented_top_k,
+)
+from numpy.typing import NDArray
+from sklearn.metrics.pairwise import cosine_similarity
+
+
+rng = np.random.default_rng(0)
+DIM = 256
+
+
+def make_segments(
+    sizes: list[int],
+) -> tuple[NDArray[np.float32], NDArray[np.float32], NDArray[np.intp]]:
+    anchors = rng.standard_normal((len(sizes), DIM)).astype(np.float32)
+    candidates = rng.standard_normal((sum(sizes), DIM)).astype(np.float32)
+    offsets = np.concatenate([[0], np.cumsum(sizes)]).astype(np.intp)
+    return anchors, candidates, offsets
+
+
+def top_k_per_segment(
+    anchors: NDArray[np.float32],
+    candidates: NDArray[np.float32],
+    offsets: NDArray[np.intp],
+    top_n: int,
+) -> list[list[tuple[int, float]]]:
+    # 従来の実装：セグメントごとに sklearn で類似度を計算
+    selected_list: list[list[tuple[int, float]]] = []
+    for i in range(len(offsets) - 1):
+        _candidates = candidates[offsets[i] : offsets[i + 1]]
+        if _candidates.shape[0] == 0:
+            selected_list.append([])
+            continue
+        similarities = cosine_similarity(anchors[i].reshape(1, -1), _candidates)[0]
+        _top_n = min(top_n, _candidates.shape[0])
+        selected_idx = np.argpartition(similarities, -_top_n)[-_top_n:]
+        selected_idx = selected_idx[np.argsort(similarities[selected_idx])][::-1]
+        selected_list.append([(int(j), float(similarities[j])) for j in selected_idx])
+    return selected_list
+
+
+def top_k_segmented(
+    anchors: NDArray[np.float32],
+    candidates: NDArray[np.float32],
+    offsets: NDArray[np.intp],
+    top_n: int,
+) -> list[list[tuple[int, float]]]:
+    similarities = segmented_similarities(
+        anchors=l2_normalize(embeddings=anchors),
+        candidates=l2_normalize(embeddings=candidates),
+        offsets=offsets,
+    )
+    return [
+        [(int(j), float(similarities[_offset + j])) for j in _selected_idx]
+        for _offset, _selected_idx in zip(
+            offsets[:-1],
+            segmented_top_k(scores=similarities, offsets=offsets, top_n=top_n),
+            strict=True,
+        )
+    ]
+
+
+def assert_same(
+    expected: list[list[tuple[int, float]]], actual: list[list[tuple[int, float]]]
+) -> None:
+    assert len(expected) == len(actual)
+    for _expected, _actual in zip(expected, actual, strict=True):
+        assert [j for j, _ in _expected] == [j for j, _ in _actual]
+        assert np.allclose(
+            [s for _, s in _expected], [s for _, s in _actual], atol=1e-5
+        )
+
+
+def test_parity():
+    # 空のセグメントや top_n より小さいセグメントを含む
+    sizes = [0, 1, 3, 10, 0, 25, 7]
+    anchors, candidates, offsets = make_segments(sizes=sizes)
+    for top_n in [1, 5, 30]:
+        assert_same(
+            expected=top_k_per_segment(anchors, candidates, offsets, top_n),
+            actual=top_k_segmented(anchors, candidates, offsets, top_n),
+        )
+
+
+def test_zero_vectors():
+    anchors, candidates, offsets = make_segments(sizes=[3])
+    candidates[1] = 0.0
+    similarities = segmented_similarities(
+        anchors=l2_normalize(embeddings=anchors),
+        candidates=l2_normalize(embeddings=candidates),
+        offsets=offsets,
+    )
+    assert similarities[1] == 0.0
+    assert np.isfinite(similarities).all()
+
+
+def test_speed():
+    # 長い文書を想定：2000 文 × 平均 15 候補
+    sizes = rng.choice(np.arange(30), size=2000).tolist()
+    anchors, candidates, offsets = make_segments(sizes=sizes)
+
+    start = time.perf_counter()
+    expected = top_k_per_segment(anchors, candidates, offsets, top_n=10)
+    per_segment_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = top_k_segmented(anchors, candidates, offsets, top_n=10)
+    segmented_time = time.perf_counter() - start
+
+    assert_same(expected=expected, actual=actual)
+    print(f"per segment: {per_segment_time:.4f} sec")
+    print(f"segmented  : {segmented_time:.4f} sec")
+    assert segmented_time < per_segment_time
+
+
+test_parity()
+test_zero_vectors()
+test_speed()
+print("OK")
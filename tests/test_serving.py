@@ -0,0 +1,390 @@
+import asyncio
+import json
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from _tiny_model import build_model
+from keyphrase_extractors import EmbeddingModel, SentenceEmbeddingBasedExtractor
+from keyphrase_extractors.base_extractor import BaseExtractor
+from keyphrase_extractors.embedding_based import SentenceEmbeddingBasedExtractionConfig
+from keyphrase_extractors.io_data import Keyphrase
+from keyphrase_extractors.serving import (
+    BatchingConfig,
+    ExtractionRequest,
+    ExtractionServer,
+    MicroBatcher,
+    QueueFullError,
+    ServerConfig,
+)
+
+
+class StubExtractor(BaseExtractor):
+    """
+    モデルを使わずに、各チャンクの先頭の文字列を返す抽出器
+    （呼び出されたバッチを記録し、`gate` が開くまで処理を止められる）
+    """
+
+    def __init__(self, latency: float = 0.05):
+        super().__init__(stop_words=set())
+        self.latency = latency
+        self.gate = threading.Event()
+        self.gate.set()
+        self.batches: list[list[str]] = []
+
+    def _extract_batch(
+        self, docs: list[list[str]], top_n_phrases: int
+    ) -> list[list[list[Keyphrase]]]:
+        self.gate.wait()
+        time.sleep(self.latency)
+        self.batches.append([_chunks[0] for _chunks in docs])
+        if any("失敗" in _chunk for _chunks in docs for _chunk in _chunks):
+            raise RuntimeError("失敗")
+        return [
+            [
+                [Keyphrase(phrase=_chunk[:top_n_phrases], score=1.0)]
+                for _chunk in _chunks
+            ]
+            for _chunks in docs
+        ]
+
+
+async def wait_for_depth(batcher: MicroBatcher, depth: int):
+    while batcher.metrics().in_flight < depth:
+        await asyncio.sleep(0.001)
+
+
+def test_coalescing():
+    async def main():
+        extractor = StubExtractor()
+        batcher = MicroBatcher(
+            extractor=extractor, config=BatchingConfig(max_batch_size=8, max_wait_ms=20)
+        )
+        await batcher.start()
+        texts = [f"文章{i}" for i in range(20)]
+        outputs_list = await asyncio.gather(
+            *[
+                batcher.submit(request=ExtractionRequest(text=_text, top_n_phrases=3))
+                for _text in texts
+            ]
+        )
+        # 各リクエストには自分の結果が返る
+        assert [_outputs.keyphrases[0][0].phrase for _outputs in outputs_list] == [
+            _text[:3] for _text in texts
+        ]
+        # 同時に届いたリクエストはまとめて処理される
+        metrics = batcher.metrics()
+        assert max(metrics.batch_size_histogram) == 8
+        assert metrics.batches == len(extractor.batches) == 3
+        assert sum(k * v for k, v in metrics.batch_size_histogram.items()) == 20
+        assert metrics.lanes["interactive"].accepted == 20
+        assert metrics.latency.count == 20
+        assert 0 < metrics.latency.p50_ms <= metrics.latency.p99_ms
+
+        # top_n_phrases が異なるリクエストは別々に抽出する
+        outputs_list = await asyncio.gather(
+            batcher.submit(
+                request=ExtractionRequest(text="自然言語処理", top_n_phrases=2)
+            ),
+            batcher.submit(
+                request=ExtractionRequest(text="自然言語処理", top_n_phrases=4)
+            ),
+        )
+        assert [_outputs.keyphrases[0][0].phrase for _outputs in outputs_list] == [
+            "自然",
+            "自然言語",
+        ]
+        await batcher.close()
+
+    asyncio.run(main())
+
+
+def test_priority():
+    async def main():
+        extractor = StubExtractor(latency=0.0)
+        batcher = MicroBatcher(
+            extractor=extractor, config=BatchingConfig(max_batch_size=4, max_wait_ms=0)
+        )
+        await batcher.start()
+        # 最初のバッチで処理を止めている間に、bulk、interactive の順にリクエストが届く
+        extractor.gate.clear()
+        first = asyncio.create_task(
+            batcher.submit(request=ExtractionRequest(text="最初"))
+        )
+        await wait_for_depth(batcher=batcher, depth=1)
+        bulk = [
+            asyncio.create_task(
+                batcher.submit(
+                    request=ExtractionRequest(text=f"bulk{i}", priority="bulk")
+                )
+            )
+            for i in range(4)
+        ]
+        interactive = [
+            asyncio.create_task(
+                batcher.submit(request=ExtractionRequest(text=f"interactive{i}"))
+            )
+            for i in range(4)
+        ]
+        await asyncio.sleep(0.01)
+        assert batcher.metrics().lanes["bulk"].queue_depth == 4
+        assert batcher.metrics().lanes["interactive"].queue_depth == 4
+        extractor.gate.set()
+        await asyncio.gather(first, *bulk, *interactive)
+        # 後から届いた interactive のリクエストが先に処理される
+        assert extractor.batches == [
+            ["最初"],
+            [f"interactive{i}" for i in range(4)],
+            [f"bulk{i}" for i in range(4)],
+        ]
+        await batcher.close()
+
+    asyncio.run(main())
+
+
+def test_admission():
+    async def main():
+        extractor = StubExtractor(latency=0.0)
+        batcher = MicroBatcher(
+            extractor=extractor,
+            config=BatchingConfig(
+                max_batch_size=1,
+                max_wait_ms=0,
+                interactive_queue_size=2,
+                bulk_queue_size=1,
+            ),
+        )
+        await batcher.start()
+        extractor.gate.clear()
+        first = asyncio.create_task(
+            batcher.submit(request=ExtractionRequest(text="最初"))
+        )
+        await wait_for_depth(batcher=batcher, depth=1)
+        waiting = [
+            asyncio.create_task(batcher.submit(request=ExtractionRequest(text=_text)))
+            for _text in ["待機1", "待機2"]
+        ]
+        await asyncio.sleep(0.01)
+        # キューが一杯のリクエストは待たずに断られる
+        try:
+            await batcher.submit(request=ExtractionRequest(text="超過"))
+            raise AssertionError("QueueFullError was not raised.")
+        except QueueFullError:
+            pass
+        # 他のレーンには影響しない
+        bulk = asyncio.create_task(
+            batcher.submit(request=ExtractionRequest(text="bulk", priority="bulk"))
+        )
+        await asyncio.sleep(0.01)
+        metrics = batcher.metrics()
+        assert metrics.lanes["interactive"].rejected == 1
+        assert metrics.lanes["interactive"].queue_depth == 2
+        assert metrics.lanes["bulk"].queue_depth == 1
+        extractor.gate.set()
+        await asyncio.gather(first, *waiting, bulk)
+
+        # 失敗したバッチは 1 件ずつやり直し、失敗したリクエストだけがエラーになる
+        batcher.config.max_batch_size = 4
+        batcher.config.max_wait_ms = 20
+        results = await asyncio.gather(
+            *[
+                batcher.submit(request=ExtractionRequest(text=_text))
+                for _text in ["失敗", "成功"]
+            ],
+            return_exceptions=True,
+        )
+        assert isinstance(results[0], RuntimeError)
+        assert results[1].keyphrases[0][0].phrase == "成功"  # type: ignore
+        assert extractor.batches[-3:] == [["失敗", "成功"], ["失敗"], ["成功"]]
+        assert batcher.metrics().failed_requests == 1
+        await batcher.close()
+
+    asyncio.run(main())
+
+
+def test_close():
+    async def main():
+        extractor = StubExtractor(latency=0.0)
+        batcher = MicroBatcher(
+            extractor=extractor, config=BatchingConfig(max_batch_size=2, max_wait_ms=0)
+        )
+        await batcher.start()
+        # 処理中のバッチと、キューで待っているリクエストがある状態で閉じる
+        extractor.gate.clear()
+        running = [
+            asyncio.create_task(batcher.submit(request=ExtractionRequest(text=_text)))
+            for _text in ["処理中1", "処理中2"]
+        ]
+        await wait_for_depth(batcher=batcher, depth=2)
+        waiting = asyncio.create_task(
+            batcher.submit(request=ExtractionRequest(text="待機"))
+        )
+        await asyncio.sleep(0.01)
+        await batcher.close()
+
+        # どのリクエストも待ち続けずにエラーになる
+        try:
+            results = await asyncio.wait_for(
+                asyncio.gather(*running, waiting, return_exceptions=True), timeout=1.0
+            )
+        finally:
+            extractor.gate.set()
+        assert all(isinstance(_result, RuntimeError) for _result in results)
+        assert batcher.metrics().in_flight == 0
+
+        # バッチを集めている途中で閉じた場合も同じ
+        batcher = MicroBatcher(
+            extractor=extractor,
+            config=BatchingConfig(max_batch_size=2, max_wait_ms=10_000),
+        )
+        await batcher.start()
+        collecting = asyncio.create_task(
+            batcher.submit(request=ExtractionRequest(text="収集中"))
+        )
+        await asyncio.sleep(0.01)
+        await batcher.close()
+        (result,) = await asyncio.wait_for(
+            asyncio.gather(collecting, return_exceptions=True), timeout=1.0
+        )
+        assert isinstance(result, RuntimeError)
+
+    asyncio.run(main())
+
+
+def request(port: int, method: str, path: str, body: Any = None) -> tuple[int, Any]:
+    http_request = urllib.request.Request(
+        f"http://127.0.0.1:{port}{path}",
+        data=None if body is None else json.dumps(body).encode("utf-8"),
+        method=method,
+    )
+    try:
+        with urllib.request.urlopen(http_request, timeout=60) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+def test_server():
+    async def main(model_name: str):
+        extractor = SentenceEmbeddingBasedExtractor(
+            model_config=EmbeddingModel(name=model_name, device="cpu"),
+            extraction_config=SentenceEmbeddingBasedExtractionConfig(),
+        )
+        texts = [
+            "東京都は日本の首都です。多くの企業の本社が東京都にあります。",
+            "自然言語処理では、文章から語句を抽出します。",
+            "機械学習モデルで埋込の類似度を計算します。",
+            "日本の企業は機械学習を使った自然言語処理に取り組んでいます。",
+        ] * 4
+        expected = [
+            extractor.get_keyphrase(input_text=_text, top_n_phrases=5).model_dump(
+                mode="json"
+            )
+            for _text in texts
+        ]
+
+        server = ExtractionServer(
+            extractor=extractor,
+            config=ServerConfig(
+                port=0, batching=BatchingConfig(max_batch_size=8, max_wait_ms=50)
+            ),
+        )
+        await server.start()
+        port = server.port
+        with ThreadPoolExecutor(max_workers=len(texts)) as executor:
+            responses = await asyncio.gather(
+                *[
+                    asyncio.get_running_loop().run_in_executor(
+                        executor,
+                        request,
+                        port,
+                        "POST",
+                        "/extract",
+                        {"text": _text, "top_n_phrases": 5, "priority": "bulk"},
+                    )
+                    for _text in texts
+                ]
+            )
+        # バッチで処理しても、1 件ずつ抽出した結果と同じ
+        assert [_status for _status, _ in responses] == [200] * len(texts)
+        assert [_body for _, _body in responses] == expected
+
+        status, metrics = await asyncio.to_thread(request, port, "GET", "/metrics")
+        assert status == 200
+        assert metrics["lanes"]["bulk"]["accepted"] == len(texts)
+        assert sum(metrics["batch_size_histogram"].values()) < len(texts)
+        assert metrics["lanes"]["bulk"]["latency"]["count"] == len(texts)
+
+        assert await asyncio.to_thread(request, port, "GET", "/health") == (
+            200,
+            {"status": "ok"},
+        )
+        status, _ = await asyncio.to_thread(
+            request, port, "POST", "/extract", {"text": "日本", "priority": "urgent"}
+        )
+        assert status == 400
+        status, _ = await asyncio.to_thread(request, port, "GET", "/extract")
+        assert status == 405
+        status, _ = await asyncio.to_thread(request, port, "GET", "/unknown")
+        assert status == 404
+        await server.close()
+
+    with tempfile.TemporaryDirectory() as dirpath:
+        asyncio.run(main(model_name=build_model(dirpath=Path(dirpath))))
+
+
+def test_server_rejection():
+    async def main():
+        extractor = StubExtractor(latency=0.0)
+        server = ExtractionServer(
+            extractor=extractor,
+            config=ServerConfig(
+                port=0,
+                batching=BatchingConfig(
+                    max_batch_size=1, max_wait_ms=0, interactive_queue_size=1
+                ),
+            ),
+        )
+        await server.start()
+        extractor.gate.clear()
+        first = asyncio.create_task(
+            asyncio.to_thread(
+                request, server.port, "POST", "/extract", {"text": "最初"}
+            )
+        )
+        await wait_for_depth(batcher=server.batcher, depth=1)
+        second = asyncio.create_task(
+            asyncio.to_thread(
+                request, server.port, "POST", "/extract", {"text": "待機"}
+            )
+        )
+        while server.batcher.metrics().lanes["interactive"].queue_depth < 1:
+            await asyncio.sleep(0.001)
+        # キューが一杯なら 429 を返す
+        status, body = await asyncio.to_thread(
+            request, server.port, "POST", "/extract", {"text": "超過"}
+        )
+        assert status == 429
+        assert "full" in body["detail"]
+        extractor.gate.set()
+        assert [_status for _status, _ in await asyncio.gather(first, second)] == [
+            200,
+            200,
+        ]
+        await server.close()
+
+    asyncio.run(main())
+
+
+test_coalescing()
+test_priority()
+test_admission()
+test_close()
+test_server_rejection()
+test_server()
+print("OK")
@@ -0,0 +1,193 @@
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from _tiny_model import CHARACTERS, build_model
+from keyphrase_extractors.embedding_based.scoring import l2_normalize
+from keyphrase_extractors.embedding_based.span_pooling import (
+    SpanPoolingEncoder,
+    token_offsets,
+)
+from numpy.typing import NDArray
+from sentence_transformers import SentenceTransformer
+
+
+rng = np.random.default_rng(0)
+WORDS = ["model", "token", "##s", "embed", "##ding"]
+
+
+def load_model(max_seq_length: int = 128) -> SentenceTransformer:
+    # 読み込んだ後は保存先を使わないので、一時ディレクトリはすぐに削除する
+    with tempfile.TemporaryDirectory() as dirpath:
+        return SentenceTransformer(
+            build_model(
+                dirpath=Path(dirpath),
+                words=WORDS,
+                max_seq_length=max_seq_length,
+                prompts={"query": "語句", "passage": "文章"},
+            ),
+            device="cpu",
+        )
+
+
+def template(source: str, target: str) -> str:
+    return f"次の本文における「{target}」の意味\n本文：\n{source}"
+
+
+class CountingModel:
+    # encode の呼び出し回数を数える
+    def __init__(self, model: SentenceTransformer):
+        self.model = model
+        self.n_calls = 0
+
+    def __getattr__(self, name: str):
+        return getattr(self.model, name)
+
+    def encode(self, *args: Any, **kwargs: Any) -> Any:
+        self.n_calls += 1
+        return self.model.encode(*args, **kwargs)  # type: ignore
+
+
+class SlowTokenizer:
+    # オフセットを返さない tokenizer（BertJapaneseTokenizer など）を再現
+    def __init__(self, tokenizer: Any):
+        self.tokenizer = tokenizer
+        self.unk_token: str = tokenizer.unk_token
+
+    def tokenize(self, text: str) -> list[str]:
+        return self.tokenizer.tokenize(text)
+
+
+def test_token_offsets():
+    model = load_model()
+    text = "自然言語処理 Embeddings と tokens の model"
+    tokenizer = model.tokenizer
+    tokens = tokenizer.tokenize(text)
+    expected = token_offsets(tokenizer=tokenizer, text=text)
+    actual = token_offsets(tokenizer=SlowTokenizer(tokenizer=tokenizer), text=text)
+    assert len(tokens) == len(expected) == len(actual)
+    # 未知語以外は、文字位置の対応が一致するか
+    for token, _expected, _actual in zip(tokens, expected, actual, strict=True):
+        if token != tokenizer.unk_token:
+            assert _expected == _actual
+
+
+def test_pooling():
+    model = load_model()
+    # 語彙内の文字だけなので 1 文字が 1 トークンになる
+    source = "東京都日本首都企業本社"
+    encoder = SpanPoolingEncoder(model=model, batchsize=8, show_progress_bar=False)
+    vectors, offsets = encoder.encode(
+        sources=[source],
+        targets_list=[["東京都", "本社"]],
+        prompt_name="query",
+        template=template,
+    )
+    assert offsets.tolist() == [0, 2]
+
+    # プロンプト「語句」と [CLS] の後ろのトークン埋め込みを平均したものと一致するか
+    token_embeddings: NDArray[np.float32] = model.encode(  # type: ignore
+        [source], prompt_name="query", output_value="token_embeddings"
+    )[0].numpy()
+    n_prefix = 1 + len("語句")
+    expected = l2_normalize(
+        embeddings=np.stack(
+            [
+                token_embeddings[n_prefix : n_prefix + 3].mean(axis=0),
+                token_embeddings[n_prefix + 9 : n_prefix + 11].mean(axis=0),
+            ]
+        )
+    )
+    assert np.allclose(vectors, expected, atol=1e-5)
+
+
+def test_merged_sentence():
+    counting = CountingModel(model=load_model())
+    encoder = SpanPoolingEncoder(
+        model=counting,  # type: ignore
+        batchsize=8,
+        show_progress_bar=False,
+    )
+    # 複数の断片をまとめた文は改行で連結されるが、本文では別の空白で区切られている
+    source = "東京都日本首都\n\n企業本社 機械学習モデル"
+    vectors, _ = encoder.encode(
+        sources=[source],
+        targets_list=[["東京都日本首都\n企業本社\n機械学習"]],
+        prompt_name="query",
+        template=template,
+    )
+    # テンプレートにフォールバックせず、断片のトークン埋め込みが平均される
+    assert counting.n_calls == 1
+    token_embeddings: NDArray[np.float32] = counting.model.encode(  # type: ignore
+        [source], prompt_name="query", output_value="token_embeddings"
+    )[0].numpy()
+    n_prefix = 1 + len("語句")
+    expected = l2_normalize(
+        embeddings=token_embeddings[n_prefix : n_prefix + 15].mean(axis=0)[None]
+    )
+    assert np.allclose(vectors, expected, atol=1e-5)
+
+
+def test_long_source_and_fallback():
+    counting = CountingModel(model=load_model())
+    encoder = SpanPoolingEncoder(
+        model=counting,  # type: ignore
+        batchsize=8,
+        show_progress_bar=False,
+    )
+    # max_seq_length を超える文章でも、末尾の語句がウィンドウから得られるか
+    source = "".join(rng.choice(CHARACTERS[:10], size=300)) + "東京都"
+    vectors, _ = encoder.encode(
+        sources=[source],
+        targets_list=[["東京都"]],
+        prompt_name="query",
+        template=template,
+    )
+    assert counting.n_calls == 1
+    assert np.isfinite(vectors).all()
+
+    # 文章に含まれない語句はテンプレートでベクトル化される
+    encoder.encode(
+        sources=[source],
+        targets_list=[["東京都", "大阪"]],
+        prompt_name="query",
+        template=template,
+    )
+    assert counting.n_calls == 3
+
+
+def test_speed():
+    model = load_model(max_seq_length=512)
+    # 長い文章から多数の語句を取り出す状況
+    source = "".join(rng.choice(CHARACTERS, size=400))
+    targets = sorted({source[i : i + 3] for i in range(0, 390, 5)})
+    encoder = SpanPoolingEncoder(model=model, batchsize=32, show_progress_bar=False)
+
+    start = time.perf_counter()
+    model.encode(  # type: ignore
+        [template(source, target) for target in targets],
+        prompt_name="query",
+        batch_size=32,
+    )
+    template_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    encoder.encode(
+        sources=[source], targets_list=[targets], prompt_name="query", template=template
+    )
+    span_time = time.perf_counter() - start
+    print(
+        f"{len(targets)} targets: template {template_time:.4f} sec, "
+        f"span pooling {span_time:.4f} sec"
+    )
+    assert span_time < template_time
+
+
+test_token_offsets()
+test_pooling()
+test_merged_sentence()
+test_long_source_and_fallback()
+test_speed()
+print("OK")
@@ -0,0 +1,120 @@
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from _tiny_model import build_model
+from keyphrase_extractors import (
+    ClassicalExtractor,
+    EmbeddingModel,
+    SentenceEmbeddingBasedExtractor,
+)
+from keyphrase_extractors.base_extractor import BaseExtractor
+from keyphrase_extractors.embedding_based import SentenceEmbeddingBasedExtractionConfig
+from keyphrase_extractors.io_data import Outputs
+from pke.unsupervised import TextRank
+from sklearn.feature_extraction.text import CountVectorizer
+
+
+N_THREADS = 8
+N_ROUNDS = 3
+
+
+def load_texts() -> list[str]:
+    input_text_filepath = Path("../dataset/sample/ABEJA_Techblog.md")
+    input_text = input_text_filepath.read_text()
+    input_text = re.sub(r"\[(.+?)\]\(https://[^\)]+\)", r"\1", input_text)
+    input_text = re.sub(r"https?://[^\s]+", "", input_text)
+    # 長さの異なる入力を用意する
+    paragraphs = [_p for _p in input_text.split("\n\n") if len(_p.strip()) > 50]
+    return ["\n\n".join(paragraphs[i : i + 1 + i % 3]) for i in range(24)]
+
+
+def to_tuples(outputs: Outputs) -> list[list[tuple[str, float]]]:
+    return [
+        [(_keyphrase.phrase, round(_keyphrase.score, 5)) for _keyphrase in _chunk]
+        for _chunk in outputs.keyphrases
+    ]
+
+
+def hammer(extractor: BaseExtractor, texts: list[str]):
+    # 逐次実行の結果を基準に、1 つのインスタンスを多数のスレッドから同時に呼び出す
+    def extract(text: str) -> list[list[tuple[str, float]]]:
+        return to_tuples(extractor.get_keyphrase(input_text=text, top_n_phrases=10))
+
+    serial = [extract(text=_text) for _text in texts]
+    with ThreadPoolExecutor(max_workers=N_THREADS) as executor:
+        for _ in range(N_ROUNDS):
+            assert list(executor.map(extract, texts)) == serial
+
+
+def test_embedding_based_extractor():
+    texts = load_texts()
+    with tempfile.TemporaryDirectory() as dirpath:
+        model_config = EmbeddingModel(
+            name=build_model(dirpath=Path(dirpath)), device="cpu"
+        )
+        extraction_configs = [
+            SentenceEmbeddingBasedExtractionConfig(),
+            SentenceEmbeddingBasedExtractionConfig(
+                diversity_mode="use_mmr", add_source_text=True
+            ),
+            SentenceEmbeddingBasedExtractionConfig(
+                filter_sentences=False, grammar_phrasing=False, ngram_range=(1, 2)
+            ),
+            # トークナイザーの offset mapping を使う
+            SentenceEmbeddingBasedExtractionConfig(
+                add_source_text=True, source_text_encoding="span_pooling"
+            ),
+        ]
+        for extraction_config in extraction_configs:
+            extractor = SentenceEmbeddingBasedExtractor(
+                model_config=model_config,
+                extraction_config=extraction_config,
+                max_characters=300,
+            )
+            hammer(extractor=extractor, texts=texts)
+
+        # バッチ分割のためにトークン数を数える
+        extractor = SentenceEmbeddingBasedExtractor(
+            model_config=model_config.model_copy(update={"max_batch_tokens": 512}),
+            extraction_config=SentenceEmbeddingBasedExtractionConfig(
+                add_source_text=True
+            ),
+            max_characters=300,
+        )
+        hammer(extractor=extractor, texts=texts)
+
+        # 渡した CountVectorizer は呼び出しごとに書き換えられない
+        count_vectorizer = CountVectorizer(
+            tokenizer=str.split, token_pattern=None, lowercase=False, ngram_range=(1, 2)
+        )
+        extractor = SentenceEmbeddingBasedExtractor(
+            model_config=model_config,
+            extraction_config=SentenceEmbeddingBasedExtractionConfig(
+                grammar_phrasing=False, ngram_range=(1, 2)
+            ),
+            count_vectorizer=count_vectorizer,
+        )
+        hammer(extractor=extractor, texts=texts)
+        assert not hasattr(count_vectorizer, "vocabulary_")
+
+
+def test_classical_extractor():
+    extractor = ClassicalExtractor(
+        extractor=TextRank(),
+        args_candidate_selection={"pos": {"NOUN", "PROPN", "ADJ", "NUM"}},
+        args_candidate_weighting={
+            "window": 2,
+            "pos": {"NOUN", "PROPN", "ADJ", "NUM"},
+            "top_percent": None,
+            "normalized": False,
+        },
+        max_characters=300,
+    )
+    hammer(extractor=extractor, texts=load_texts())
+
+
+test_embedding_based_extractor()
+test_classical_extractor()
+print("OK")